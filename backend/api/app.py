@@ -1,9 +1,15 @@
-from flask import Flask, request, jsonify
+import time
+
+_import_started = time.perf_counter()
+
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import sys
 import os
 import logging
 import json
+import random
+import threading
 from datetime import datetime
 
 # Add the python-dcf-model directory to sys.path
@@ -12,15 +18,36 @@ backend_dir = os.path.dirname(current_dir)
 project_dir = os.path.dirname(backend_dir)
 dcf_model_dir = os.path.join(project_dir, '..', 'python-dcf-model')
 sys.path.append(os.path.abspath(dcf_model_dir))
+sys.path.append(current_dir)
+
+from cache import MemoryBackend, create_cache_from_env
+from jobs import COMPLETED, FINISHED_STATES, JobManager
+from metrics import InstrumentedProvider, MetricsRegistry, stage
+from profiling import ProfileStore, SamplingProfiler
+import search
+import startup
 
-# Now try to import DCFModel
+binary = startup.load_module('binary')
+
+# Now import DCFModel. Modules that pull in NumPy and pandas are loaded on
+# first use when DCF_LAZY_IMPORTS is set (see startup.py). The provider and
+# scheduler below are built at import time, so the API cannot start without
+# the model package
 try:
-    from dcf_model.dcf import DCFModel
+    from dcf_model.providers import CoalescingProvider, HTTPProvider, YahooFinanceProvider
+    from dcf_model.scheduler import FetchScheduler, UpstreamError
+    dcf_module = startup.load_module('dcf_model.dcf')
+    batch_module = startup.load_module('dcf_model.batch')
+    reverse_module = startup.load_module('dcf_model.reverse')
+    valuation_module = startup.load_module('dcf_model.valuation')
+    screen_module = startup.load_module('dcf_model.screen')
     logging.info(f"Successfully imported DCFModel from {dcf_model_dir}")
 except ImportError as e:
     logging.error(f"Failed to import DCFModel: {e}")
     logging.error(f"sys.path: {sys.path}")
     logging.error(f"Looking for DCF model in: {dcf_model_dir}")
+    raise ImportError(f"Failed to import DCFModel: {e}. Put the dcf_model package on "
+                      f"PYTHONPATH or under {os.path.abspath(dcf_model_dir)}") from e
 
 # Configure logging
 logging.basicConfig(
@@ -35,13 +62,274 @@ logger = logging.getLogger('dcf-web-api')
 app = Flask(__name__)
 CORS(app)  # Enable cross-origin requests
 
+# Request latency, stage timings and upstream fetch counts, served at /api/metrics
+metrics = MetricsRegistry()
+
+# Every upstream request goes through one scheduler: a token-bucket rate limit,
+# bounded concurrency over a shared connection pool, and retries with jittered
+# backoff. DCF_UPSTREAM_URL replaces Yahoo Finance with an HTTP service serving
+# company records (e.g. a local stub server)
+UPSTREAM_CONCURRENCY = int(os.environ.get('DCF_UPSTREAM_CONCURRENCY', 8))
+UPSTREAM_URL = os.environ.get('DCF_UPSTREAM_URL')
+if UPSTREAM_URL:
+    upstream_transport = HTTPProvider(UPSTREAM_URL, pool_size=UPSTREAM_CONCURRENCY)
+else:
+    upstream_transport = YahooFinanceProvider(pool_size=UPSTREAM_CONCURRENCY)
+upstream_provider = FetchScheduler(
+    InstrumentedProvider(upstream_transport, metrics),
+    rate=float(os.environ.get('DCF_UPSTREAM_RATE', 5)),
+    burst=int(os.environ.get('DCF_UPSTREAM_BURST', 10)),
+    max_concurrency=UPSTREAM_CONCURRENCY,
+    max_attempts=int(os.environ.get('DCF_UPSTREAM_ATTEMPTS', 4)),
+    stale_ttl=float(os.environ.get('DCF_UPSTREAM_STALE_TTL', 86400))
+)
+
+# Serve company data from local snapshots when a snapshot directory is configured,
+# falling back to live upstream data for tickers without a snapshot
+SNAPSHOT_DIR = os.environ.get('DCF_SNAPSHOT_DIR')
+if SNAPSHOT_DIR:
+    from dcf_model.snapshots import SnapshotProvider, SnapshotStore
+    
+    data_provider = SnapshotProvider(SnapshotStore(SNAPSHOT_DIR), fallback=upstream_provider)
+    logger.info(f"Serving company data from snapshots in {SNAPSHOT_DIR}")
+else:
+    data_provider = upstream_provider
+
+# Concurrent requests for the same ticker share a single upstream fetch
+data_provider = CoalescingProvider(data_provider)
+
+# Upper bound on tickers per batch request and on concurrent upstream fetches
+MAX_BATCH_TICKERS = int(os.environ.get('DCF_MAX_BATCH_TICKERS', 1000))
+BATCH_FETCH_WORKERS = int(os.environ.get('DCF_BATCH_FETCH_WORKERS', 16))
+
+# Cache of successful analysis responses, keyed on ticker and parameters
+result_cache = create_cache_from_env()
+
+# Recently fetched models by ticker. Requests work on clones, so a request
+# that only changes parameters skips the fetch and reuses every intermediate
+# result its parameters do not affect
+MODEL_CACHE_TTL = int(os.environ.get('DCF_MODEL_CACHE_TTL', 300))
+model_store = MemoryBackend(max_entries=int(os.environ.get('DCF_MODEL_CACHE_SIZE', 256)))
+
+def load_model(ticker):
+    """Return a private copy of the DCF model for a ticker, fetching data if needed"""
+    key = ticker.upper()
+    model = model_store.get(key)
+    if model is None:
+        with stage('fetch'):
+            model = dcf_module.DCFModel(ticker, provider=data_provider)
+        # Keep only fresh data: not the placeholder values used when the fetch
+        # failed, nor a stale copy served while the upstream is failing
+        if model.company_data and not (model.fallback or model.stale):
+            model.run_analysis()
+            model_store.set(key, model, MODEL_CACHE_TTL)
+    return model.clone()
+
+# Monte Carlo runs of at least DCF_PARALLEL_MIN_SIMULATIONS paths are sharded
+# across DCF_MONTE_CARLO_WORKERS processes (1 keeps every run in the request's
+# process). Results for a seed do not depend on the number of workers
+MONTE_CARLO_WORKERS = int(os.environ.get('DCF_MONTE_CARLO_WORKERS', 1))
+PARALLEL_MIN_SIMULATIONS = int(os.environ.get('DCF_PARALLEL_MIN_SIMULATIONS', 1000000))
+
+def monte_carlo_workers(num_simulations):
+    """Worker processes for a Monte Carlo run of this size (None to run in-process)"""
+    if MONTE_CARLO_WORKERS > 1 and int(num_simulations) >= PARALLEL_MIN_SIMULATIONS:
+        return MONTE_CARLO_WORKERS
+    return None
+
+# Requests run at most DCF_MAX_SIMULATIONS Monte Carlo paths in the request
+# itself; larger runs, up to DCF_MAX_JOB_SIMULATIONS, go through /api/jobs
+MAX_SYNC_SIMULATIONS = int(os.environ.get('DCF_MAX_SIMULATIONS', 1000000))
+MAX_JOB_SIMULATIONS = int(os.environ.get('DCF_MAX_JOB_SIMULATIONS', 50000000))
+
+# Background workers for long-running Monte Carlo and batch jobs
+job_manager = JobManager(
+    max_workers=int(os.environ.get('DCF_JOB_WORKERS', 2)),
+    result_ttl=int(os.environ.get('DCF_JOB_RESULT_TTL', 3600))
+)
+
+# Screening universe: comma-separated tickers or a file with one ticker per line
+def load_screen_universe(value):
+    if value and os.path.isfile(value):
+        with open(value) as f:
+            tickers = [line.split('#')[0].strip() for line in f]
+    else:
+        tickers = (value or '').split(',')
+    return list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+
+SCREEN_UNIVERSE = load_screen_universe(os.environ.get('DCF_SCREEN_UNIVERSE'))
+MAX_SCREEN_TICKERS = int(os.environ.get('DCF_MAX_SCREEN_TICKERS', 5000))
+# Indexed data older than this is refreshed in the background after a screen
+SCREEN_MAX_AGE = int(os.environ.get('DCF_SCREEN_MAX_AGE', 3600))
+# Tickers that failed to fetch are not refetched by screens for this long
+SCREEN_FAILURE_TTL = int(os.environ.get('DCF_SCREEN_FAILURE_TTL', 300))
+
+_screen_lock = threading.Lock()
+_screen_index = None
+_screen_refresh_job = None
+
+def get_screen_index():
+    """The process-wide valuation index, created on first use"""
+    global _screen_index
+    with _screen_lock:
+        if _screen_index is None:
+            _screen_index = screen_module.ValuationIndex(failure_ttl=SCREEN_FAILURE_TTL)
+        return _screen_index
+
+def refresh_screen_index(tickers, progress_callback=None):
+    """Fetch tickers and update the valuation index with their data"""
+    fetched, errors = batch_module.fetch_many(data_provider, tickers, max_workers=BATCH_FETCH_WORKERS,
+                                              progress_callback=progress_callback)
+    index = get_screen_index()
+    changed = index.update(list(fetched.values()))
+    index.record_failures(errors)
+    logger.info(f"Screen index refreshed {len(fetched)} tickers, {changed} changed, {len(errors)} failed")
+    return {'refreshed': len(fetched), 'changed': changed, 'errors': errors}
+
+def submit_screen_refresh(tickers):
+    """Refresh tickers in a background job, unless a refresh is already running"""
+    global _screen_refresh_job
+    with _screen_lock:
+        job = _screen_refresh_job
+        if job is not None and job.status not in FINISHED_STATES:
+            return job
+        _screen_refresh_job = job_manager.submit(
+            'screen_refresh', {'tickers': len(tickers)},
+            lambda job: refresh_screen_index(tickers, progress_callback=job.update_progress)
+        )
+        return _screen_refresh_job
+
+# Sampling profiler, off unless DCF_PROFILING is set. Requests are then profiled
+# when they send X-DCF-Profile: 1 (or ?profile=1), plus a random
+# DCF_PROFILE_SAMPLE_RATE fraction of all requests
+PROFILING_ENABLED = os.environ.get('DCF_PROFILING', '').lower() in ('1', 'true', 'yes')
+PROFILE_SAMPLE_RATE = float(os.environ.get('DCF_PROFILE_SAMPLE_RATE', 0))
+profile_store = ProfileStore()
+
+def profiling_requested():
+    """Whether the current request should run under the sampling profiler"""
+    if not PROFILING_ENABLED:
+        return False
+    if request.headers.get('X-DCF-Profile') == '1' or request.args.get('profile') == '1':
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+@app.before_request
+def start_request_timer():
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    g.request_timer = metrics.start_request(endpoint)
+    g.profiler = SamplingProfiler().start() if profiling_requested() else None
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Report stage timings in a Server-Timing header and record request metrics
+    
+    Streamed responses are measured up to the start of the stream.
+    """
+    timer = g.pop('request_timer', None)
+    if timer is None:
+        return response
+    
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        response.headers['X-DCF-Profile-Id'] = profile_store.add(profiler.stop(), timer.endpoint)
+    
+    duration = metrics.finish_request(timer, request.method, response.status_code)
+    response.headers['Server-Timing'] = timer.server_timing(total=duration)
+    return response
+
+def wants_binary():
+    """Whether the client asked for the compact binary encoding"""
+    if request.args.get('format') == 'binary':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', binary.MIMETYPE])
+    return best == binary.MIMETYPE
+
+def respond(payload, status=200):
+    """
+    Build a response in the negotiated format
+    
+    JSON is the default; clients sending Accept: application/x-dcf-binary
+    (or ?format=binary) get NumPy arrays as raw little-endian buffers.
+    Add ?dtype=float64 to keep full precision.
+    """
+    with stage('serialize'):
+        if wants_binary():
+            float_dtype = '<f8' if request.args.get('dtype') == 'float64' else '<f4'
+            return Response(binary.encode_binary(payload, float_dtype=float_dtype),
+                            status=status, mimetype=binary.MIMETYPE)
+        response = jsonify(json_serialize(payload))
+    response.status_code = status
+    return response
+
+def cached_response(payload):
+    """Build a response for a result served from the cache"""
+    response = respond(payload)
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+def warm_up(tickers=None):
+    """
+    Preload the heavy modules and prime the model and caches
+    
+    Meant to run once in the gunicorn master before workers are forked (see
+    gunicorn.conf.py), so forked workers inherit loaded modules. Runs a
+    small valuation and Monte Carlo simulation on built-in sample data to
+    exercise the code paths, and, when tickers are given, analyzes them
+    through /api/analyze so their results are already cached. Metrics
+    recorded during warm-up are discarded, and the upstream connections the
+    ticker fetches opened are closed, so forked workers open their own
+    instead of sharing the master's sockets.
+    
+    Args:
+        tickers: Tickers whose analyses should be cached (defaults to the
+            comma-separated DCF_WARMUP_TICKERS)
+    """
+    started = time.perf_counter()
+    startup.preload([dcf_module, batch_module, reverse_module, valuation_module, screen_module, binary,
+                     *startup.HEAVY_MODULES])
+    
+    import pandas as pd
+    from dcf_model.providers import DataProvider, FinancialData
+    
+    class SampleProvider(DataProvider):
+        def fetch(self, ticker):
+            columns = pd.to_datetime(['2024-12-31', '2023-12-31'])
+            cash_flow = pd.DataFrame([[1.2e9, 1.1e9], [-2e8, -1.8e8]], columns=columns,
+                                     index=['Operating Cash Flow', 'Capital Expenditure'])
+            info = {'beta': 1.1, 'marketCap': 2e10, 'totalDebt': 3e9, 'totalCash': 1e9,
+                    'sharesOutstanding': 5e8, 'currentPrice': 40.0}
+            return FinancialData(ticker=ticker, info=info, cash_flow=cash_flow)
+    
+    search.get_index()
+    
+    dcf = dcf_module.DCFModel('WARMUP', provider=SampleProvider())
+    results = dcf.run_analysis()
+    results['monte_carlo'] = dcf.monte_carlo_simulation(1000, seed=0)
+    json.dumps(json_serialize(results))
+    binary.encode_binary(results)
+    
+    if tickers is None:
+        tickers = [t.strip() for t in os.environ.get('DCF_WARMUP_TICKERS', '').split(',') if t.strip()]
+    if tickers:
+        client = app.test_client()
+        for ticker in tickers:
+            client.post('/api/analyze', json={'ticker': ticker})
+        upstream_transport.close_session()
+    
+    metrics.reset()
+    startup.record_phase('warmup', time.perf_counter() - started)
+    logger.info(f"Warm-up finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'success',
         'message': 'DCF API is running',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now().isoformat(),
+        'startup': startup.report()
     })
 
 @app.route('/api/analyze', methods=['POST'])
@@ -56,25 +344,38 @@ def analyze_stock():
             'message': 'Ticker symbol is required'
         }), 400
     
+    with stage('cache'):
+        cache_key = result_cache.make_key('analyze', ticker)
+        cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached_response(cached)
+    
     try:
         logger.info(f"Starting analysis for ticker: {ticker}")
         
         # Initialize DCF model
-        dcf = DCFModel(ticker)
+        dcf = load_model(ticker)
         
         # Run analysis
-        results = dcf.run_analysis()
+        with stage('valuation'):
+            results = dcf.run_analysis()
         
         # Convert numpy types to Python native types for JSON serialization
-        serializable_results = json_serialize(results)
+        with stage('serialize'):
+            serializable_results = json_serialize(results)
         
         logger.info(f"Analysis completed for ticker: {ticker}")
         
-        return jsonify({
+        payload = {
             'status': 'success',
             'ticker': ticker,
             'data': serializable_results
-        })
+        }
+        if not (results['stale'] or results['fallback']):
+            with stage('cache'):
+                result_cache.set(cache_key, payload)
+        
+        return respond(payload)
     except Exception as e:
         logger.error(f"Error analyzing ticker {ticker}: {str(e)}")
         return jsonify({
@@ -82,6 +383,107 @@ def analyze_stock():
             'message': str(e)
         }), 500
 
+def custom_analysis_params(data, max_simulations=None):
+    """
+    Extract custom analysis parameters from a request body, with defaults
+    
+    Raises ValueError for an invalid simulation count, tolerance or tolerance
+    metric, so they are rejected before any simulation starts.
+    
+    Args:
+        data: Request body
+        max_simulations: Largest allowed num_simulations (defaults to MAX_SYNC_SIMULATIONS)
+    """
+    if max_simulations is None:
+        max_simulations = MAX_SYNC_SIMULATIONS
+    num_simulations = data.get('num_simulations', 1000)
+    try:
+        valid = (not isinstance(num_simulations, bool)
+                 and int(num_simulations) == float(num_simulations) and int(num_simulations) > 0)
+    except (TypeError, ValueError, OverflowError):
+        valid = False
+    if not valid:
+        raise ValueError("num_simulations must be a positive integer")
+    num_simulations = int(num_simulations)
+    if num_simulations > max_simulations:
+        message = f"num_simulations must be at most {max_simulations}"
+        if max_simulations < MAX_JOB_SIMULATIONS:
+            message += f"; submit runs of up to {MAX_JOB_SIMULATIONS} simulations to /api/jobs"
+        raise ValueError(message)
+    
+    tolerance = data.get('tolerance')
+    tolerance_metric = data.get('tolerance_metric', 'mean')
+    if tolerance is not None:
+        try:
+            tolerance = float(tolerance)
+        except (TypeError, ValueError):
+            raise ValueError("tolerance must be a number") from None
+        if not tolerance > 0:
+            raise ValueError("tolerance must be positive")
+        dcf_module.tolerance_percentile(tolerance_metric)
+    
+    return {
+        'growth_rates': data.get('growth_rates'),
+        'terminal_growth': data.get('terminal_growth', 0.03),
+        'forecast_years': data.get('forecast_years', 5),
+        'risk_free_rate': data.get('risk_free_rate', 0.035),
+        'market_risk_premium': data.get('market_risk_premium', 0.05),
+        'tax_rate': data.get('tax_rate', 0.21),
+        'num_simulations': num_simulations,
+        'seed': data.get('seed'),
+        'return_values': bool(data.get('return_values', False)),
+        'summary': data.get('summary', 'auto'),
+        'sampling': data.get('sampling', 'random'),
+        'tolerance': tolerance,
+        'tolerance_metric': tolerance_metric
+    }
+
+def run_custom_analysis(ticker, params, progress_callback=None):
+    """
+    Run a DCF analysis and Monte Carlo simulation with custom parameters
+    
+    Returns the raw results, which may contain NumPy arrays.
+    """
+    # Initialize DCF model
+    dcf = load_model(ticker)
+    
+    # Override parameters
+    if 'terminal_growth' in params:
+        dcf.terminal_growth = params['terminal_growth']
+    
+    if 'risk_free_rate' in params:
+        dcf.risk_free_rate = params['risk_free_rate']
+        
+    if 'market_risk_premium' in params:
+        dcf.market_risk_premium = params['market_risk_premium']
+        
+    if 'tax_rate' in params:
+        dcf.tax_rate = params['tax_rate']
+    
+    if params.get('growth_rates'):
+        dcf.set_growth_rates(params['growth_rates'])
+    
+    # Run analysis with custom parameters
+    with stage('valuation'):
+        results = dcf.run_analysis()
+    
+    # Run Monte Carlo with custom parameters
+    if 'num_simulations' in params:
+        with stage('monte_carlo'):
+            results['monte_carlo'] = dcf.monte_carlo_simulation(
+                num_simulations=params['num_simulations'],
+                seed=params['seed'],
+                return_values=params.get('return_values', False),
+                progress_callback=progress_callback,
+                summary=params.get('summary', 'auto'),
+                workers=monte_carlo_workers(params['num_simulations']),
+                sampling=params.get('sampling', 'random'),
+                tolerance=params.get('tolerance'),
+                tolerance_metric=params.get('tolerance_metric', 'mean')
+            )
+    
+    return results
+
 @app.route('/api/analyze-with-params', methods=['POST'])
 def analyze_with_params():
     """Analyze a stock with custom parameters"""
@@ -96,65 +498,596 @@ def analyze_with_params():
     
     try:
         # Extract custom parameters with default values
-        params = {
-            'growth_rates': data.get('growth_rates', [0.05, 0.04, 0.03, 0.03, 0.03]),
-            'terminal_growth': data.get('terminal_growth', 0.03),
-            'forecast_years': data.get('forecast_years', 5),
-            'risk_free_rate': data.get('risk_free_rate', 0.035),
-            'market_risk_premium': data.get('market_risk_premium', 0.05),
-            'tax_rate': data.get('tax_rate', 0.21),
-            'num_simulations': data.get('num_simulations', 1000)
-        }
+        params = custom_analysis_params(data)
+        
+        with stage('cache'):
+            cache_key = result_cache.make_key('analyze-with-params', ticker, params)
+            cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached_response(cached)
         
         logger.info(f"Starting custom analysis for ticker: {ticker} with params: {params}")
         
-        # Initialize DCF model
-        dcf = DCFModel(ticker)
+        results = run_custom_analysis(ticker, params)
         
-        # Override parameters
-        if 'terminal_growth' in params:
-            dcf.terminal_growth = params['terminal_growth']
+        logger.info(f"Custom analysis completed for ticker: {ticker}")
+        
+        payload = {
+            'status': 'success',
+            'ticker': ticker,
+            'data': results,
+            'parameters': params
+        }
+        
+        # Full simulated distributions are too large to be worth caching, and
+        # results from stale or placeholder data are not kept
+        if not (params['return_values'] or results['stale'] or results['fallback']):
+            with stage('cache'):
+                result_cache.set(cache_key, json_serialize(payload))
         
-        if 'risk_free_rate' in params:
+        return respond(payload)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in custom analysis for ticker {ticker}: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/analyze-stream', methods=['POST'])
+def analyze_stream():
+    """
+    Stream a Monte Carlo simulation as Server-Sent Events or NDJSON
+    
+    Each event carries the running mean, percentiles and histogram after one
+    chunk of simulations. NDJSON is used when requested with format=ndjson
+    or an Accept header of application/x-ndjson; SSE is the default.
+    """
+    data = request.json
+    ticker = data.get('ticker')
+    
+    if not ticker:
+        return jsonify({
+            'status': 'error',
+            'message': 'Ticker symbol is required'
+        }), 400
+    
+    try:
+        params = custom_analysis_params(data)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    chunk_size = data.get('chunk_size', dcf_module.STREAM_CHUNK_SIZE)
+    ndjson = (data.get('format') == 'ndjson'
+              or request.accept_mimetypes.best == 'application/x-ndjson')
+    
+    def encode(event, payload):
+        body = json.dumps(json_serialize(payload))
+        if ndjson:
+            return f"{body}\n"
+        return f"event: {event}\ndata: {body}\n\n"
+    
+    def generate():
+        try:
+            dcf = load_model(ticker)
+            dcf.terminal_growth = params['terminal_growth']
             dcf.risk_free_rate = params['risk_free_rate']
-            
-        if 'market_risk_premium' in params:
             dcf.market_risk_premium = params['market_risk_premium']
-            
-        if 'tax_rate' in params:
             dcf.tax_rate = params['tax_rate']
+            if params['growth_rates']:
+                dcf.set_growth_rates(params['growth_rates'])
+            
+            logger.info(f"Starting streamed Monte Carlo for ticker: {ticker}")
+            
+            for update in dcf.stream_monte_carlo(
+                num_simulations=params['num_simulations'],
+                seed=params['seed'],
+                chunk_size=chunk_size,
+                summary=params['summary'],
+                sampling=params['sampling']
+            ):
+                update.update(stale=dcf.stale, fallback=dcf.fallback)
+                yield encode('complete' if update['final'] else 'progress', update)
+        except Exception as e:
+            logger.error(f"Error in streamed Monte Carlo for ticker {ticker}: {str(e)}")
+            yield encode('error', {'status': 'error', 'message': str(e)})
+    
+    mimetype = 'application/x-ndjson' if ndjson else 'text/event-stream'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering
+    return response
+
+def batch_params(data):
+    """Extract shared batch valuation parameters from a request body, with defaults"""
+    return {
+        'forecast_years': data.get('forecast_years', 5),
+        'terminal_growth': data.get('terminal_growth', 0.03),
+        'risk_free_rate': data.get('risk_free_rate', 0.035),
+        'market_risk_premium': data.get('market_risk_premium', 0.05),
+        'tax_rate': data.get('tax_rate', 0.21),
+        'growth_rates': data.get('growth_rates')
+    }
+
+def validate_batch_tickers(tickers):
+    """Return an error message for an invalid ticker list, or None"""
+    if not tickers or not isinstance(tickers, list):
+        return 'A list of ticker symbols is required'
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return f'At most {MAX_BATCH_TICKERS} tickers are allowed per request'
+    return None
+
+@app.route('/api/analyze-batch', methods=['POST'])
+def analyze_batch_endpoint():
+    """Analyze a list of stocks with shared parameters"""
+    data = request.json
+    tickers = data.get('tickers')
+    
+    message = validate_batch_tickers(tickers)
+    if message:
+        return jsonify({
+            'status': 'error',
+            'message': message
+        }), 400
+    
+    try:
+        params = batch_params(data)
         
-        # Run analysis with custom parameters
-        results = dcf.run_analysis()
+        logger.info(f"Starting batch analysis for {len(tickers)} tickers")
         
-        # If custom growth rates were provided, recalculate forecasted cash flows
-        if 'growth_rates' in params and params['growth_rates']:
-            # We would need to implement custom_forecast method in DCFModel
-            # This is a placeholder for now
-            pass
+        results, errors = batch_module.analyze_batch(
+            data_provider, tickers, max_workers=BATCH_FETCH_WORKERS, **params
+        )
         
-        # Run Monte Carlo with custom parameters
-        if 'num_simulations' in params:
-            results['monte_carlo'] = dcf.monte_carlo_simulation(num_simulations=params['num_simulations'])
+        logger.info(f"Batch analysis completed: {len(results)} valued, {len(errors)} failed")
         
-        # Convert numpy types to Python native types for JSON serialization
-        serializable_results = json_serialize(results)
+        return respond({
+            'status': 'success',
+            'data': results,
+            'errors': errors,
+            'parameters': params
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in batch analysis: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Submit a Monte Carlo or batch analysis to run in the background"""
+    data = request.json
+    job_type = data.get('type', 'monte_carlo')
+    
+    if job_type == 'monte_carlo':
+        ticker = data.get('ticker')
+        if not ticker:
+            return jsonify({
+                'status': 'error',
+                'message': 'Ticker symbol is required'
+            }), 400
         
-        logger.info(f"Custom analysis completed for ticker: {ticker}")
+        try:
+            params = custom_analysis_params(data, max_simulations=MAX_JOB_SIMULATIONS)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        job = job_manager.submit(
+            job_type, dict(params, ticker=ticker),
+            lambda job: run_custom_analysis(ticker, params, progress_callback=job.update_progress)
+        )
+    elif job_type == 'batch':
+        tickers = data.get('tickers')
+        message = validate_batch_tickers(tickers)
+        if message:
+            return jsonify({
+                'status': 'error',
+                'message': message
+            }), 400
+        
+        params = batch_params(data)
         
+        def run_batch_job(job):
+            results, errors = batch_module.analyze_batch(
+                data_provider, tickers, max_workers=BATCH_FETCH_WORKERS,
+                progress_callback=job.update_progress, **params
+            )
+            return {'results': results, 'errors': errors}
+        
+        job = job_manager.submit(job_type, dict(params, tickers=tickers), run_batch_job)
+    else:
         return jsonify({
+            'status': 'error',
+            'message': f'Unknown job type: {job_type}'
+        }), 400
+    
+    logger.info(f"Submitted {job_type} job {job.id}")
+    
+    return jsonify({
+        'status': 'success',
+        'data': job.to_dict()
+    }), 202
+
+def job_not_found(job_id):
+    return jsonify({
+        'status': 'error',
+        'message': f'Job not found: {job_id}'
+    }), 404
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status and progress"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    
+    return jsonify({
+        'status': 'success',
+        'data': job.to_dict()
+    })
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Result of a completed job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    
+    if job.status != COMPLETED:
+        return jsonify({
+            'status': 'error',
+            'message': f'Job is {job.status}',
+            'data': job.to_dict()
+        }), 409
+    
+    return respond({
+        'status': 'success',
+        'data': job.result,
+        'job': job.to_dict()
+    })
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    
+    return jsonify({
+        'status': 'success',
+        'data': job.to_dict()
+    })
+
+@app.route('/api/sensitivity', methods=['POST'])
+def sensitivity():
+    """Value a stock over a WACC x terminal growth grid"""
+    data = request.json
+    ticker = data.get('ticker')
+    
+    if not ticker:
+        return jsonify({
+            'status': 'error',
+            'message': 'Ticker symbol is required'
+        }), 400
+    
+    try:
+        logger.info(f"Starting sensitivity grid for ticker: {ticker}")
+        
+        # Initialize DCF model
+        dcf = load_model(ticker)
+        
+        results = dcf.sensitivity_grid(
+            wacc_values=data.get('wacc_values'),
+            growth_values=data.get('growth_values')
+        )
+        
+        logger.info(f"Sensitivity grid completed for ticker: {ticker}")
+        
+        return respond({
             'status': 'success',
             'ticker': ticker,
-            'data': serializable_results,
-            'parameters': params
+            'data': results
         })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
-        logger.error(f"Error in custom analysis for ticker {ticker}: {str(e)}")
+        logger.error(f"Error in sensitivity grid for ticker {ticker}: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def scenario_growth_paths(data, forecast_years):
+    """
+    Growth path matrix for a scenario request
+    
+    Paths are given explicitly as growth_paths, or generated from a fade
+    specification {'start': [...], 'end': [...]} with one linear path from
+    every start rate to every end rate.
+    """
+    if data.get('growth_paths') is not None:
+        return data['growth_paths']
+    
+    fade = data.get('fade')
+    if not isinstance(fade, dict) or not fade.get('start') or not fade.get('end'):
+        raise ValueError('Either growth_paths or a fade with start and end rates is required')
+    
+    starts = [start for start in fade['start'] for _ in fade['end']]
+    ends = [end for _ in fade['start'] for end in fade['end']]
+    return valuation_module.fade_growth_paths(starts, ends, fade.get('years', forecast_years))
+
+@app.route('/api/scenarios', methods=['POST'])
+def scenarios():
+    """Value a stock under a matrix of growth-path scenarios in one pass"""
+    data = request.json
+    ticker = data.get('ticker')
+    
+    if not ticker:
+        return jsonify({
+            'status': 'error',
+            'message': 'Ticker symbol is required'
+        }), 400
+    
+    try:
+        dcf = load_model(ticker)
+        dcf.risk_free_rate = data.get('risk_free_rate', dcf.risk_free_rate)
+        dcf.market_risk_premium = data.get('market_risk_premium', dcf.market_risk_premium)
+        dcf.tax_rate = data.get('tax_rate', dcf.tax_rate)
+        
+        growth_paths = scenario_growth_paths(data, dcf.forecast_years)
+        
+        with stage('valuation'):
+            results = dcf.scenario_analysis(
+                growth_paths,
+                terminal_growth=data.get('terminal_growth'),
+                wacc=data.get('wacc'),
+                names=data.get('names')
+            )
+        
+        return respond({
+            'status': 'success',
+            'ticker': ticker,
+            'data': results
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in scenario analysis for ticker {ticker}: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def screen_universe(data):
+    """Tickers a screen request covers, or an error message"""
+    tickers = data.get('tickers')
+    if tickers is None:
+        tickers = SCREEN_UNIVERSE
+    if not tickers or not isinstance(tickers, list):
+        return None, 'A list of ticker symbols is required (no screening universe is configured)'
+    if len(tickers) > MAX_SCREEN_TICKERS:
+        return None, f'At most {MAX_SCREEN_TICKERS} tickers are allowed per screen'
+    return [str(t).upper() for t in tickers], None
+
+@app.route('/api/screen', methods=['POST'])
+def screen():
+    """
+    Rank a universe by margin of safety, EV/FCF or another metric
+    
+    Answers from the in-memory valuation index. Tickers never indexed are
+    fetched first, unless they failed to fetch within DCF_SCREEN_FAILURE_TTL
+    (their earlier error is reported instead); data older than
+    DCF_SCREEN_MAX_AGE is served as is and refreshed in a background job.
+    """
+    data = request.json or {}
+    tickers, message = screen_universe(data)
+    if message:
+        return jsonify({
+            'status': 'error',
+            'message': message
+        }), 400
+    
+    try:
+        index = get_screen_index()
+        
+        missing = index.missing(tickers)
+        errors = index.recent_failures(tickers)
+        if missing:
+            with stage('fetch'):
+                errors.update(refresh_screen_index(missing)['errors'])
+        
+        stale = index.stale(SCREEN_MAX_AGE, tickers)
+        refresh_job = submit_screen_refresh(stale) if stale else None
+        
+        params = batch_params(data)
+        with stage('valuation'):
+            results = index.query(
+                sort_by=data.get('sort_by', 'margin_of_safety'),
+                descending=bool(data.get('descending', True)),
+                top_k=data.get('top_k', 50),
+                filters=data.get('filters'),
+                sectors=data.get('sectors'),
+                tickers=tickers,
+                **params
+            )
+        results['stale'] = len(stale)
+        
+        return respond({
+            'status': 'success',
+            'data': results,
+            'errors': errors,
+            'refresh_job': refresh_job.id if refresh_job is not None else None
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error screening: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/screen/refresh', methods=['POST'])
+def refresh_screen():
+    """Refetch the universe (or only its stale tickers with stale_only) in the background"""
+    data = request.json or {}
+    tickers, message = screen_universe(data)
+    if message:
+        return jsonify({
+            'status': 'error',
+            'message': message
+        }), 400
+    
+    if data.get('stale_only'):
+        index = get_screen_index()
+        tickers = index.missing(tickers) + index.stale(SCREEN_MAX_AGE, tickers)
+    
+    job = submit_screen_refresh(tickers)
+    return jsonify({
+        'status': 'success',
+        'data': job.to_dict()
+    }), 202
+
+@app.route('/api/valuation-sensitivities', methods=['POST'])
+def valuation_sensitivities():
+    """Analytic sensitivities of enterprise and per-share value to the model inputs"""
+    data = request.json
+    ticker = data.get('ticker')
+    
+    if not ticker:
+        return jsonify({
+            'status': 'error',
+            'message': 'Ticker symbol is required'
+        }), 400
+    
+    try:
+        dcf = load_model(ticker)
+        dcf.terminal_growth = data.get('terminal_growth', dcf.terminal_growth)
+        dcf.risk_free_rate = data.get('risk_free_rate', dcf.risk_free_rate)
+        dcf.market_risk_premium = data.get('market_risk_premium', dcf.market_risk_premium)
+        dcf.tax_rate = data.get('tax_rate', dcf.tax_rate)
+        
+        results = dcf.valuation_sensitivities()
+        
+        return respond({
+            'status': 'success',
+            'ticker': ticker,
+            'data': results
+        })
+    except Exception as e:
+        logger.error(f"Error calculating sensitivities for ticker {ticker}: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/reverse-dcf', methods=['POST'])
+def reverse_dcf():
+    """Terminal growth, flat growth or WACC implied by the share price, for one or many tickers"""
+    data = request.json or {}
+    solve_for = data.get('solve_for', 'terminal_growth')
+    target_prices = data.get('target_prices')
+    
+    try:
+        tickers = data.get('tickers')
+        if tickers is not None:
+            error = validate_batch_tickers(tickers)
+            if error:
+                return jsonify({
+                    'status': 'error',
+                    'message': error
+                }), 400
+            
+            fetched, errors = batch_module.fetch_many(data_provider, tickers, max_workers=BATCH_FETCH_WORKERS)
+            results = reverse_module.reverse_dcf_batch(list(fetched.values()), solve_for=solve_for,
+                                                       target_prices=target_prices, **batch_params(data))
+            return respond({
+                'status': 'success',
+                'solve_for': solve_for,
+                'data': results,
+                'errors': errors
+            })
+        
+        ticker = data.get('ticker')
+        if not ticker:
+            return jsonify({
+                'status': 'error',
+                'message': 'Ticker symbol is required'
+            }), 400
+        
+        dcf = load_model(ticker)
+        dcf.terminal_growth = data.get('terminal_growth', dcf.terminal_growth)
+        dcf.risk_free_rate = data.get('risk_free_rate', dcf.risk_free_rate)
+        dcf.market_risk_premium = data.get('market_risk_premium', dcf.market_risk_premium)
+        dcf.tax_rate = data.get('tax_rate', dcf.tax_rate)
+        
+        results = dcf.reverse_dcf(solve_for=solve_for, target_price=data.get('target_price'))
+        
+        return respond({
+            'status': 'success',
+            'ticker': ticker,
+            'data': results
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error solving reverse DCF: {str(e)}")
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
+@app.route('/api/search-tickers', methods=['GET'])
+def search_tickers():
+    """Autocomplete symbols and company names from the local listing"""
+    query = request.args.get('query', '')
+    
+    if not query.strip():
+        return jsonify({
+            'status': 'error',
+            'message': 'Search query is required'
+        }), 400
+    
+    try:
+        limit = min(int(request.args.get('limit', 10)), 50)
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'limit must be an integer'
+        }), 400
+    
+    return jsonify({
+        'status': 'success',
+        'query': query,
+        'data': search.get_index().search(query, limit)
+    })
+
 @app.route('/api/company-info', methods=['GET'])
 def get_company_info():
     """Get basic company information"""
@@ -167,10 +1100,7 @@ def get_company_info():
         }), 400
     
     try:
-        import yfinance as yf
-        
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = data_provider.fetch_info(ticker)
         
         # Extract key company information
         company_info = {
@@ -193,8 +1123,20 @@ def get_company_info():
         return jsonify({
             'status': 'success',
             'ticker': ticker,
-            'data': company_info
+            'data': company_info,
+            'stale': bool(info.get('stale', False))
         })
+    except LookupError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 404
+    except UpstreamError as e:
+        logger.error(f"Upstream unavailable for company info {ticker}: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 503
     except Exception as e:
         logger.error(f"Error fetching company info for {ticker}: {str(e)}")
         return jsonify({
@@ -202,15 +1144,58 @@ def get_company_info():
             'message': str(e)
         }), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request, stage and upstream fetch metrics in the Prometheus text format"""
+    report = startup.report()
+    gauges = [
+        ('dcf_startup_seconds', 'Duration of startup phases in this process.', 'phase', report['phases']),
+        ('dcf_module_import_seconds', 'Time taken to import each heavy module.', 'module', report['modules']),
+        ('dcf_upstream_scheduler', 'Upstream scheduler requests, retries, failures, stale responses '
+         'and seconds spent throttled since startup.', 'counter', upstream_provider.stats()),
+    ]
+    return Response(metrics.render(gauges=gauges), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """Recently captured request profiles"""
+    return jsonify({
+        'status': 'success',
+        'enabled': PROFILING_ENABLED,
+        'data': profile_store.list()
+    })
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """A captured profile as collapsed stacks, for flamegraph.pl or speedscope"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Profile {profile_id} not found'
+        }), 404
+    return Response(profile['collapsed'], mimetype='text/plain')
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Result cache hit/miss counters"""
+    return jsonify({
+        'status': 'success',
+        'data': result_cache.stats()
+    })
+
 def json_serialize(obj):
     """Recursively convert numpy types to Python native types for JSON serialization"""
     import numpy as np
     
     if isinstance(obj, np.integer):
         return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
+    elif isinstance(obj, (float, np.floating)):
+        # NaN/inf are not valid JSON; report undefined values as null
+        return float(obj) if np.isfinite(obj) else None
     elif isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'f' and not np.isfinite(obj).all():
+            return np.where(np.isfinite(obj), obj, None).tolist()
         return obj.tolist()
     elif isinstance(obj, dict):
         return {k: json_serialize(v) for k, v in obj.items()}
@@ -219,6 +1204,10 @@ def json_serialize(obj):
     else:
         return obj
 
+startup.record_phase('import', time.perf_counter() - _import_started)
+logger.info(f"API module loaded in {(time.perf_counter() - _import_started) * 1000:.0f} ms "
+            f"({startup.report()['mode']} imports)")
+
 if __name__ == '__main__':
     # Get port from environment variable or use default
     port = int(os.environ.get('PORT', 5000))
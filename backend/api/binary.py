@@ -0,0 +1,129 @@
+"""
+Compact binary encoding for responses with large arrays
+
+Layout (all integers little-endian):
+
+    b'DCFB' | uint8 version | 3 zero bytes | uint32 header length |
+    header (UTF-8 JSON) | zero padding to 8 bytes | array buffers
+
+The header holds the response with every NumPy array replaced by
+{"$array": i}, plus an "arrays" list giving each buffer's dtype, shape and
+byte offset from the start of the buffer section. Floating-point arrays are
+written as little-endian float32 by default, copied directly from the array
+memory into the output buffer.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+MIMETYPE = 'application/x-dcf-binary'
+MAGIC = b'DCFB'
+VERSION = 1
+ALIGNMENT = 8
+
+_PREFIX = struct.Struct('<4sB3xI')
+
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+
+def encode_binary(obj, float_dtype='<f4'):
+    """
+    Encode a response object, writing NumPy arrays as raw buffers
+
+    Args:
+        obj: Response object (dicts, lists, scalars and NumPy arrays)
+        float_dtype: Dtype for floating-point arrays ('<f4' or '<f8')
+
+    Returns:
+        bytes: Encoded response
+    """
+    arrays = []
+
+    def extract(value):
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind == 'f':
+                dtype = np.dtype(float_dtype)
+            elif value.dtype.kind in 'iub':
+                dtype = value.dtype.newbyteorder('<')
+            else:
+                return value.tolist()
+            arrays.append((value, dtype))
+            return {'$array': len(arrays) - 1}
+        if isinstance(value, dict):
+            return {k: extract(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [extract(v) for v in value]
+        if isinstance(value, np.integer):
+            return int(value)
+        if isinstance(value, (float, np.floating)):
+            return float(value) if np.isfinite(value) else None
+        return value
+
+    data = extract(obj)
+
+    descriptors = []
+    offset = 0
+    for value, dtype in arrays:
+        nbytes = value.size * dtype.itemsize
+        descriptors.append({
+            'dtype': dtype.str,
+            'shape': list(value.shape),
+            'offset': offset,
+            'nbytes': nbytes
+        })
+        offset += nbytes + _padding(nbytes)
+
+    header = json.dumps({'data': data, 'arrays': descriptors}).encode('utf-8')
+    header_end = _PREFIX.size + len(header)
+    body_start = header_end + _padding(header_end)
+
+    buffer = bytearray(body_start + offset)
+    _PREFIX.pack_into(buffer, 0, MAGIC, VERSION, len(header))
+    buffer[_PREFIX.size:header_end] = header
+
+    for (value, dtype), descriptor in zip(arrays, descriptors):
+        target = np.frombuffer(buffer, dtype=dtype, count=value.size,
+                               offset=body_start + descriptor['offset'])
+        target[...] = value.reshape(-1)
+
+    return bytes(buffer)
+
+
+def decode_binary(payload):
+    """
+    Decode a response produced by encode_binary
+
+    Args:
+        payload: Encoded bytes
+
+    Returns:
+        The response object with arrays restored as NumPy arrays
+    """
+    magic, version, header_len = _PREFIX.unpack_from(payload, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a DCF binary payload")
+
+    header_end = _PREFIX.size + header_len
+    header = json.loads(bytes(payload[_PREFIX.size:header_end]).decode('utf-8'))
+    body_start = header_end + _padding(header_end)
+
+    arrays = [
+        np.frombuffer(payload, dtype=d['dtype'], count=int(np.prod(d['shape'])),
+                      offset=body_start + d['offset']).reshape(d['shape'])
+        for d in header['arrays']
+    ]
+
+    def restore(value):
+        if isinstance(value, dict):
+            if set(value) == {'$array'}:
+                return arrays[value['$array']]
+            return {k: restore(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [restore(v) for v in value]
+        return value
+
+    return restore(header['data'])
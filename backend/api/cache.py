@@ -0,0 +1,180 @@
+"""
+Result cache for API responses
+
+Responses are cached under a key built from the endpoint, the ticker and a
+canonical hash of the request parameters. Two backends are provided:
+
+- MemoryBackend: per-process LRU dictionary with per-entry expiry
+- RedisBackend: any Redis-compatible client, shared by all workers. Entries
+  expire through Redis TTLs and LRU eviction is left to the server's
+  maxmemory-policy (e.g. allkeys-lru).
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger('dcf-web-api')
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Store shared across workers in a Redis-compatible server"""
+
+    def __init__(self, client, prefix='dcf:cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    def incr(self, counter):
+        self.client.incr(f"{self.prefix}stats:{counter}")
+
+    def counters(self):
+        return {
+            counter: int(self.client.get(f"{self.prefix}stats:{counter}") or 0)
+            for counter in ('hits', 'misses')
+        }
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+class ResultCache:
+    """Cache of JSON-serializable API results with hit/miss counters"""
+
+    def __init__(self, backend, ttl=300):
+        """
+        Args:
+            backend: MemoryBackend or RedisBackend
+            ttl: Seconds before a cached result expires
+        """
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(endpoint, ticker, params=None):
+        """
+        Build a cache key from an endpoint, ticker and parameter dict
+
+        Parameters are hashed from their canonical JSON form, so the key does
+        not depend on dictionary ordering.
+        """
+        canonical = json.dumps(params or {}, sort_keys=True, separators=(',', ':'), default=str)
+        digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+        return f"{endpoint}:{ticker.strip().upper()}:{digest}"
+
+    def get(self, key):
+        """Return the cached result for a key, or None on a miss"""
+        try:
+            raw = self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Error reading result cache: {str(e)}")
+            return None
+
+        counter = 'misses' if raw is None else 'hits'
+        try:
+            self.backend.incr(counter)
+        except Exception as e:
+            logger.error(f"Error updating cache counters: {str(e)}")
+
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value):
+        """Cache a JSON-serializable result"""
+        try:
+            self.backend.set(key, json.dumps(value), self.ttl)
+        except Exception as e:
+            logger.error(f"Error writing result cache: {str(e)}")
+
+    def stats(self):
+        """Hit/miss counters and hit ratio"""
+        try:
+            stats = self.backend.counters()
+        except Exception as e:
+            logger.error(f"Error reading cache counters: {str(e)}")
+            stats = {'hits': 0, 'misses': 0}
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        stats['backend'] = type(self.backend).__name__
+        stats['ttl'] = self.ttl
+        return stats
+
+    def clear(self):
+        """Drop all cached results"""
+        self.backend.clear()
+
+
+def create_cache_from_env():
+    """
+    Build the result cache from environment variables
+
+    DCF_CACHE_URL selects a Redis server (e.g. redis://localhost:6379/0);
+    without it an in-process cache is used. DCF_CACHE_TTL sets the expiry in
+    seconds and DCF_CACHE_MAX_ENTRIES bounds the in-process cache.
+    """
+    ttl = int(os.environ.get('DCF_CACHE_TTL', 300))
+    url = os.environ.get('DCF_CACHE_URL')
+
+    if url:
+        try:
+            import redis
+
+            backend = RedisBackend(redis.Redis.from_url(url))
+            logger.info(f"Using Redis result cache at {url}")
+            return ResultCache(backend, ttl=ttl)
+        except ImportError:
+            logger.error("redis package not installed, falling back to in-process cache")
+
+    max_entries = int(os.environ.get('DCF_CACHE_MAX_ENTRIES', 1024))
+    return ResultCache(MemoryBackend(max_entries=max_entries), ttl=ttl)
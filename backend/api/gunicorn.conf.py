@@ -0,0 +1,56 @@
+"""
+Gunicorn settings for the DCF API
+
+Run from backend/api:
+
+    gunicorn app:app
+
+The app is imported once in the master (preload_app). With DCF_WARMUP set,
+the master also preloads the valuation modules and primes caches before
+forking, and freezes the garbage collector so that the preloaded objects
+stay in pages shared with every worker instead of being copied on the
+first collection. Without it, workers started with DCF_LAZY_IMPORTS import
+the heavy modules on first use instead.
+
+Before each fork the master closes its upstream HTTP session, so no worker
+inherits (and shares) keep-alive or TLS connections opened in the master;
+each worker opens its own pool on first use.
+"""
+
+import gc
+import os
+import time
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+
+WARMUP = os.environ.get('DCF_WARMUP', '').lower() in ('1', 'true', 'yes')
+
+_master_started = time.perf_counter()
+
+
+def when_ready(server):
+    if WARMUP:
+        import app
+
+        app.warm_up()
+        gc.collect()
+        gc.freeze()
+    server.log.info(f"Master ready in {(time.perf_counter() - _master_started) * 1000:.0f} ms")
+
+
+def pre_fork(server, worker):
+    import app
+
+    app.upstream_transport.close_session()
+
+
+def post_fork(server, worker):
+    worker.started_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    elapsed = (time.perf_counter() - worker.started_at) * 1000
+    worker.log.info(f"Worker {worker.pid} ready {elapsed:.0f} ms after fork")
@@ -0,0 +1,164 @@
+"""
+Background job manager for long-running analyses
+
+Jobs run on a bounded thread pool so request workers return immediately
+with a job id. Job functions receive their Job and report progress through
+job.update_progress(done, total), which also raises JobCancelled once a
+cancellation has been requested. Finished jobs are kept for result_ttl
+seconds and then purged.
+
+Jobs live in the memory of the process that accepted them, so under
+gunicorn status and result requests must reach the same worker (e.g. run a
+single worker with several threads for the job endpoints).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger('dcf-web-api')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job has been cancelled"""
+
+
+class Job:
+    """State of a single background job"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def update_progress(self, done, total):
+        """Record progress as a fraction and stop the job if it was cancelled"""
+        if total:
+            self.progress = min(done / total, 1.0)
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    def to_dict(self):
+        """Status summary without the result payload"""
+        return {
+            'job_id': self.id,
+            'type': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobManager:
+    """Run jobs on a thread pool and keep their results for a limited time"""
+
+    def __init__(self, max_workers=2, result_ttl=3600):
+        """
+        Args:
+            max_workers: Number of jobs executed concurrently
+            result_ttl: Seconds a finished job and its result are kept
+        """
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dcf-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, params, fn):
+        """
+        Queue a job
+
+        Args:
+            kind: Job type label
+            params: Parameters reported with the job
+            fn: Callable taking the Job and returning a JSON-serializable result
+
+        Returns:
+            Job: The queued job
+        """
+        job = Job(kind, params)
+        with self._lock:
+            self._purge_expired()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        """Return a job by id, or None if unknown or expired"""
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Request cancellation of a job
+
+        Queued jobs are cancelled immediately; running jobs stop at their next
+        progress update.
+
+        Returns:
+            Job: The job, or None if unknown or expired
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job._cancel_event.set()
+        with self._lock:
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished_at = time.time()
+        return job
+
+    def _run(self, job, fn):
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+
+        try:
+            result = fn(job)
+            job.result = result
+            job.progress = 1.0
+            job.status = COMPLETED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in FINISHED_STATES and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,268 @@
+"""
+Request timing and Prometheus-style metrics
+
+Each request gets a RequestTimer, held in a context variable so that code
+anywhere below the handler can attribute time to a named stage:
+
+    with stage('valuation'):
+        results = dcf.run_analysis()
+
+Stage durations are reported per request in a Server-Timing header and,
+together with request latency, request and error counts and upstream fetch
+counts, aggregated into fixed-bucket histograms and counters per endpoint.
+MetricsRegistry.render() writes them in the Prometheus text exposition
+format. Timing costs two perf_counter calls per stage; outside a request
+stage() does nothing.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+# Latency histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_timer = ContextVar('dcf_request_timer', default=None)
+
+
+class RequestTimer:
+    """Wall-clock total and accumulated stage durations for one request"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    def add(self, name, duration):
+        self.stages[name] = self.stages.get(name, 0.0) + duration
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self, total=None):
+        """Server-Timing header value, durations in milliseconds"""
+        entries = [f"{name};dur={duration * 1000:.3f}" for name, duration in self.stages.items()]
+        entries.append(f"total;dur={(self.elapsed() if total is None else total) * 1000:.3f}")
+        return ', '.join(entries)
+
+
+def current_timer():
+    """The timer of the request being handled, or None"""
+    return _current_timer.get()
+
+
+@contextmanager
+def stage(name):
+    """Attribute the time spent in the block to a named stage of the current request"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+class MetricsRegistry:
+    """Thread-safe request, stage and upstream fetch metrics"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets: Upper bounds of the latency histogram buckets in seconds
+        """
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = {}          # (endpoint, method, status) -> count
+        self._errors = {}            # (endpoint,) -> count
+        self._latency = {}           # (endpoint,) -> Histogram
+        self._stages = {}            # (endpoint, stage) -> Histogram
+        self._upstream = {}          # (endpoint, kind, outcome) -> count
+        self._upstream_latency = {}  # (kind,) -> Histogram
+
+    def reset(self):
+        """Discard everything recorded so far"""
+        with self._lock:
+            for table in (self._requests, self._errors, self._latency, self._stages,
+                          self._upstream, self._upstream_latency):
+                table.clear()
+
+    def start_request(self, endpoint):
+        """Create a timer for a request and make it current"""
+        timer = RequestTimer(endpoint)
+        _current_timer.set(timer)
+        return timer
+
+    def finish_request(self, timer, method, status):
+        """
+        Record a finished request and clear the current timer
+
+        Args:
+            timer: Timer returned by start_request
+            method: HTTP method
+            status: HTTP status code
+
+        Returns:
+            float: Total request duration in seconds
+        """
+        duration = timer.elapsed()
+        _current_timer.set(None)
+
+        with self._lock:
+            key = (timer.endpoint, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if status >= 400:
+                self._errors[(timer.endpoint,)] = self._errors.get((timer.endpoint,), 0) + 1
+            self._histogram(self._latency, (timer.endpoint,)).observe(duration)
+            for name, stage_duration in timer.stages.items():
+                self._histogram(self._stages, (timer.endpoint, name)).observe(stage_duration)
+        return duration
+
+    def record_upstream(self, kind, outcome, duration):
+        """
+        Record one upstream data fetch
+
+        Args:
+            kind: Fetch type ('fetch', 'info' or 'prices')
+            outcome: 'success' or 'error'
+            duration: Fetch duration in seconds
+        """
+        timer = _current_timer.get()
+        endpoint = timer.endpoint if timer is not None else 'background'
+        with self._lock:
+            key = (endpoint, kind, outcome)
+            self._upstream[key] = self._upstream.get(key, 0) + 1
+            self._histogram(self._upstream_latency, (kind,)).observe(duration)
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(self.buckets)
+        return histogram
+
+    def render(self, gauges=None):
+        """
+        Metrics in the Prometheus text exposition format
+
+        Args:
+            gauges: Extra gauges as (name, help text, label name, {label value: value})
+        """
+        lines = []
+
+        def counter(name, help_text, label_names, table):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(table.items()):
+                lines.append(f"{name}{_format_labels(zip(label_names, key))} {value}")
+
+        def histogram(name, help_text, label_names, table):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in sorted(table.items()):
+                labels = list(zip(label_names, key))
+                for bound, count in hist.cumulative():
+                    lines.append(f"{name}_bucket{_format_labels(labels + [('le', _format_bound(bound))])} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {hist.sum!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+
+        with self._lock:
+            counter('dcf_http_requests_total', 'Requests handled by endpoint, method and status.',
+                    ('endpoint', 'method', 'status'), self._requests)
+            counter('dcf_http_request_errors_total', 'Requests answered with a 4xx or 5xx status.',
+                    ('endpoint',), self._errors)
+            histogram('dcf_http_request_duration_seconds', 'Request latency.',
+                      ('endpoint',), self._latency)
+            histogram('dcf_stage_duration_seconds', 'Time spent per request in each stage.',
+                      ('endpoint', 'stage'), self._stages)
+            counter('dcf_upstream_fetches_total', 'Upstream company data fetches.',
+                    ('endpoint', 'kind', 'outcome'), self._upstream)
+            histogram('dcf_upstream_fetch_duration_seconds', 'Upstream company data fetch latency.',
+                      ('kind',), self._upstream_latency)
+
+        for name, help_text, label_name, values in gauges or ():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for label, value in sorted(values.items()):
+                lines.append(f"{name}{_format_labels([(label_name, label)])} {value!r}")
+
+        return '\n'.join(lines) + '\n'
+
+
+class InstrumentedProvider:
+    """
+    Data provider wrapper counting and timing upstream fetches
+
+    Place it directly around the provider that performs network calls, inside
+    any coalescing, so that only real upstream fetches are counted.
+    """
+
+    def __init__(self, provider, registry):
+        """
+        Args:
+            provider: DataProvider performing the fetches
+            registry: MetricsRegistry to record into
+        """
+        self.provider = provider
+        self.registry = registry
+
+    def _call(self, kind, fn, ticker):
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = fn(ticker)
+            outcome = 'success'
+            return result
+        finally:
+            self.registry.record_upstream(kind, outcome, time.perf_counter() - start)
+
+    def fetch(self, ticker):
+        return self._call('fetch', self.provider.fetch, ticker)
+
+    def fetch_info(self, ticker):
+        return self._call('info', self.provider.fetch_info, ticker)
+
+    def fetch_prices(self, ticker):
+        return self._call('prices', self.provider.fetch_prices, ticker)
@@ -0,0 +1,101 @@
+"""
+Per-request sampling profiler
+
+SamplingProfiler samples the call stack of one thread at a fixed interval
+from a background thread and counts identical stacks. The overhead falls
+on the sampling thread, so a profiled request runs close to its normal
+speed and no cost is paid by requests that are not profiled. Profiles are
+kept in a small in-memory store and rendered in the collapsed-stack format
+read by flamegraph.pl and speedscope.
+"""
+
+from collections import Counter, OrderedDict
+import sys
+import threading
+import time
+import uuid
+
+DEFAULT_INTERVAL = 0.002
+
+
+class SamplingProfiler:
+    """Sample the stack of a single thread until stopped"""
+
+    def __init__(self, thread_id=None, interval=DEFAULT_INTERVAL):
+        """
+        Args:
+            thread_id: Thread to sample (defaults to the calling thread)
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self.started_at = None
+        self.duration = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='dcf-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Stacks in collapsed format, one 'frame;frame;... count' line per stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """Keep the most recent profiles by id"""
+
+    def __init__(self, max_profiles=50):
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profiler, endpoint):
+        """Store a stopped profiler and return its id"""
+        profile_id = uuid.uuid4().hex
+        with self._lock:
+            self._profiles[profile_id] = {
+                'endpoint': endpoint,
+                'created_at': time.time(),
+                'duration': profiler.duration,
+                'num_samples': sum(profiler.samples.values()),
+                'collapsed': profiler.collapsed()
+            }
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self):
+        """Summaries of stored profiles, newest first"""
+        with self._lock:
+            return [
+                {'profile_id': profile_id, **{k: v for k, v in profile.items() if k != 'collapsed'}}
+                for profile_id, profile in reversed(self._profiles.items())
+            ]
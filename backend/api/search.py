@@ -0,0 +1,275 @@
+"""
+In-memory ticker search for autocomplete
+
+TickerIndex loads symbols and company names from a local listing file and
+answers prefix queries from sorted arrays with binary search, so a lookup
+costs a few bisections and never an upstream call. Two arrays are kept:
+symbols, and every word of every company name, each sorted and paired with
+the listing it belongs to.
+
+Matches are ranked by exact symbol match, then symbol prefix, then name
+match, and within each group by popularity (a listing column, higher is
+more popular). A short prefix can match thousands of entries, so when a
+single prefix range is wide the entries are instead scanned in popularity
+order and the scan stops at the result limit. A multi-word query starts
+from the rarest word's prefix range and narrows it with the other words,
+so its cost follows the rarest word however seldom the words match
+together. Results for the short prefixes typed on every keystroke, and
+for multi-word queries, are also memoized.
+
+The listing is a CSV (or pipe- or tab-delimited) file with a header row
+containing at least symbol and name columns, and optionally exchange and
+popularity. The symbol directories published by exchanges (e.g. NASDAQ's
+nasdaqlisted.txt, with "Symbol" and "Security Name") load as they are.
+"""
+
+from bisect import bisect_left
+from functools import lru_cache
+import csv
+import heapq
+import os
+import re
+import threading
+
+DEFAULT_LISTING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tickers.csv')
+
+# Header names accepted for each column, compared case-insensitively
+COLUMN_ALIASES = {
+    'symbol': ('symbol', 'ticker', 'act symbol'),
+    'name': ('name', 'security name', 'company name', 'company'),
+    'exchange': ('exchange', 'listing exchange'),
+    'popularity': ('popularity', 'rank_score', 'volume'),
+}
+
+# Rank groups, best first
+EXACT_SYMBOL, SYMBOL_PREFIX, NAME_MATCH = 0, 1, 2
+
+# Queries up to this many characters have their results memoized
+MEMO_QUERY_LENGTH = 3
+
+# Prefix ranges wider than this are scanned in popularity order instead
+SCAN_THRESHOLD = 256
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def _words(text):
+    return _WORD.findall(text.lower())
+
+
+def _prefix_range(keys, prefix):
+    """Index range of the keys starting with prefix in a sorted list"""
+    start = bisect_left(keys, prefix)
+    end = bisect_left(keys, prefix + '\uffff', start)
+    return start, end
+
+
+class TickerIndex:
+    """Prefix index over symbols and company names"""
+
+    def __init__(self, listings):
+        """
+        Args:
+            listings: Iterable of dicts with 'symbol', 'name' and optionally
+                'exchange' and 'popularity'
+        """
+        self.symbols = []
+        self.names = []
+        self.exchanges = []
+        self.popularity = []
+        self._name_words = []
+
+        seen = set()
+        for listing in listings:
+            symbol = (listing.get('symbol') or '').strip().upper()
+            if not symbol or symbol in seen:
+                continue
+            seen.add(symbol)
+            name = (listing.get('name') or '').strip()
+            try:
+                popularity = float(listing.get('popularity') or 0)
+            except ValueError:
+                popularity = 0.0
+            self.symbols.append(symbol)
+            self.names.append(name)
+            self.exchanges.append((listing.get('exchange') or '').strip() or None)
+            self.popularity.append(popularity)
+            self._name_words.append(frozenset(_words(name)))
+
+        # Position of each listing in rank order within a match group
+        ranked = sorted(range(len(self.symbols)),
+                        key=lambda i: (-self.popularity[i], len(self.symbols[i]), self.symbols[i]))
+        self._rank = [0] * len(ranked)
+        for position, i in enumerate(ranked):
+            self._rank[i] = position
+
+        symbol_entries = sorted((symbol, i) for i, symbol in enumerate(self.symbols))
+        self._symbol_keys = [symbol for symbol, _ in symbol_entries]
+        self._symbol_ids = [i for _, i in symbol_entries]
+        self._symbols_by_rank = [(self.symbols[i], i) for i in ranked]
+
+        word_entries = sorted(
+            (word, i) for i, words in enumerate(self._name_words) for word in words
+        )
+        self._word_keys = [word for word, _ in word_entries]
+        self._word_ids = [i for _, i in word_entries]
+        self._words_by_rank = sorted(word_entries, key=lambda entry: self._rank[entry[1]])
+
+        self._memo = lru_cache(maxsize=4096)(self._search)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_LISTING_PATH):
+        """Load an index from a listing file"""
+        with open(path, newline='', encoding='utf-8') as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',|\t')
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.reader(f, dialect)
+            header = [column.strip().lower() for column in next(reader, [])]
+
+            positions = {}
+            for column, aliases in COLUMN_ALIASES.items():
+                for alias in aliases:
+                    if alias in header:
+                        positions[column] = header.index(alias)
+                        break
+            if 'symbol' not in positions:
+                raise ValueError(f"Listing file {path} has no symbol column")
+
+            listings = (
+                {column: row[position] for column, position in positions.items() if position < len(row)}
+                for row in reader if row
+            )
+            return cls(listings)
+
+    def search(self, query, limit=10):
+        """
+        Find listings matching a query
+
+        The query matches a symbol when it is a prefix of the symbol, and a
+        company name when every query word is a prefix of a word in the name.
+
+        Args:
+            query: Text typed by the user
+            limit: Maximum number of results
+
+        Returns:
+            list: Dicts with symbol, name, exchange and match type, best first
+        """
+        query = ' '.join(query.split()).lower()
+        if not query or limit < 1:
+            return []
+        if len(query) <= MEMO_QUERY_LENGTH or ' ' in query:
+            return list(self._memo(query, limit))
+        return list(self._search(query, limit))
+
+    def _best(self, keys, ids, by_rank, prefix, limit, accept):
+        """
+        Best-ranked listings with a key starting with prefix, up to limit
+
+        Args:
+            keys, ids: Sorted keys and the listing of each
+            by_rank: (key, listing) pairs in rank order
+            prefix: Key prefix
+            limit: Maximum number of listings
+            accept: Predicate a listing must also satisfy
+        """
+        start, end = _prefix_range(keys, prefix)
+        if end - start <= SCAN_THRESHOLD:
+            matches = sorted({ids[position] for position in range(start, end)}, key=self._rank.__getitem__)
+            return [i for i in matches if accept(i)][:limit]
+
+        found, seen = [], set()
+        for key, i in by_rank:
+            if i not in seen and key.startswith(prefix) and accept(i):
+                seen.add(i)
+                found.append(i)
+                if len(found) == limit:
+                    break
+        return found
+
+    def _name_matches(self, words, limit, exclude):
+        """
+        Best-ranked listings with a name word starting with each of words
+
+        Candidates come from the narrowest prefix range. Each wider range
+        then narrows them: few candidates are checked against their own
+        name words, many are intersected with the range.
+
+        Args:
+            words: Query words
+            limit: Maximum number of listings
+            exclude: Listings already matched
+        """
+        ranges = sorted(((_prefix_range(self._word_keys, word), word) for word in words),
+                        key=lambda entry: entry[0][1] - entry[0][0])
+        (start, end), _ = ranges[0]
+        candidates = set(self._word_ids[start:end])
+        for (start, end), word in ranges[1:]:
+            if not candidates:
+                break
+            if len(candidates) * 8 < end - start:
+                candidates = {
+                    i for i in candidates
+                    if any(name_word.startswith(word) for name_word in self._name_words[i])
+                }
+            else:
+                candidates.intersection_update(self._word_ids[start:end])
+        candidates.difference_update(exclude)
+        return heapq.nsmallest(limit, candidates, key=self._rank.__getitem__)
+
+    def _search(self, query, limit):
+        groups = {}
+
+        symbol = query.upper().replace(' ', '')
+        start, end = _prefix_range(self._symbol_keys, symbol)
+        if start < end and self._symbol_keys[start] == symbol:
+            groups[self._symbol_ids[start]] = EXACT_SYMBOL
+        for i in self._best(self._symbol_keys, self._symbol_ids, self._symbols_by_rank, symbol,
+                            limit, lambda i: i not in groups):
+            groups[i] = SYMBOL_PREFIX
+
+        words = _words(query)
+        if len(words) == 1 and len(groups) < limit:
+            for i in self._best(self._word_keys, self._word_ids, self._words_by_rank, words[0],
+                                limit - len(groups), lambda i: i not in groups):
+                groups[i] = NAME_MATCH
+        elif words and len(groups) < limit:
+            for i in self._name_matches(words, limit - len(groups), groups):
+                groups[i] = NAME_MATCH
+
+        best = sorted(groups, key=lambda i: (groups[i], self._rank[i]))[:limit]
+        return tuple(
+            {
+                'symbol': self.symbols[i],
+                'name': self.names[i],
+                'exchange': self.exchanges[i],
+                'match': 'symbol' if groups[i] != NAME_MATCH else 'name'
+            }
+            for i in best
+        )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index(path=None):
+    """
+    The process-wide index, loaded on first use
+
+    Args:
+        path: Listing file (defaults to DCF_TICKER_LISTING or the bundled listing)
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TickerIndex.from_file(path or os.environ.get('DCF_TICKER_LISTING', DEFAULT_LISTING_PATH))
+    return _index
@@ -0,0 +1,123 @@
+"""
+Cold-start control: lazy module loading, warm-up and startup timing
+
+With DCF_LAZY_IMPORTS set, the API defers importing the valuation model
+(and with it NumPy, pandas and yfinance) until a request first needs it, so
+a new worker starts serving health checks and light endpoints quickly.
+LazyModule stands in for a module and imports it on first attribute access.
+
+Under gunicorn with preload_app, the warm-up hook instead imports every
+heavy module and runs a small valuation in the master process before
+workers are forked, so workers start with the modules already loaded and
+share their memory pages (see gunicorn.conf.py).
+
+Every import and the warm-up are timed; report() summarizes them for the
+health and metrics endpoints.
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger('dcf-web-api')
+
+LAZY_IMPORTS = os.environ.get('DCF_LAZY_IMPORTS', '').lower() in ('1', 'true', 'yes')
+
+# Third-party modules loaded on the analysis paths, preloaded by warm-up
+HEAVY_MODULES = ('numpy', 'pandas', 'yfinance')
+
+_lock = threading.Lock()
+_module_seconds = {}
+_phases = {}
+
+
+def record_phase(name, seconds):
+    """Record the duration of a startup phase such as 'import' or 'warmup'"""
+    with _lock:
+        _phases[name] = seconds
+
+
+def _import(name):
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    with _lock:
+        _module_seconds.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+class LazyModule:
+    """Module proxy that imports the module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._load_lock = threading.Lock()
+
+    def load(self):
+        """Import the module now if it has not been imported yet"""
+        if self._module is None:
+            with self._load_lock:
+                if self._module is None:
+                    self._module = _import(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def load_module(name, lazy=None):
+    """
+    Import a module now, or return a LazyModule when lazy imports are on
+
+    A lazy module that cannot be found is reported immediately rather than
+    on first use.
+
+    Args:
+        name: Module name
+        lazy: Override the DCF_LAZY_IMPORTS setting
+
+    Returns:
+        The module or a LazyModule proxy
+    """
+    if lazy is None:
+        lazy = LAZY_IMPORTS
+    if not lazy:
+        return _import(name)
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named {name!r}")
+    return LazyModule(name)
+
+
+def preload(names):
+    """
+    Import modules (or load LazyModule proxies) and record their import times
+
+    Modules that are not installed are skipped, and module objects (already
+    imported by load_module in eager mode) are left as they are.
+    """
+    for name in names:
+        try:
+            if isinstance(name, LazyModule):
+                name.load()
+            elif isinstance(name, str):
+                _import(name)
+        except ImportError as e:
+            logger.warning(f"Could not preload {name}: {e}")
+
+
+def report():
+    """Startup mode, phase durations and per-module import times in seconds"""
+    with _lock:
+        return {
+            'mode': 'lazy' if LAZY_IMPORTS else 'eager',
+            'phases': dict(_phases),
+            'modules': dict(_module_seconds),
+            'pid': os.getpid()
+        }
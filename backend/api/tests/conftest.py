@@ -0,0 +1,48 @@
+"""
+Fixtures for the API tests
+
+The API modules are imported from backend/api, as gunicorn does, with the
+repository root on the path for dcf_model. The app fixture swaps in sample
+company data and empty caches, so no test reaches Yahoo Finance.
+"""
+
+import os
+import sys
+
+import pytest
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(os.path.dirname(API_DIR))
+for path in (REPO_ROOT, API_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def provider():
+    """Upstream serving the AAPL and MSFT samples and recording fetches"""
+    from dcf_model.tests.sample_data import SampleProvider
+
+    return SampleProvider()
+
+
+@pytest.fixture
+def api(monkeypatch, provider):
+    """The app module serving sample companies with fresh caches and job manager"""
+    import app as api
+    from cache import MemoryBackend, ResultCache
+    from jobs import JobManager
+    from dcf_model.providers import CoalescingProvider
+
+    manager = JobManager(max_workers=2)
+    monkeypatch.setattr(api, 'data_provider', CoalescingProvider(provider))
+    monkeypatch.setattr(api, 'result_cache', ResultCache(MemoryBackend()))
+    monkeypatch.setattr(api, 'model_store', MemoryBackend())
+    monkeypatch.setattr(api, 'job_manager', manager)
+    yield api
+    manager._executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
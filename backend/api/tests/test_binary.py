@@ -0,0 +1,91 @@
+"""encode_binary / decode_binary round-trips"""
+
+import json
+
+import numpy as np
+import pytest
+
+from binary import MIMETYPE, decode_binary, encode_binary
+
+
+def test_arrays_and_scalars_round_trip():
+    payload = {
+        'status': 'success',
+        'data': {
+            'values': np.linspace(0, 1, 7),
+            'counts': np.arange(5, dtype=np.int64),
+            'mask': np.array([True, False, True]),
+            'grid': np.arange(12, dtype=np.int32).reshape(3, 4),
+            'nested': [{'row': np.array([1.5, 2.5])}, 3, 'text'],
+            'mean': np.float64(2.5),
+            'count': np.int64(7),
+        }
+    }
+
+    decoded = decode_binary(encode_binary(payload, float_dtype='<f8'))['data']
+
+    np.testing.assert_array_equal(decoded['values'], payload['data']['values'])
+    np.testing.assert_array_equal(decoded['counts'], payload['data']['counts'])
+    np.testing.assert_array_equal(decoded['mask'], payload['data']['mask'])
+    np.testing.assert_array_equal(decoded['grid'], payload['data']['grid'])
+    assert decoded['grid'].shape == (3, 4)
+    np.testing.assert_array_equal(decoded['nested'][0]['row'], [1.5, 2.5])
+    assert decoded['nested'][1:] == [3, 'text']
+    assert decoded['mean'] == 2.5 and decoded['count'] == 7
+
+
+def test_floats_default_to_float32():
+    values = np.random.default_rng(0).normal(size=1000)
+
+    decoded = decode_binary(encode_binary({'values': values}))['values']
+
+    assert decoded.dtype == np.dtype('<f4')
+    np.testing.assert_allclose(decoded, values, rtol=1e-6)
+
+
+def test_buffers_are_aligned():
+    payload = encode_binary({'a': np.arange(3, dtype=np.int8), 'b': np.arange(3.0)})
+    prefix = 12
+    header_len = int.from_bytes(payload[8:12], 'little')
+    body_start = -(-(prefix + header_len) // 8) * 8
+
+    arrays = json.loads(payload[prefix:prefix + header_len])['arrays']
+
+    assert all((body_start + a['offset']) % 8 == 0 for a in arrays)
+
+
+def test_non_finite_scalars_become_null():
+    decoded = decode_binary(encode_binary({'nan': float('nan'), 'inf': np.float64('inf')}))
+    assert decoded == {'nan': None, 'inf': None}
+
+
+def test_other_payloads_are_rejected():
+    with pytest.raises(ValueError):
+        decode_binary(b'JSON\x01\x00\x00\x00\x00\x00\x00\x00')
+
+
+def test_api_negotiates_binary(client):
+    response = client.post('/api/analyze-with-params', json={
+        'ticker': 'AAPL', 'num_simulations': 200, 'seed': 1, 'return_values': True
+    }, headers={'Accept': MIMETYPE})
+
+    assert response.status_code == 200
+    assert response.mimetype == MIMETYPE
+    data = decode_binary(response.data)['data']
+    assert data['monte_carlo']['values'].shape == (200,)
+
+
+@pytest.mark.parametrize('accept, mimetype', [
+    (MIMETYPE, MIMETYPE),
+    ('application/json', 'application/json'),
+])
+def test_cached_and_fresh_analyses_use_the_same_format(client, accept, mimetype):
+    fresh = client.post('/api/analyze', json={'ticker': 'AAPL'}, headers={'Accept': accept})
+    cached = client.post('/api/analyze', json={'ticker': 'AAPL'}, headers={'Accept': accept})
+
+    assert cached.headers['X-Cache'] == 'HIT'
+    assert fresh.mimetype == cached.mimetype == mimetype
+    if mimetype == MIMETYPE:
+        assert decode_binary(fresh.data) == decode_binary(cached.data)
+    else:
+        assert fresh.json == cached.json
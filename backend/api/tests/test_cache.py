@@ -0,0 +1,87 @@
+"""Result cache keys, backends and the cached /api/analyze path"""
+
+import time
+
+import pytest
+
+from cache import MemoryBackend, ResultCache
+
+
+def test_key_ignores_parameter_order_and_ticker_case():
+    key = ResultCache.make_key('analyze', 'aapl ', {'seed': 1, 'terminal_growth': 0.03})
+    assert key == ResultCache.make_key('analyze', 'AAPL', {'terminal_growth': 0.03, 'seed': 1})
+    assert key != ResultCache.make_key('analyze', 'AAPL', {'terminal_growth': 0.02, 'seed': 1})
+    assert key != ResultCache.make_key('sensitivity', 'AAPL', {'terminal_growth': 0.03, 'seed': 1})
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', 1, ttl=60)
+    backend.set('b', 2, ttl=60)
+    backend.get('a')
+    backend.set('c', 3, ttl=60)
+
+    assert backend.get('b') is None
+    assert backend.get('a') == 1 and backend.get('c') == 3
+
+
+def test_memory_backend_expires_entries():
+    backend = MemoryBackend()
+    backend.set('a', 1, ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get('a') is None
+    assert backend.counters()['entries'] == 0
+
+
+def test_result_cache_counts_hits_and_misses():
+    cache = ResultCache(MemoryBackend(), ttl=60)
+    key = cache.make_key('analyze', 'AAPL')
+
+    assert cache.get(key) is None
+    cache.set(key, {'per_share_value': 12.5})
+    assert cache.get(key) == {'per_share_value': 12.5}
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert stats['hit_ratio'] == pytest.approx(0.5)
+
+
+def test_a_failing_backend_is_a_miss():
+    class Broken:
+        def get(self, key):
+            raise ConnectionError('down')
+
+        def incr(self, counter):
+            raise ConnectionError('down')
+
+    assert ResultCache(Broken()).get('analyze:AAPL:x') is None
+
+
+def test_second_analysis_is_served_from_the_cache(client, provider):
+    first = client.post('/api/analyze', json={'ticker': 'AAPL'})
+    second = client.post('/api/analyze', json={'ticker': 'aapl'})
+
+    assert first.status_code == second.status_code == 200
+    assert 'X-Cache' not in first.headers
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.json['data'] == first.json['data']
+    assert provider.calls == [('fetch', 'AAPL')]
+
+
+def test_placeholder_results_are_not_cached(client, provider):
+    first = client.post('/api/analyze', json={'ticker': 'ZZZZ'})
+    second = client.post('/api/analyze', json={'ticker': 'ZZZZ'})
+
+    assert first.json['data']['fallback'] is True
+    assert 'X-Cache' not in second.headers
+    assert provider.calls == [('fetch', 'ZZZZ'), ('fetch', 'ZZZZ')]
+
+
+def test_parameter_changes_reuse_the_fetched_model(client, provider):
+    for terminal_growth in (0.02, 0.025, 0.03):
+        response = client.post('/api/analyze-with-params', json={
+            'ticker': 'MSFT', 'terminal_growth': terminal_growth, 'num_simulations': 100, 'seed': 0
+        })
+        assert response.status_code == 200
+
+    assert provider.calls == [('fetch', 'MSFT')]
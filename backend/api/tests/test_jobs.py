@@ -0,0 +1,158 @@
+"""JobManager lifecycle and the /api/jobs endpoints"""
+
+import threading
+import time
+
+import pytest
+
+from jobs import CANCELLED, COMPLETED, FAILED, FINISHED_STATES, QUEUED, RUNNING, JobManager
+
+
+def wait_until_finished(get, timeout=10.0):
+    """Poll a job (or its status endpoint) until it reaches a finished state"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get()
+        if job['status'] in FINISHED_STATES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError('job did not finish')
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1)
+    yield manager
+    manager._executor.shutdown(wait=True)
+
+
+def test_job_completes_with_progress_and_result(manager):
+    def work(job):
+        for done in range(1, 5):
+            job.update_progress(done, 4)
+        return {'answer': 42}
+
+    job = manager.submit('test', {'n': 4}, work)
+    wait_until_finished(job.to_dict)
+
+    assert job.status == COMPLETED
+    assert job.progress == 1.0 and job.result == {'answer': 42}
+    assert job.started_at >= job.created_at and job.finished_at >= job.started_at
+    assert manager.get(job.id) is job
+
+
+def test_failing_job_records_the_error(manager):
+    def work(job):
+        raise RuntimeError('model diverged')
+
+    job = manager.submit('test', {}, work)
+    wait_until_finished(job.to_dict)
+
+    assert job.status == FAILED
+    assert job.error == 'model diverged' and job.result is None
+
+
+def test_running_job_stops_at_its_next_progress_update(manager):
+    started = threading.Event()
+    resume = threading.Event()
+    updates = []
+
+    def work(job):
+        started.set()
+        resume.wait()
+        for done in range(1, 100):
+            job.update_progress(done, 100)
+            updates.append(done)
+
+    job = manager.submit('test', {}, work)
+    started.wait()
+    assert job.status == RUNNING
+    manager.cancel(job.id)
+    resume.set()
+    wait_until_finished(job.to_dict)
+
+    assert job.status == CANCELLED
+    assert updates == []
+
+
+def test_queued_job_is_cancelled_without_running(manager):
+    release = threading.Event()
+    blocker = manager.submit('test', {}, lambda job: release.wait())
+    queued = manager.submit('test', {}, lambda job: pytest.fail('cancelled job ran'))
+    assert queued.status == QUEUED
+
+    manager.cancel(queued.id)
+    release.set()
+    wait_until_finished(blocker.to_dict)
+
+    assert queued.status == CANCELLED and queued.started_at is None
+
+
+def test_finished_jobs_expire(manager):
+    manager.result_ttl = 0.01
+    job = manager.submit('test', {}, lambda job: 1)
+    wait_until_finished(job.to_dict)
+    time.sleep(0.02)
+
+    assert manager.get(job.id) is None
+    assert manager.cancel(job.id) is None
+
+
+def test_monte_carlo_job_through_the_api(client):
+    submitted = client.post('/api/jobs', json={'ticker': 'AAPL', 'num_simulations': 2000, 'seed': 3})
+    assert submitted.status_code == 202
+    job_id = submitted.json['data']['job_id']
+
+    status = wait_until_finished(lambda: client.get(f'/api/jobs/{job_id}').json['data'])
+    result = client.get(f'/api/jobs/{job_id}/result')
+
+    assert status['status'] == COMPLETED and status['progress'] == 1.0
+    assert result.status_code == 200
+    assert result.json['data']['monte_carlo']['seed'] == 3
+    assert result.json['data']['per_share_value'] > 0
+
+
+def test_batch_job_reports_failed_tickers(client):
+    submitted = client.post('/api/jobs', json={'type': 'batch', 'tickers': ['AAPL', 'MSFT', 'ZZZZ']})
+    job_id = submitted.json['data']['job_id']
+
+    wait_until_finished(lambda: client.get(f'/api/jobs/{job_id}').json['data'])
+    data = client.get(f'/api/jobs/{job_id}/result').json['data']
+
+    assert set(data['results']) == {'AAPL', 'MSFT'}
+    assert set(data['errors']) == {'ZZZZ'}
+
+
+def test_job_endpoint_errors(client):
+    assert client.post('/api/jobs', json={'type': 'nope'}).status_code == 400
+    assert client.post('/api/jobs', json={'ticker': 'AAPL', 'tolerance': 'x'}).status_code == 400
+    assert client.get('/api/jobs/unknown').status_code == 404
+    assert client.post('/api/jobs/unknown/cancel').status_code == 404
+
+
+@pytest.mark.parametrize('num_simulations', [0, -5, 2.5, '100x', True, None, [100]])
+def test_simulation_count_must_be_a_positive_integer(client, num_simulations):
+    body = {'ticker': 'AAPL', 'num_simulations': num_simulations}
+    for path in ('/api/analyze-with-params', '/api/analyze-stream', '/api/jobs'):
+        response = client.post(path, json=body)
+        assert response.status_code == 400, path
+        assert response.json['message'] == 'num_simulations must be a positive integer'
+
+
+def test_large_runs_are_sent_to_background_jobs(client, api, monkeypatch):
+    monkeypatch.setattr(api, 'MAX_SYNC_SIMULATIONS', 500)
+    monkeypatch.setattr(api, 'MAX_JOB_SIMULATIONS', 1000)
+
+    for path in ('/api/analyze-with-params', '/api/analyze-stream'):
+        response = client.post(path, json={'ticker': 'AAPL', 'num_simulations': 501})
+        assert response.status_code == 400
+        assert '/api/jobs' in response.json['message']
+    assert client.post('/api/analyze-with-params',
+                       json={'ticker': 'AAPL', 'num_simulations': '500'}).status_code == 200
+
+    submitted = client.post('/api/jobs', json={'ticker': 'AAPL', 'num_simulations': 1000, 'seed': 1})
+    assert submitted.status_code == 202
+    wait_until_finished(lambda: client.get(f"/api/jobs/{submitted.json['data']['job_id']}").json['data'])
+    rejected = client.post('/api/jobs', json={'ticker': 'AAPL', 'num_simulations': 1001})
+    assert rejected.status_code == 400
+    assert rejected.json['message'] == 'num_simulations must be at most 1000'
@@ -0,0 +1,87 @@
+"""Server-Timing stages and the Prometheus metrics at /api/metrics"""
+
+import re
+
+import pytest
+
+from metrics import InstrumentedProvider, MetricsRegistry, RequestTimer, stage
+
+from dcf_model.providers import CoalescingProvider
+from dcf_model.tests.sample_data import SampleProvider
+
+
+@pytest.fixture
+def registry(api, monkeypatch, provider):
+    """A fresh registry with upstream fetches counted, as in production"""
+    registry = MetricsRegistry()
+    monkeypatch.setattr(api, 'metrics', registry)
+    monkeypatch.setattr(api, 'data_provider', CoalescingProvider(InstrumentedProvider(provider, registry)))
+    return registry
+
+
+def server_timing(response):
+    return {name: float(duration) for name, duration in
+            re.findall(r'(\w+);dur=([\d.]+)', response.headers['Server-Timing'])}
+
+
+def sample_value(text, name, **labels):
+    """Value of one sample in Prometheus text, or None"""
+    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{name}\{{{re.escape(label_text)}\}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_server_timing_breaks_down_the_request(client, registry):
+    fresh = client.post('/api/analyze-with-params',
+                        json={'ticker': 'AAPL', 'num_simulations': 200, 'seed': 1})
+    assert fresh.status_code == 200
+    timings = server_timing(fresh)
+    assert {'cache', 'fetch', 'valuation', 'monte_carlo', 'serialize', 'total'} <= set(timings)
+    assert sum(v for k, v in timings.items() if k != 'total') <= timings['total'] + 1e-3
+
+    cached = client.post('/api/analyze-with-params',
+                         json={'ticker': 'AAPL', 'num_simulations': 200, 'seed': 1})
+    assert cached.headers['X-Cache'] == 'HIT'
+    assert 'fetch' not in server_timing(cached) and 'cache' in server_timing(cached)
+
+
+def test_metrics_count_requests_errors_and_upstream_fetches(client, registry):
+    client.post('/api/analyze', json={'ticker': 'AAPL'})
+    client.post('/api/analyze', json={'ticker': 'AAPL'})
+    client.post('/api/analyze', json={})
+
+    text = client.get('/api/metrics').get_data(as_text=True)
+
+    assert sample_value(text, 'dcf_http_requests_total',
+                        endpoint='/api/analyze', method='POST', status='200') == 2
+    assert sample_value(text, 'dcf_http_request_errors_total', endpoint='/api/analyze') == 1
+    assert sample_value(text, 'dcf_http_request_duration_seconds_count', endpoint='/api/analyze') == 3
+    assert sample_value(text, 'dcf_upstream_fetches_total',
+                        endpoint='/api/analyze', kind='fetch', outcome='success') == 1
+    assert sample_value(text, 'dcf_stage_duration_seconds_count',
+                        endpoint='/api/analyze', stage='valuation') == 1
+    assert '# TYPE dcf_upstream_scheduler gauge' in text
+
+
+def test_stages_outside_a_request_are_not_recorded():
+    registry = MetricsRegistry(buckets=(0.5, 1.0))
+    with stage('valuation'):
+        pass
+
+    timer = registry.start_request('/api/x')
+    with stage('valuation'):
+        pass
+    with stage('valuation'):
+        pass
+    timer.add('fetch', 0.75)
+    registry.finish_request(timer, 'GET', 503)
+    with pytest.raises(LookupError):
+        InstrumentedProvider(SampleProvider(), registry).fetch('ZZZZ')
+
+    text = registry.render()
+    assert sample_value(text, 'dcf_stage_duration_seconds_count', endpoint='/api/x', stage='valuation') == 1
+    assert sample_value(text, 'dcf_stage_duration_seconds_bucket', endpoint='/api/x', stage='fetch', le='0.5') == 0
+    assert sample_value(text, 'dcf_stage_duration_seconds_bucket', endpoint='/api/x', stage='fetch', le='1.0') == 1
+    assert sample_value(text, 'dcf_upstream_fetches_total', endpoint='background', kind='fetch', outcome='error') == 1
+    assert sample_value(text, 'dcf_upstream_fetch_duration_seconds_count', kind='fetch') == 1
+    assert RequestTimer('/api/x').server_timing(total=0.002) == 'total;dur=2.000'
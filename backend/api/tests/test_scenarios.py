@@ -0,0 +1,33 @@
+"""/api/scenarios"""
+
+import pytest
+
+
+def test_fade_specification_builds_every_start_end_pair(client):
+    response = client.post('/api/scenarios', json={
+        'ticker': 'AAPL', 'fade': {'start': [0.15, 0.10, 0.05], 'end': [0.02, 0.04]}
+    })
+
+    assert response.status_code == 200
+    data = response.json['data']
+    assert data['num_scenarios'] == 6
+    assert [path[0] for path in data['growth_paths']] == pytest.approx([0.15, 0.15, 0.10, 0.10, 0.05, 0.05])
+    assert [path[-1] for path in data['growth_paths']] == pytest.approx([0.02, 0.04] * 3)
+    assert data['summary']['num_valid'] == 6
+
+
+def test_explicit_paths_match_the_analysis_endpoint(client):
+    path = [0.08, 0.07, 0.06, 0.05, 0.04]
+    scenarios = client.post('/api/scenarios', json={'ticker': 'MSFT', 'growth_paths': [path]})
+    analysis = client.post('/api/analyze-with-params', json={
+        'ticker': 'MSFT', 'growth_rates': path, 'num_simulations': 10, 'seed': 0
+    })
+
+    assert scenarios.json['data']['per_share_value'][0] == pytest.approx(analysis.json['data']['per_share_value'])
+
+
+def test_bad_requests(client):
+    assert client.post('/api/scenarios', json={}).status_code == 400
+    assert client.post('/api/scenarios', json={'ticker': 'AAPL'}).status_code == 400
+    response = client.post('/api/scenarios', json={'ticker': 'AAPL', 'growth_paths': [[0.1, -2]]})
+    assert response.status_code == 400 and 'greater than -1' in response.json['message']
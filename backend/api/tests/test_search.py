@@ -0,0 +1,116 @@
+"""Ticker search: ranking, multi-word matching, the wide-prefix scan and the memo"""
+
+import random
+
+import pytest
+
+from search import SCAN_THRESHOLD, TickerIndex, _words
+
+LISTINGS = [
+    {'symbol': 'APP', 'name': 'AppLovin Corp', 'popularity': 50},
+    {'symbol': 'AAPL', 'name': 'Apple Inc.', 'exchange': 'NASDAQ', 'popularity': 1000},
+    {'symbol': 'APPN', 'name': 'Appian Corporation', 'popularity': 5},
+    {'symbol': 'AMAT', 'name': 'Applied Materials, Inc.', 'popularity': 300},
+    {'symbol': 'BAC', 'name': 'Bank of America Corporation', 'popularity': 700},
+    {'symbol': 'BK', 'name': 'Bank of New York Mellon Corp', 'popularity': 200},
+    {'symbol': 'NYCB', 'name': 'New York Community Bancorp', 'popularity': 40},
+    {'symbol': 'aapl', 'name': 'Duplicate', 'popularity': 1},
+]
+
+
+@pytest.fixture
+def index():
+    return TickerIndex(LISTINGS)
+
+
+def symbols(results):
+    return [result['symbol'] for result in results]
+
+
+def test_exact_symbol_then_symbol_prefix_then_name(index):
+    results = index.search('app')
+
+    assert symbols(results) == ['APP', 'APPN', 'AAPL', 'AMAT']
+    assert [result['match'] for result in results] == ['symbol', 'symbol', 'name', 'name']
+    assert results[2] == {'symbol': 'AAPL', 'name': 'Apple Inc.', 'exchange': 'NASDAQ', 'match': 'name'}
+
+
+def test_duplicates_are_dropped_and_limit_applies(index):
+    assert len(index) == 7
+    assert symbols(index.search('a', limit=2)) == ['AAPL', 'AMAT']
+    assert index.search('a', limit=0) == [] and index.search('   ') == []
+
+
+def test_every_query_word_must_prefix_a_name_word(index):
+    assert symbols(index.search('bank of')) == ['BAC', 'BK']
+    assert symbols(index.search('new york')) == ['BK', 'NYCB']
+    assert symbols(index.search('york  NEW')) == ['BK', 'NYCB']
+    assert symbols(index.search('york mel')) == ['BK']
+    assert index.search('bank apple') == []
+
+
+def test_results_are_copies_of_the_memo(index):
+    first = index.search('ban')
+    first.clear()
+    assert symbols(index.search('ban')) == ['BAC', 'BK', 'NYCB']
+    assert index._memo.cache_info().hits == 1
+
+
+def brute_force(listings, query, limit):
+    """Reference search straight from the documented ranking rules"""
+    query = ' '.join(query.split()).lower()
+    symbol = query.upper().replace(' ', '')
+    words = _words(query)
+    groups = {}
+    for listing in listings:
+        if listing['symbol'] == symbol:
+            groups[listing['symbol']] = 0
+        elif listing['symbol'].startswith(symbol):
+            groups[listing['symbol']] = 1
+        elif words and all(any(w.startswith(q) for w in _words(listing['name'])) for q in words):
+            groups[listing['symbol']] = 2
+    by_symbol = {listing['symbol']: listing for listing in listings}
+    return sorted(groups, key=lambda s: (groups[s], -by_symbol[s]['popularity'], len(s), s))[:limit]
+
+
+def test_wide_prefixes_rank_like_narrow_ones():
+    rng = random.Random(0)
+    syllables = ['al', 'be', 'co', 'da', 'en', 'fi', 'go', 'ha', 'in', 'jo']
+    listings, seen = [], set()
+    while len(listings) < 3000:
+        symbol = ''.join(rng.choice('ABCDEFGHIJ') for _ in range(rng.randint(1, 4)))
+        if symbol in seen:
+            continue
+        seen.add(symbol)
+        name = ' '.join(''.join(rng.choice(syllables) for _ in range(rng.randint(1, 3)))
+                        for _ in range(rng.randint(1, 3)))
+        listings.append({'symbol': symbol, 'name': name, 'popularity': rng.randint(0, 100)})
+    index = TickerIndex(listings)
+
+    queries = ['a', 'b', 'al', 'co', 'abc', 'ha go', 'co al be', 'jo', 'd e', 'fi in']
+    assert any(len([l for l in listings if l['symbol'].startswith(q.upper())]) > SCAN_THRESHOLD
+               for q in queries)
+    for query in queries:
+        for limit in (1, 10, 50):
+            assert symbols(index.search(query, limit)) == brute_force(listings, query, limit), (query, limit)
+
+
+def test_listing_files_load_with_aliased_columns(tmp_path):
+    path = tmp_path / 'nasdaqlisted.txt'
+    path.write_text('Symbol|Security Name|Market Category\nAAPL|Apple Inc. - Common Stock|Q\n'
+                    'MSFT|Microsoft Corporation - Common Stock|Q\n')
+    assert symbols(TickerIndex.from_file(str(path)).search('micro')) == ['MSFT']
+
+    path.write_text('code,title\nAAPL,Apple\n')
+    with pytest.raises(ValueError):
+        TickerIndex.from_file(str(path))
+
+
+def test_search_endpoint(client):
+    response = client.get('/api/search-tickers?query=apple&limit=3')
+    assert response.status_code == 200
+    assert response.json['data'][0]['symbol'] == 'AAPL'
+
+    assert client.get('/api/search-tickers?query=%20').status_code == 400
+    assert client.get('/api/search-tickers?query=a&limit=x').status_code == 400
+    assert len(client.get('/api/search-tickers?query=a&limit=500').json['data']) <= 50
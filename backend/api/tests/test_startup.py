@@ -0,0 +1,60 @@
+"""Importing the API: missing model package and lazy imports"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_app(code='import app', **env):
+    """Import the API in a fresh interpreter run from outside the repository"""
+    environ = {k: v for k, v in os.environ.items() if k not in ('PYTHONPATH', 'DCF_LAZY_IMPORTS')}
+    environ.update(env)
+    return subprocess.run([sys.executable, '-c', f'import sys; sys.path.insert(0, {API_DIR!r}); {code}'],
+                          cwd=os.path.dirname(API_DIR), env=environ, capture_output=True, text=True)
+
+
+def test_missing_model_package_is_an_import_error():
+    result = import_app()
+
+    assert result.returncode != 0
+    assert 'ImportError: Failed to import DCFModel' in result.stderr
+    assert 'NameError' not in result.stderr
+
+
+def test_lazy_imports_defer_the_heavy_modules():
+    code = ("import app; "
+            "heavy = ('numpy', 'pandas', 'yfinance', 'dcf_model.dcf', 'binary'); "
+            "print(sorted(m for m in heavy if m in sys.modules)); "
+            "app.dcf_module.DCFModel; "
+            "print(sorted(m for m in heavy if m in sys.modules)); "
+            "print(sorted(app.startup.report()['modules']))")
+    result = import_app(code, DCF_LAZY_IMPORTS='1', PYTHONPATH=os.path.dirname(os.path.dirname(API_DIR)))
+
+    assert result.returncode == 0, result.stderr
+    before, after, timed = result.stdout.splitlines()
+    assert before == '[]'
+    assert after == "['dcf_model.dcf', 'numpy', 'pandas']"
+    assert timed == "['dcf_model.dcf']"
+
+
+def test_lazy_module_loads_on_first_use():
+    import startup
+
+    module = startup.load_module('json', lazy=True)
+    assert isinstance(module, startup.LazyModule) and 'not loaded' in repr(module)
+    assert module.dumps([1]) == '[1]'
+    assert 'loaded' in repr(module) and module.load() is sys.modules['json']
+
+    startup.preload([module, sys.modules['os'], 'no_such_module_dcf'])
+    assert startup.load_module('json', lazy=False) is sys.modules['json']
+
+
+def test_missing_lazy_module_fails_at_startup():
+    import startup
+
+    with pytest.raises(ImportError, match='no_such_module_dcf'):
+        startup.load_module('no_such_module_dcf', lazy=True)
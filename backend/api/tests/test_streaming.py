@@ -0,0 +1,77 @@
+"""Framing of /api/analyze-stream as Server-Sent Events and NDJSON"""
+
+import json
+
+
+def sse_events(body):
+    """Split an SSE body into (event, data) pairs"""
+    events = []
+    for block in body.split('\n\n'):
+        if not block:
+            continue
+        event_line, data_line = block.split('\n')
+        assert event_line.startswith('event: ') and data_line.startswith('data: ')
+        events.append((event_line[len('event: '):], json.loads(data_line[len('data: '):])))
+    return events
+
+
+def stream(client, **body):
+    return client.post('/api/analyze-stream', json=dict({'ticker': 'AAPL', 'seed': 5}, **body))
+
+
+def test_sse_progress_then_complete(client):
+    response = stream(client, num_simulations=1000, chunk_size=250)
+
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    body = response.get_data(as_text=True)
+    assert body.endswith('\n\n')
+
+    events = sse_events(body)
+    assert [event for event, _ in events] == ['progress'] * 3 + ['complete']
+    assert [data['done'] for _, data in events] == [250, 500, 750, 1000]
+    assert [data['final'] for _, data in events] == [False, False, False, True]
+    final = events[-1][1]
+    assert final['seed'] == 5 and final['stale'] is False and final['fallback'] is False
+    assert len(final['histogram']['counts']) == 50
+
+
+def test_ndjson_by_format_or_accept_header(client):
+    bodies = []
+    for extra, headers in (({'format': 'ndjson'}, {}), ({}, {'Accept': 'application/x-ndjson'})):
+        response = client.post('/api/analyze-stream', headers=headers, json=dict(
+            {'ticker': 'AAPL', 'seed': 5, 'num_simulations': 600, 'chunk_size': 200}, **extra
+        ))
+        assert response.mimetype == 'application/x-ndjson'
+        bodies.append(response.get_data(as_text=True))
+
+    lines = bodies[0].split('\n')
+    assert lines[-1] == ''
+    updates = [json.loads(line) for line in lines[:-1]]
+    assert [update['done'] for update in updates] == [200, 400, 600]
+    assert updates[-1]['final'] is True
+    assert bodies[1] == bodies[0]
+
+
+def test_stream_matches_the_seeded_simulation(client, api):
+    body = stream(client, num_simulations=800, chunk_size=400, format='ndjson').get_data(as_text=True)
+    final = json.loads(body.splitlines()[-1])
+
+    expected = api.load_model('AAPL').monte_carlo_simulation(800, seed=5, chunk_size=400)
+    assert final['mean'] == expected['mean']
+
+
+def test_errors_are_sent_as_an_event(client):
+    response = stream(client, num_simulations=100, sampling='bogus')
+
+    assert response.status_code == 200
+    [(event, data)] = sse_events(response.get_data(as_text=True))
+    assert event == 'error'
+    assert data['status'] == 'error' and 'sampling' in data['message']
+
+
+def test_invalid_parameters_are_rejected_before_streaming(client):
+    response = stream(client, tolerance=-1)
+    assert response.status_code == 400
+    assert response.json['status'] == 'error'
+    assert client.post('/api/analyze-stream', json={}).status_code == 400
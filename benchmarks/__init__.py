@@ -0,0 +1 @@
+"""Benchmarks for the valuation hot paths and API endpoints"""
@@ -0,0 +1,296 @@
+"""
+Benchmark cases
+
+Each case is a setup function registered with @benchmark. Setup runs once,
+outside the measurement, and returns the zero-argument callable that is
+timed. All data comes from the recorded fixtures, so no case touches the
+network.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from dcf_model import utils
+from dcf_model.backtest import backtest
+from dcf_model.batch import value_batch
+from dcf_model.dcf import DCFModel
+from dcf_model.screen import ValuationIndex
+from dcf_model.valuation import default_growth_rates, discounted_cash_flow, forecast_fcf
+
+from .fixtures import FixtureProvider, load_fixtures, replicate
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(REPO_ROOT, 'backend', 'api')
+
+BENCHMARKS = {}
+
+# Simulation sizes for the Monte Carlo endpoint cases
+SIMULATION_SIZES = (1000, 10000, 100000)
+
+
+def benchmark(name):
+    """Register a setup function under a benchmark name"""
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def _model(ticker):
+    model = DCFModel(ticker, provider=FixtureProvider())
+    model._fetch_company_data()
+    return model
+
+
+def _api():
+    """Import the Flask app with the fixture provider and no cached results"""
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    import app as api
+    from cache import MemoryBackend, ResultCache
+
+    api.data_provider = FixtureProvider()
+    api.result_cache = ResultCache(MemoryBackend(max_entries=0))
+    api.model_store = MemoryBackend(max_entries=0)
+    return api
+
+
+def _post(client, path, body):
+    """POST a request and fail the benchmark on an error response"""
+    response = client.post(path, json=body)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+for _ticker in sorted(load_fixtures()):
+    @benchmark(f'dcf/run_analysis/{_ticker}')
+    def _run_analysis(ticker=_ticker):
+        return _model(ticker).run_analysis
+
+
+@benchmark('dcf/run_analysis/terminal_growth_change')
+def _run_analysis_after_change():
+    model = _model('AAPL')
+    values = iter(np.tile(np.linspace(0.02, 0.035, 16), 100000))
+
+    def run():
+        # One slider tweak: only the terminal value and totals are recomputed
+        model.terminal_growth = next(values)
+        return model.run_analysis()
+    return run
+
+
+@benchmark('dcf/forecast_cash_flows')
+def _forecast_cash_flows():
+    return _model('AAPL').forecast_cash_flows
+
+
+@benchmark('dcf/discount_loop')
+def _discount_loop():
+    model = _model('AAPL')
+    forecasted_fcf, _ = model.forecast_cash_flows()
+    wacc = model.calculate_wacc()
+
+    def run():
+        pv_fcf = 0
+        for i, fcf in enumerate(forecasted_fcf):
+            pv_fcf += fcf / ((1 + wacc) ** (i + 1))
+        terminal_value = model.calculate_terminal_value(forecasted_fcf[-1])
+        return pv_fcf + terminal_value / ((1 + wacc) ** model.forecast_years)
+    return run
+
+
+@benchmark('valuation/forecast_discount/10000')
+def _forecast_discount_vectorized():
+    rng = np.random.default_rng(0)
+    base_fcf = rng.uniform(1e8, 1e11, 10000)
+    wacc = rng.uniform(0.06, 0.12, 10000)
+    growth_rates = default_growth_rates(5)
+    return lambda: discounted_cash_flow(forecast_fcf(base_fcf, growth_rates), wacc, 0.03)
+
+
+@benchmark('dcf/scenario_analysis/1000')
+def _scenario_analysis():
+    model = _model('AAPL')
+    growth_paths = np.random.default_rng(0).normal(0.04, 0.02, (1000, model.forecast_years))
+    return lambda: model.scenario_analysis(growth_paths)
+
+
+@benchmark('dcf/monte_carlo/sobol_tolerance')
+def _monte_carlo_sobol_tolerance():
+    # Per-share p5 to +/- $0.25; compare the paths used with random sampling
+    model = _model('AAPL')
+    return lambda: model.monte_carlo_simulation(1000000, seed=0, sampling='sobol',
+                                                tolerance=0.25, tolerance_metric='p5')
+
+
+@benchmark('batch/value_batch/1000')
+def _value_batch():
+    companies = replicate(load_fixtures(), 1000)
+    return lambda: value_batch(companies)
+
+
+@benchmark('backtest/universe/1000')
+def _backtest():
+    # The fixtures hold no price history, so each ticker gets a seeded random
+    # walk ending at its recorded price; only the timing is of interest here
+    rng = np.random.default_rng(0)
+    days = pd.bdate_range('2019-01-01', '2024-10-31')
+    companies = replicate(load_fixtures(), 1000)
+    prices = {}
+    for company in companies:
+        path = np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(days))))
+        prices[company.ticker] = pd.Series(company.info['currentPrice'] * path / path[-1], index=days)
+    return lambda: backtest(companies, prices=prices)
+
+
+@benchmark('screen/query/5000')
+def _screen_query():
+    index = ValuationIndex()
+    index.update(replicate(load_fixtures(), 5000))
+    index.query()
+    return lambda: index.query(sort_by='margin_of_safety', top_k=50, filters={'ev_fcf': {'min': 0}})
+
+
+@benchmark('json_serialize/monte_carlo_values/100000')
+def _serialize_monte_carlo():
+    api = _api()
+    results = _model('AAPL').monte_carlo_simulation(100000, seed=0, return_values=True)
+    return lambda: json.dumps(api.json_serialize(results))
+
+
+@benchmark('json_serialize/batch/1000')
+def _serialize_batch():
+    api = _api()
+    results = value_batch(replicate(load_fixtures(), 1000))
+    return lambda: json.dumps(api.json_serialize(results))
+
+
+@benchmark('utils/ratios')
+def _scalar_ratios():
+    # The scalar ratio functions take periods as rows, oldest first
+    frames = [
+        (data.income_stmt.T.iloc[::-1], data.balance_sheet.T.iloc[::-1], data.cash_flow.T.iloc[::-1])
+        for data in load_fixtures().values()
+    ]
+
+    def run():
+        for income_stmt, balance_sheet, cash_flow in frames:
+            utils.calculate_ebit_margin(income_stmt)
+            utils.calculate_capex_ratio(cash_flow, income_stmt)
+            utils.calculate_working_capital_ratio(balance_sheet, income_stmt)
+            utils.calculate_debt_ratio(balance_sheet)
+            utils.calculate_interest_coverage_ratio(income_stmt)
+    return run
+
+
+@benchmark('utils/panel_build/1000')
+def _panel_build():
+    companies = replicate(load_fixtures(), 1000)
+    return lambda: utils.FinancialPanel.from_financial_data(companies)
+
+
+@benchmark('utils/batch_ratios/1000')
+def _batch_ratios():
+    panel = utils.FinancialPanel.from_financial_data(replicate(load_fixtures(), 1000))
+
+    def run():
+        utils.batch_ebit_margin(panel)
+        utils.batch_capex_ratio(panel)
+        utils.batch_working_capital_ratio(panel)
+        utils.batch_debt_ratio(panel)
+        utils.batch_interest_coverage_ratio(panel)
+    return run
+
+
+@benchmark('api/analyze')
+def _api_analyze():
+    client = _api().app.test_client()
+    return lambda: _post(client, '/api/analyze', {'ticker': 'AAPL'})
+
+
+@benchmark('api/analyze-with-params/reused_model')
+def _api_analyze_with_params_reused_model():
+    api = _api()
+    api.model_store = api.MemoryBackend()
+    client = api.app.test_client()
+    values = iter(np.tile(np.linspace(0.02, 0.035, 16), 100000))
+    return lambda: _post(client, '/api/analyze-with-params',
+                         {'ticker': 'AAPL', 'num_simulations': 1000, 'seed': 0,
+                          'terminal_growth': float(next(values))})
+
+
+@benchmark('api/analyze/cached')
+def _api_analyze_cached():
+    api = _api()
+    from cache import MemoryBackend, ResultCache
+
+    api.result_cache = ResultCache(MemoryBackend())
+    client = api.app.test_client()
+    _post(client, '/api/analyze', {'ticker': 'AAPL'})
+    return lambda: _post(client, '/api/analyze', {'ticker': 'AAPL'})
+
+
+@benchmark('api/search-tickers')
+def _api_search_tickers():
+    client = _api().app.test_client()
+    queries = iter(['a', 'ap', 'app', 'appl', 'apple', 'mi', 'micro', 'j', 'jn', 'johnson'] * 100000)
+
+    def run():
+        response = client.get('/api/search-tickers', query_string={'query': next(queries)})
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/search-tickers returned {response.status_code}")
+        return response
+    return run
+
+
+@benchmark('search/multi_word/12000')
+def _search_multi_word():
+    # A listing the size of an exchange directory, built from a few common
+    # name words so every query word has a wide prefix range
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    from search import TickerIndex
+
+    rng = np.random.default_rng(0)
+    stems = np.array(['american', 'global', 'united', 'first', 'pacific', 'national', 'general',
+                      'digital', 'energy', 'capital', 'health', 'bio', 'tech', 'systems', 'holdings',
+                      'financial', 'partners', 'resources', 'industries', 'group', 'therapeutics',
+                      'pharma', 'networks', 'solutions', 'bank', 'trust', 'media', 'motors'])
+    suffixes = np.array(['Inc', 'Corp', 'Ltd', 'LLC', 'Co', 'Plc'])
+    index = TickerIndex(
+        {'symbol': f'S{i:05d}',
+         'name': ' '.join(rng.choice(stems, rng.integers(1, 4), replace=False)).title()
+                 + ' ' + rng.choice(suffixes),
+         'popularity': rng.random()}
+        for i in range(12000)
+    )
+    queries = iter(['inc zzzz', 'corp qqq', 'american zz', 'global x', 'global tech', 'inc corp',
+                    'bio pharma inc', 'ameri glob'] * 100000)
+    # _search bypasses the memo, so every run does the full lookup
+    return lambda: index._search(next(queries), 10)
+
+
+for _size in SIMULATION_SIZES:
+    @benchmark(f'api/analyze-with-params/{_size}')
+    def _api_analyze_with_params(size=_size):
+        client = _api().app.test_client()
+        body = {'ticker': 'AAPL', 'num_simulations': size, 'seed': 0}
+        return lambda: _post(client, '/api/analyze-with-params', body)
+
+
+for _mode, _lazy in (('eager', ''), ('lazy', '1')):
+    @benchmark(f'startup/import_app/{_mode}')
+    def _import_app(lazy=_lazy):
+        # A fresh interpreter per run, as for a newly started worker
+        env = dict(os.environ, DCF_LAZY_IMPORTS=lazy,
+                   PYTHONPATH=os.pathsep.join([REPO_ROOT, API_DIR, os.environ.get('PYTHONPATH', '')]))
+        command = [sys.executable, '-c', 'import app']
+        return lambda: subprocess.run(command, cwd=API_DIR, env=env, check=True,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
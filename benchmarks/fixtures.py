@@ -0,0 +1,137 @@
+"""
+Offline company data for benchmarks
+
+Fixtures are FinancialData records stored as JSON: the info dictionary plus
+each statement as its period columns (most recent first) and line item rows,
+the same layout yfinance returns, and optionally a daily closing price
+history. The stored file keeps benchmarks
+independent of network access and of upstream data changing between runs.
+
+To refresh the recorded data from Yahoo Finance:
+
+    python -m benchmarks.fixtures record AAPL MSFT JNJ XOM F
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, Iterable, List
+
+from dcf_model.providers import DataProvider, FinancialData, YahooFinanceProvider, from_record, to_record
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'companies.json')
+
+# Info fields kept when recording; the rest of the yfinance info dict is noise here
+INFO_FIELDS = ('shortName', 'sector', 'currency', 'currentPrice', 'beta',
+               'marketCap', 'totalDebt', 'totalCash', 'sharesOutstanding')
+
+
+def load_fixtures(path: str = FIXTURE_PATH) -> Dict[str, FinancialData]:
+    """
+    Load recorded company data
+
+    Args:
+        path: Fixture JSON file
+
+    Returns:
+        Dict[str, FinancialData]: Company data keyed by ticker
+    """
+    with open(path) as f:
+        records = json.load(f)
+
+    return {ticker: from_record(ticker, record) for ticker, record in records.items()}
+
+
+def save_fixtures(companies: Iterable[FinancialData], path: str = FIXTURE_PATH):
+    """
+    Write company data to a fixture file
+
+    Args:
+        companies: Company data to record
+        path: Fixture JSON file
+    """
+    records = {}
+    for company in companies:
+        record = to_record(company)
+        record['info'] = {key: company.info.get(key) for key in INFO_FIELDS if key in company.info}
+        records[company.ticker] = record
+
+    with open(path, 'w') as f:
+        json.dump(records, f, indent=2)
+        f.write('\n')
+
+
+def replicate(companies: Dict[str, FinancialData], count: int) -> List[FinancialData]:
+    """
+    Build a larger universe by cycling through the fixtures
+
+    Copies get distinct tickers (AAPL-0001, ...) and share their statements.
+
+    Args:
+        companies: Fixture company data
+        count: Number of companies to return
+
+    Returns:
+        List[FinancialData]: Company data for count tickers
+    """
+    base = list(companies.values())
+    copies = []
+    for i in range(count):
+        data = base[i % len(base)]
+        copies.append(FinancialData(
+            ticker=f"{data.ticker}-{i:04d}",
+            info=data.info,
+            balance_sheet=data.balance_sheet,
+            cash_flow=data.cash_flow,
+            income_stmt=data.income_stmt,
+            as_of=data.as_of,
+            prices=data.prices
+        ))
+    return copies
+
+
+class FixtureProvider(DataProvider):
+    """Serve recorded company data; unknown tickers reuse a fixture's data"""
+
+    def __init__(self, companies: Dict[str, FinancialData] = None):
+        self.companies = companies if companies is not None else load_fixtures()
+        self._tickers = sorted(self.companies)
+
+    def fetch(self, ticker: str) -> FinancialData:
+        data = self.companies.get(ticker.upper())
+        if data is None:
+            # Map unknown symbols deterministically onto a recorded company
+            data = self.companies[self._tickers[sum(map(ord, ticker)) % len(self._tickers)]]
+        return FinancialData(
+            ticker=ticker,
+            info=dict(data.info),
+            balance_sheet=data.balance_sheet,
+            cash_flow=data.cash_flow,
+            income_stmt=data.income_stmt,
+            as_of=data.as_of,
+            prices=data.prices
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage recorded benchmark fixtures')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help='Record company data from Yahoo Finance')
+    record.add_argument('tickers', nargs='+', help='Ticker symbols')
+    record.add_argument('--output', default=FIXTURE_PATH, help='Fixture file to write')
+    record.add_argument('--prices', action='store_true', help='Also record daily closing prices')
+
+    args = parser.parse_args(argv)
+
+    provider = YahooFinanceProvider()
+    companies = [provider.fetch(ticker.upper()) for ticker in args.tickers]
+    if args.prices:
+        for company in companies:
+            company.prices = provider.fetch_prices(company.ticker)
+    save_fixtures(companies, args.output)
+    print(f"Recorded {len(companies)} companies to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
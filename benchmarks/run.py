@@ -0,0 +1,204 @@
+"""
+Run the benchmark suite and compare against a stored baseline
+
+    python -m benchmarks.run                      # run and compare with baseline.json
+    python -m benchmarks.run --output out.json    # also write machine-readable results
+    python -m benchmarks.run --filter api/        # only cases whose name contains api/
+    python -m benchmarks.run --update-baseline    # record the current numbers as the baseline
+
+Latency is the median of repeated timed runs after a warm-up run; memory is
+the peak traced allocation (Python and NumPy) of one further run. The exit
+status is 1 when any case is slower or uses more memory than the baseline
+by more than the tolerance, so the suite can gate a deploy. Baselines are
+only meaningful on the machine that recorded them.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .cases import BENCHMARKS
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Regressions smaller than these are treated as noise
+MIN_LATENCY_DELTA = 0.0002
+MIN_MEMORY_DELTA = 65536
+
+
+def measure(fn, repeat=10, min_time=0.2):
+    """
+    Time a callable and record its peak memory
+
+    Args:
+        fn: Zero-argument callable
+        repeat: Minimum number of timed runs
+        min_time: Keep running until the timed runs add up to at least this many seconds
+
+    Returns:
+        dict: Latency statistics in seconds, run count and peak memory in bytes
+    """
+    fn()
+
+    timings = []
+    while len(timings) < repeat or sum(timings) < min_time:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+        if len(timings) >= 1000:
+            break
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.fmean(timings),
+        'min_s': timings[0],
+        'p95_s': timings[min(len(timings) - 1, int(0.95 * len(timings)))],
+        'runs': len(timings),
+        'peak_memory_bytes': peak
+    }
+
+
+def environment():
+    """Description of the machine and library versions the results came from"""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def run(names, repeat=10, min_time=0.2):
+    """
+    Run the named cases
+
+    Returns:
+        dict: 'environment' and 'results' keyed by case name
+    """
+    results = {}
+    for name in names:
+        fn = BENCHMARKS[name]()
+        results[name] = measure(fn, repeat=repeat, min_time=min_time)
+        print(f"{name:48s} {results[name]['median_s'] * 1000:10.3f} ms "
+              f"{results[name]['peak_memory_bytes'] / 1024:12.1f} KiB", file=sys.stderr)
+    return {'environment': environment(), 'results': results}
+
+
+def compare(current, baseline, latency_tolerance=0.25, memory_tolerance=0.10):
+    """
+    Compare results with a baseline
+
+    Args:
+        current: Results from run()
+        baseline: Results from an earlier run()
+        latency_tolerance: Allowed relative increase in median latency
+        memory_tolerance: Allowed relative increase in peak memory
+
+    Returns:
+        list: Regressions as dicts with 'name', 'metric', 'baseline', 'current' and 'ratio'
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+
+        checks = (
+            ('median_s', latency_tolerance, MIN_LATENCY_DELTA),
+            ('peak_memory_bytes', memory_tolerance, MIN_MEMORY_DELTA),
+        )
+        for metric, tolerance, min_delta in checks:
+            before, after = base[metric], result[metric]
+            if after > before * (1 + tolerance) and after - before > min_delta:
+                regressions.append({
+                    'name': name,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'ratio': after / before if before else float('inf')
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the DCF benchmark suite')
+    parser.add_argument('--filter', default='', help='Only run cases whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=10, help='Minimum timed runs per case')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum total timed seconds per case')
+    parser.add_argument('--output', help='Write results as JSON to this file ("-" for stdout)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline results file')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results to the baseline file')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                        help='Allowed relative latency increase over the baseline')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10,
+                        help='Allowed relative peak memory increase over the baseline')
+    args = parser.parse_args(argv)
+
+    # Keep request and model logging out of the report
+    logging.disable(logging.WARNING)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if not names:
+        parser.error(f"No benchmarks match {args.filter!r}")
+
+    current = run(names, repeat=args.repeat, min_time=args.min_time)
+
+    regressions = []
+    if args.update_baseline:
+        baseline = {'environment': current['environment'], 'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline['results'] = json.load(f).get('results', {})
+        baseline['results'].update(current['results'])
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Updated baseline {args.baseline}", file=sys.stderr)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.latency_tolerance, args.memory_tolerance)
+        current['baseline'] = {'path': args.baseline, 'environment': baseline.get('environment')}
+        for regression in regressions:
+            print(f"REGRESSION {regression['name']} {regression['metric']}: "
+                  f"{regression['baseline']:.6g} -> {regression['current']:.6g} "
+                  f"({regression['ratio']:.2f}x)", file=sys.stderr)
+
+    current['regressions'] = regressions
+
+    if args.output == '-':
+        json.dump(current, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    elif args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+            f.write('\n')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,39 @@ It provides tools for financial data collection, projections, valuation calculat
 and sensitivity analysis.
 """
 
-from .dcf import DCFModel
+import importlib
 
-__all__ = ['DCFModel']
+# Exports are imported on first access, so importing the package (or a light
+# submodule such as providers) does not pull in NumPy and pandas
+_EXPORTS = {
+    'DCFModel': 'dcf',
+    'DataProvider': 'providers',
+    'FinancialData': 'providers',
+    'YahooFinanceProvider': 'providers',
+    'CoalescingProvider': 'providers',
+    'SnapshotStore': 'snapshots',
+    'SnapshotProvider': 'snapshots',
+}
+
+__all__ = [
+    'DCFModel',
+    'DataProvider',
+    'FinancialData',
+    'YahooFinanceProvider',
+    'CoalescingProvider',
+    'SnapshotStore',
+    'SnapshotProvider',
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
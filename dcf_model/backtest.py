@@ -0,0 +1,354 @@
+"""
+Point-in-time DCF backtest
+
+Re-runs the valuation as of every past reporting period of every company,
+using only the statement columns for that period, and compares the implied
+per-share value with the price path that followed. Each period's valuation
+is taken to become known a reporting lag after the period end (when the
+annual report is out); the share price on that date sets the market cap and
+the margin of safety, and the prices one or more horizons later give the
+forward returns the signal is scored against.
+
+Statements for the whole universe are aligned into a (ticker x period)
+panel, so every company and period is valued in one vectorized pass, and
+prices are looked up for all of them with a single sorted search.
+
+Beta is not point-in-time: the info dictionary only holds the current beta,
+which is applied to every period. Debt, cash and share count come from each
+period's balance sheet where present and otherwise from the current info.
+
+Run against local snapshots stored with price history:
+
+    python -m dcf_model.snapshots refresh AAPL MSFT --root data/snapshots --prices
+    python -m dcf_model.backtest AAPL MSFT --root data/snapshots
+"""
+
+from typing import Dict, List, Optional, Sequence
+import argparse
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from .batch import _info_value
+from .providers import FinancialData
+from .utils import FinancialPanel
+from .valuation import (
+    default_growth_rates, discounted_cash_flow, forecast_fcf, vectorized_wacc
+)
+
+logger = logging.getLogger(__name__)
+
+# Days from a fiscal period end until its annual report is assumed public
+DEFAULT_REPORTING_LAG = 90
+
+# Forward return horizons in calendar days
+DEFAULT_HORIZONS = (91, 182, 365)
+
+# Number of margin-of-safety buckets in the summary
+DEFAULT_QUANTILES = 5
+
+# Balance sheet line items, in order of preference
+CASH_ITEMS = ('Cash And Cash Equivalents', 'Cash Cash Equivalents And Short Term Investments')
+SHARE_ITEMS = ('Ordinary Shares Number', 'Share Issued')
+
+PANEL_ITEMS = ['Operating Cash Flow', 'Capital Expenditure', 'Total Debt', *CASH_ITEMS, *SHARE_ITEMS]
+
+
+def _first_available(panel: FinancialPanel, items: Sequence[str]) -> np.ndarray:
+    """Take each cell from the first of several line items that has a value"""
+    values = panel.item(items[0]).copy()
+    for item in items[1:]:
+        values = np.where(np.isnan(values), panel.item(item), values)
+    return values
+
+
+def _info_array(companies: List[FinancialData], key: str, default: float) -> np.ndarray:
+    """One current info field for every company, with DCFModel's default when missing"""
+    return np.array([_info_value(company.info or {}, key, default) for company in companies], dtype=float)
+
+
+class PriceIndex:
+    """
+    Closing prices for many tickers in one sorted array
+
+    Prices are keyed by (ticker position, day), so the last price on or
+    before any set of (ticker, date) pairs is found with one searchsorted.
+    """
+
+    def __init__(self, price_series: List[Optional[pd.Series]]):
+        """
+        Args:
+            price_series: Closing prices indexed by date, one per ticker
+                (None for tickers without prices)
+        """
+        days, values, owners = [], [], []
+        for i, prices in enumerate(price_series):
+            if prices is None or len(prices) == 0:
+                continue
+            index = pd.DatetimeIndex(prices.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            ticker_days = index.to_numpy(dtype='datetime64[D]').astype(np.int64)
+            ticker_values = np.asarray(prices, dtype=float)
+            keep = np.isfinite(ticker_values)
+            if not np.all(ticker_days[1:] >= ticker_days[:-1]):
+                order = np.argsort(ticker_days, kind='stable')
+                ticker_days, ticker_values, keep = ticker_days[order], ticker_values[order], keep[order]
+            days.append(ticker_days[keep])
+            values.append(ticker_values[keep])
+            owners.append(np.full(int(keep.sum()), i, dtype=np.int64))
+
+        self.num_tickers = len(price_series)
+        all_days = np.concatenate(days) if days else np.empty(0, dtype=np.int64)
+        owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.int64)
+        self.values = np.concatenate(values) if values else np.empty(0)
+
+        # Days are counted from the earliest price; the stride separates tickers
+        self._offset = int(all_days.min()) if all_days.size else 0
+        self._stride = int(all_days.max()) - self._offset + 1 if all_days.size else 1
+        self._keys = owners * self._stride + (all_days - self._offset)
+
+        counts = np.bincount(owners, minlength=self.num_tickers)
+        ends = np.cumsum(counts)
+        self.last_day = np.full(self.num_tickers, np.iinfo(np.int64).min, dtype=np.int64)
+        has_prices = counts > 0
+        self.last_day[has_prices] = all_days[ends[has_prices] - 1]
+
+    def lookup(self, tickers: np.ndarray, dates: np.ndarray) -> np.ndarray:
+        """
+        Last closing price on or before each date
+
+        Args:
+            tickers: Ticker positions, broadcastable with dates
+            dates: Dates as datetime64 values
+
+        Returns:
+            np.ndarray: Prices, NaN where the ticker has no price on or
+                before the date or the date is after its last price
+        """
+        tickers, dates = np.broadcast_arrays(np.asarray(tickers, dtype=np.int64), np.asarray(dates))
+        valid_date = ~np.isnat(dates)
+        days = np.where(valid_date, dates.astype('datetime64[D]').astype(np.int64), 0)
+
+        result = np.full(tickers.shape, np.nan)
+        if not self.values.size:
+            return result
+
+        # Dates beyond a ticker's price history have no known price yet
+        in_range = valid_date & (days >= self._offset) & (days <= self.last_day[tickers])
+        keys = tickers * self._stride + np.clip(days - self._offset, 0, self._stride - 1)
+        position = np.searchsorted(self._keys, keys, side='right') - 1
+        found = in_range & (position >= 0)
+        position = np.maximum(position, 0)
+        found &= self._keys[position] // self._stride == tickers
+        result[found] = self.values[position[found]]
+        return result
+
+
+def _rank(values: np.ndarray) -> np.ndarray:
+    """Ranks of a 1-D array, averaging ties"""
+    return pd.Series(values).rank(method='average').to_numpy()
+
+
+def _horizon_summary(margin: np.ndarray, returns: np.ndarray, quantiles: int) -> dict:
+    """Score the margin of safety as a predictor of one horizon's returns"""
+    valid = np.isfinite(margin) & np.isfinite(returns)
+    margin, returns = margin[valid], returns[valid]
+    count = int(margin.size)
+    nan = float('nan')
+
+    if count < 2:
+        return {
+            'observations': count, 'information_coefficient': nan, 'hit_rate': nan,
+            'mean_return_undervalued': nan, 'mean_return_overvalued': nan,
+            'quantile_mean_returns': [], 'long_short_spread': nan
+        }
+
+    ic = float(np.corrcoef(_rank(margin), _rank(returns))[0, 1])
+    hit_rate = float(np.mean(np.sign(margin) == np.sign(returns)))
+    undervalued = margin > 0
+
+    # Buckets from the lowest to the highest margin of safety
+    buckets = min(quantiles, count)
+    edges = np.quantile(margin, np.linspace(0, 1, buckets + 1)[1:-1])
+    labels = np.searchsorted(edges, margin, side='right')
+    sums = np.bincount(labels, weights=returns, minlength=buckets)
+    counts = np.bincount(labels, minlength=buckets)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bucket_means = sums / counts
+
+    return {
+        'observations': count,
+        'information_coefficient': ic,
+        'hit_rate': hit_rate,
+        'mean_return_undervalued': float(returns[undervalued].mean()) if undervalued.any() else nan,
+        'mean_return_overvalued': float(returns[~undervalued].mean()) if (~undervalued).any() else nan,
+        'quantile_mean_returns': [float(v) for v in bucket_means],
+        'long_short_spread': float(bucket_means[-1] - bucket_means[0])
+    }
+
+
+def backtest(companies: List[FinancialData],
+             prices: Optional[Dict[str, pd.Series]] = None,
+             horizons: Sequence[int] = DEFAULT_HORIZONS,
+             reporting_lag: int = DEFAULT_REPORTING_LAG,
+             quantiles: int = DEFAULT_QUANTILES,
+             forecast_years: int = 5, terminal_growth: float = 0.03,
+             risk_free_rate: float = 0.035, market_risk_premium: float = 0.05,
+             tax_rate: float = 0.21, growth_rates: Optional[List[float]] = None) -> dict:
+    """
+    Value every company as of each past reporting period and score the
+    margin of safety against subsequent returns
+
+    Args:
+        companies: Company data with multi-period statements
+        prices: Closing prices keyed by ticker (defaults to each company's
+            own price history)
+        horizons: Forward return horizons in calendar days
+        reporting_lag: Days after a period end before its statements are used
+        quantiles: Number of margin-of-safety buckets in the summary
+        forecast_years: Number of years to forecast
+        terminal_growth: Long-term growth rate for terminal value
+        risk_free_rate: Risk-free rate
+        market_risk_premium: Market risk premium
+        tax_rate: Corporate tax rate
+        growth_rates: Growth path shared by all companies (defaults to the
+            DCFModel default path)
+
+    Returns:
+        dict: 'tickers', 'horizons', and (ticker x period) arrays
+            'period_end', 'signal_date', 'price', 'per_share_value',
+            'margin_of_safety' and 'forward_returns' (with a trailing horizon
+            axis), plus a 'summary' of the signal per horizon
+    """
+    if growth_rates is None:
+        growth_rates = default_growth_rates(forecast_years)
+    if len(growth_rates) != forecast_years:
+        raise ValueError("growth_rates must have one entry per forecast year")
+    horizons = [int(h) for h in horizons]
+    if any(h <= 0 for h in horizons):
+        raise ValueError("horizons must be positive numbers of days")
+
+    tickers = [company.ticker for company in companies]
+    panel = FinancialPanel.from_financial_data(companies, items=PANEL_ITEMS)
+
+    # Current info values fill line items a period's balance sheet lacks
+    total_debt = panel.item('Total Debt')
+    total_debt = np.where(np.isnan(total_debt), _info_array(companies, 'totalDebt', 0)[:, None], total_debt)
+    cash = _first_available(panel, CASH_ITEMS)
+    cash = np.where(np.isnan(cash), _info_array(companies, 'totalCash', 0)[:, None], cash)
+    shares = _first_available(panel, SHARE_ITEMS)
+    shares = np.where(np.isnan(shares), _info_array(companies, 'sharesOutstanding', 0)[:, None], shares)
+    beta = _info_array(companies, 'beta', 1.0)
+
+    # Free cash flow of each period (CapEx is negative)
+    base_fcf = panel.item('Operating Cash Flow') + panel.item('Capital Expenditure')
+
+    period_end = panel.period_dates.astype('datetime64[D]')
+    signal_date = period_end + np.timedelta64(reporting_lag, 'D')
+
+    if prices is None:
+        prices = {company.ticker: company.prices for company in companies}
+    price_index = PriceIndex([prices.get(ticker) for ticker in tickers])
+    positions = np.arange(len(tickers))[:, None]
+    price = price_index.lookup(positions, signal_date)
+
+    offsets = np.array(horizons, dtype='timedelta64[D]')
+    future_price = price_index.lookup(positions[..., None], signal_date[..., None] + offsets)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        forward_returns = future_price / price[..., None] - 1
+
+    market_cap = price * shares
+    wacc = vectorized_wacc(beta[:, None], risk_free_rate, market_risk_premium,
+                           market_cap, total_debt, tax_rate)
+    valuation = discounted_cash_flow(forecast_fcf(base_fcf, growth_rates), wacc, terminal_growth)
+
+    equity_value = valuation['enterprise_value'] - total_debt + cash
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_share_value = np.where(shares > 0, equity_value / shares, np.nan)
+        margin_of_safety = np.where(price > 0, per_share_value / price - 1, np.nan)
+
+    summary = {
+        f"{horizon}d": _horizon_summary(margin_of_safety.ravel(), forward_returns[..., k].ravel(), quantiles)
+        for k, horizon in enumerate(horizons)
+    }
+
+    return {
+        'tickers': tickers,
+        'horizons': horizons,
+        'reporting_lag': reporting_lag,
+        'period_end': period_end,
+        'signal_date': signal_date,
+        'price': price,
+        'wacc': wacc,
+        'per_share_value': per_share_value,
+        'margin_of_safety': margin_of_safety,
+        'forward_returns': forward_returns,
+        'summary': summary
+    }
+
+
+def to_frame(results: dict) -> pd.DataFrame:
+    """
+    Flatten backtest results to one row per ticker and period with a valuation
+
+    Args:
+        results: Output of backtest()
+
+    Returns:
+        pd.DataFrame: Observations with one forward return column per horizon
+    """
+    num_periods = results['price'].shape[1]
+    frame = pd.DataFrame({
+        'ticker': np.repeat(results['tickers'], num_periods),
+        'period_end': results['period_end'].ravel(),
+        'signal_date': results['signal_date'].ravel(),
+        'price': results['price'].ravel(),
+        'wacc': results['wacc'].ravel(),
+        'per_share_value': results['per_share_value'].ravel(),
+        'margin_of_safety': results['margin_of_safety'].ravel()
+    })
+    for k, horizon in enumerate(results['horizons']):
+        frame[f'return_{horizon}d'] = results['forward_returns'][..., k].ravel()
+    return frame[frame['period_end'].notna()].reset_index(drop=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .snapshots import SnapshotStore
+
+    parser = argparse.ArgumentParser(description="Backtest the DCF margin of safety against later returns")
+    parser.add_argument('tickers', nargs='+', help="Ticker symbols")
+    parser.add_argument('--root', default=os.environ.get('DCF_SNAPSHOT_DIR', 'snapshots'),
+                        help="Snapshot directory (snapshots need price history)")
+    parser.add_argument('--horizons', default=','.join(map(str, DEFAULT_HORIZONS)),
+                        help="Comma-separated forward return horizons in days")
+    parser.add_argument('--reporting-lag', type=int, default=DEFAULT_REPORTING_LAG,
+                        help="Days after a period end before its statements are used")
+    parser.add_argument('--output', help="Write one row per observation to this CSV file")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    store = SnapshotStore(args.root)
+    companies = []
+    for ticker in args.tickers:
+        try:
+            companies.append(store.load(ticker))
+        except FileNotFoundError as e:
+            logger.error(str(e))
+    if not companies:
+        return 1
+
+    results = backtest(companies, horizons=[int(h) for h in args.horizons.split(',')],
+                       reporting_lag=args.reporting_lag)
+    if args.output:
+        to_frame(results).to_csv(args.output, index=False)
+    print(json.dumps(results['summary'], indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
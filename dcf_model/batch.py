@@ -0,0 +1,233 @@
+"""
+Multi-ticker batch valuation
+
+Company data for many tickers is fetched concurrently on a bounded thread
+pool, then the whole batch is valued in a single vectorized pass over a
+(ticker x forecast year) array, without building a DCFModel per ticker.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+import contextvars
+import logging
+
+import numpy as np
+
+from .providers import DataProvider, FinancialData
+from .valuation import (
+    default_growth_rates, discounted_cash_flow, forecast_fcf, historical_fcf,
+    vectorized_wacc
+)
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_many(provider: DataProvider, tickers: List[str], max_workers: int = 8,
+               progress_callback: Optional[Callable[[int, int], None]] = None
+               ) -> Tuple[Dict[str, FinancialData], Dict[str, str]]:
+    """
+    Fetch data for many tickers on a bounded thread pool
+
+    Args:
+        provider: Source of company data
+        tickers: Ticker symbols
+        max_workers: Maximum number of concurrent fetches
+        progress_callback: Called as progress_callback(done, total) after each
+            fetch completes; raising from it cancels the remaining fetches
+
+    Returns:
+        Tuple[Dict[str, FinancialData], Dict[str, str]]: Fetched data and
+            error messages, both keyed by ticker
+    """
+    fetched, errors = {}, {}
+    unique_tickers = list(dict.fromkeys(tickers))
+    if not unique_tickers:
+        return fetched, errors
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_tickers))) as executor:
+        # Each fetch runs in a copy of the caller's context, so context variables
+        # such as the request being timed (for upstream metrics) carry over
+        futures = {
+            executor.submit(contextvars.copy_context().run, provider.fetch, ticker): ticker
+            for ticker in unique_tickers
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                ticker = futures[future]
+                try:
+                    fetched[ticker] = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching data for {ticker}: {str(e)}")
+                    errors[ticker] = str(e)
+                if progress_callback is not None:
+                    progress_callback(done, len(unique_tickers))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return fetched, errors
+
+
+def _info_value(info: dict, key: str, default: float) -> float:
+    """Read a numeric info field, using the default for missing or null values"""
+    value = info.get(key)
+    return default if value is None else value
+
+
+def batch_inputs(companies: List[FinancialData]) -> Dict[str, np.ndarray]:
+    """
+    Extract valuation inputs for many companies as aligned arrays
+
+    Missing info fields get the same defaults DCFModel uses.
+
+    Args:
+        companies: Fetched company data
+
+    Returns:
+        Dict[str, np.ndarray]: 'beta', 'market_cap', 'total_debt', 'cash',
+            'shares_outstanding', 'current_price' and 'base_fcf', one entry per company
+    """
+    infos = [company.info or {} for company in companies]
+    return {
+        'beta': np.array([_info_value(info, 'beta', 1.0) for info in infos], dtype=float),
+        'market_cap': np.array([_info_value(info, 'marketCap', 0) for info in infos], dtype=float),
+        'total_debt': np.array([_info_value(info, 'totalDebt', 0) for info in infos], dtype=float),
+        'cash': np.array([_info_value(info, 'totalCash', 0) for info in infos], dtype=float),
+        'shares_outstanding': np.array([_info_value(info, 'sharesOutstanding', 0) for info in infos], dtype=float),
+        'current_price': np.array([_info_value(info, 'currentPrice', 0) for info in infos], dtype=float),
+        'base_fcf': np.array([historical_fcf(company.cash_flow) for company in companies], dtype=float),
+    }
+
+
+def value_inputs(inputs: Dict[str, np.ndarray], forecast_years: int = 5,
+                 terminal_growth: float = 0.03, risk_free_rate: float = 0.035,
+                 market_risk_premium: float = 0.05, tax_rate: float = 0.21,
+                 growth_rates: Optional[List[float]] = None) -> Dict[str, np.ndarray]:
+    """
+    Value aligned company inputs in one vectorized pass
+
+    Args:
+        inputs: Arrays from batch_inputs (or a row subset of them)
+        forecast_years: Number of years to forecast
+        terminal_growth: Long-term growth rate for terminal value
+        risk_free_rate: Risk-free rate
+        market_risk_premium: Market risk premium
+        tax_rate: Corporate tax rate
+        growth_rates: Growth path shared by all companies (defaults to the
+            DCFModel default path)
+
+    Returns:
+        Dict[str, np.ndarray]: 'wacc', 'forecast_cash_flows' (companies x
+            years), 'enterprise_value', 'terminal_value', 'equity_value' and
+            'per_share_value'
+    """
+    if growth_rates is None:
+        growth_rates = default_growth_rates(forecast_years)
+    if len(growth_rates) != forecast_years:
+        raise ValueError("growth_rates must have one entry per forecast year")
+
+    total_debt, cash = inputs['total_debt'], inputs['cash']
+    shares = inputs['shares_outstanding']
+
+    wacc = vectorized_wacc(inputs['beta'], risk_free_rate, market_risk_premium,
+                           inputs['market_cap'], total_debt, tax_rate)
+    forecasted_fcf = forecast_fcf(inputs['base_fcf'], growth_rates)  # (tickers, years)
+    valuation = discounted_cash_flow(forecasted_fcf, wacc, terminal_growth)
+
+    enterprise_value = valuation['enterprise_value']
+    equity_value = enterprise_value - total_debt + cash
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_share_value = np.where(shares > 0, equity_value / shares, 0.0)
+
+    return {
+        'wacc': wacc,
+        'forecast_cash_flows': forecasted_fcf,
+        'enterprise_value': enterprise_value,
+        'terminal_value': valuation['terminal_value'],
+        'equity_value': equity_value,
+        'per_share_value': per_share_value
+    }
+
+
+def value_batch(companies: List[FinancialData], forecast_years: int = 5,
+                terminal_growth: float = 0.03, risk_free_rate: float = 0.035,
+                market_risk_premium: float = 0.05, tax_rate: float = 0.21,
+                growth_rates: Optional[List[float]] = None) -> Dict[str, dict]:
+    """
+    Value many companies in one vectorized pass
+
+    Uses the same assumptions as DCFModel.run_analysis, applied to every
+    company at once. Companies that failed to fetch are never passed in, so
+    fallback is always False; stale marks data served from the last good
+    copy after an upstream failure, as in DCFModel.
+
+    Args:
+        companies: Fetched company data
+        forecast_years: Number of years to forecast
+        terminal_growth: Long-term growth rate for terminal value
+        risk_free_rate: Risk-free rate
+        market_risk_premium: Market risk premium
+        tax_rate: Corporate tax rate
+        growth_rates: Growth path shared by all companies (defaults to the
+            DCFModel default path)
+
+    Returns:
+        Dict[str, dict]: Results keyed by ticker, with the same fields as
+            DCFModel.run_analysis
+    """
+    if not companies:
+        return {}
+
+    if growth_rates is None:
+        growth_rates = default_growth_rates(forecast_years)
+
+    inputs = batch_inputs(companies)
+    valuation = value_inputs(inputs, forecast_years, terminal_growth, risk_free_rate,
+                             market_risk_premium, tax_rate, growth_rates)
+
+    results = {}
+    for i, company in enumerate(companies):
+        results[company.ticker] = {
+            'enterprise_value': valuation['enterprise_value'][i],
+            'equity_value': valuation['equity_value'][i],
+            'terminal_value': valuation['terminal_value'][i],
+            'wacc': valuation['wacc'][i],
+            'forecast_years': forecast_years,
+            'growth_rates': list(growth_rates),
+            'forecast_cash_flows': valuation['forecast_cash_flows'][i],
+            'per_share_value': valuation['per_share_value'][i],
+            'current_price': (company.info or {}).get('currentPrice', 0),
+            'beta': inputs['beta'][i],
+            'market_cap': inputs['market_cap'][i],
+            'total_debt': inputs['total_debt'][i],
+            'cash': inputs['cash'][i],
+            'stale': company.stale,
+            'fallback': False,
+            'data_error': company.error
+        }
+
+    return results
+
+
+def analyze_batch(provider: DataProvider, tickers: List[str], max_workers: int = 8,
+                  progress_callback: Optional[Callable[[int, int], None]] = None,
+                  **params) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    """
+    Fetch and value a list of tickers
+
+    Args:
+        provider: Source of company data
+        tickers: Ticker symbols
+        max_workers: Maximum number of concurrent fetches
+        progress_callback: Fetch progress callback, as in fetch_many
+        **params: Valuation parameters passed to value_batch
+
+    Returns:
+        Tuple[Dict[str, dict], Dict[str, str]]: Results and error messages,
+            both keyed by ticker
+    """
+    fetched, errors = fetch_many(provider, tickers, max_workers=max_workers,
+                                 progress_callback=progress_callback)
+    results = value_batch(list(fetched.values()), **params)
+    return results, errors
@@ -0,0 +1,202 @@
+"""
+Chunked, out-of-core cleaning of financial data
+
+Cleaning runs in two streaming passes so the full dataset never has to fit
+in memory:
+
+1. compute_clip_bounds() reads every chunk once and accumulates per-column
+   statistics: running mean and variance ('moments'), or a quantile sketch
+   for a robust median and spread ('robust').
+2. apply_clip_bounds() fills missing values and clips each chunk to the
+   bounds; clean_in_chunks() writes cleaned chunks out as they are produced.
+
+Sources are CSV paths (read with pandas in chunks) or zero-argument
+callables returning a fresh iterator of DataFrames, since the data is read
+twice.
+"""
+
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+ChunkSource = Union[str, Callable[[], Iterable[pd.DataFrame]]]
+ChunkSink = Union[str, Callable[[pd.DataFrame], None]]
+
+# Interquartile range of a normal distribution in standard deviations, used to
+# turn the robust IQR into a standard-deviation-like spread
+NORMAL_IQR = 1.3489795
+
+
+def iter_chunks(source: ChunkSource, chunk_size: int = 100000) -> Iterator[pd.DataFrame]:
+    """
+    Iterate over a source in DataFrame chunks
+
+    Args:
+        source: CSV path or zero-argument callable returning an iterable of DataFrames
+        chunk_size: Rows per chunk when reading CSV files
+
+    Returns:
+        Iterator[pd.DataFrame]: Chunks in order
+    """
+    if isinstance(source, str):
+        return iter(pd.read_csv(source, chunksize=chunk_size))
+    return iter(source())
+
+
+def _is_clippable(series: pd.Series) -> bool:
+    """Numeric, non-boolean columns are clipped"""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+class _ColumnMoments:
+    """Running count, mean and sum of squared deviations per column"""
+
+    def __init__(self):
+        self.count = None
+        self.mean = None
+        self.m2 = None
+
+    def update(self, values: np.ndarray):
+        # values has shape (rows, columns); NaN entries are ignored
+        count = np.sum(~np.isnan(values), axis=0)
+        with np.errstate(invalid='ignore'):
+            mean = np.where(count > 0, np.nansum(values, axis=0) / np.maximum(count, 1), 0.0)
+        m2 = np.nansum(np.square(values - mean), axis=0)
+
+        if self.count is None:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return
+
+        # Chan et al. parallel combination of running means and squared deviations
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.mean = np.where(total > 0, self.mean + delta * count / total, 0.0)
+            self.m2 = self.m2 + m2 + np.where(total > 0, delta * delta * self.count * count / total, 0.0)
+        self.count = total
+
+    def std(self) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+def compute_clip_bounds(chunks: Iterable[pd.DataFrame], method: str = 'moments',
+                        n_std: float = 3.0, fill_value: Optional[float] = 0.0
+                        ) -> Dict[str, Tuple[float, float]]:
+    """
+    First pass: accumulate per-column statistics and derive clipping bounds
+
+    Args:
+        chunks: DataFrame chunks with consistent columns
+        method: 'moments' for mean +/- n_std standard deviations, or 'robust'
+            for median +/- n_std robust spreads (IQR / 1.349)
+        n_std: Width of the clipping band
+        fill_value: Value missing cells are filled with before the statistics
+            are computed (None leaves them missing and excludes them)
+
+    Returns:
+        Dict[str, Tuple[float, float]]: (lower, upper) bounds per numeric column;
+            NaN bounds mean the column is not clipped
+    """
+    if method not in ('moments', 'robust'):
+        raise ValueError("method must be 'moments' or 'robust'")
+
+    columns = None
+    moments = _ColumnMoments()
+    sketches = None
+
+    for chunk in chunks:
+        if columns is None:
+            columns = [col for col in chunk.columns if _is_clippable(chunk[col])]
+            sketches = {col: QuantileSketch() for col in columns} if method == 'robust' else None
+
+        block = chunk.reindex(columns=columns).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        if fill_value is not None:
+            block = np.where(np.isnan(block), fill_value, block)
+
+        if method == 'moments':
+            moments.update(block)
+        else:
+            for j, col in enumerate(columns):
+                sketches[col].update(block[:, j])
+
+    if not columns:
+        return {}
+
+    if method == 'moments':
+        center, spread = moments.mean, moments.std()
+    else:
+        center = np.array([sketches[col].quantile(0.5) for col in columns])
+        spread = np.array([
+            (sketches[col].quantile(0.75) - sketches[col].quantile(0.25)) / NORMAL_IQR
+            for col in columns
+        ])
+
+    return {
+        col: (float(center[j] - n_std * spread[j]), float(center[j] + n_std * spread[j]))
+        for j, col in enumerate(columns)
+    }
+
+
+def apply_clip_bounds(chunk: pd.DataFrame, bounds: Dict[str, Tuple[float, float]],
+                      fill_value: Optional[float] = 0.0) -> pd.DataFrame:
+    """
+    Second pass: fill missing values and clip one chunk
+
+    Args:
+        chunk: DataFrame chunk
+        bounds: Bounds from compute_clip_bounds
+        fill_value: Value for missing cells (None leaves them missing)
+
+    Returns:
+        pd.DataFrame: Cleaned chunk
+    """
+    chunk = chunk.fillna(fill_value) if fill_value is not None else chunk.copy()
+
+    for col, (lower, upper) in bounds.items():
+        if col in chunk.columns and _is_clippable(chunk[col]):
+            chunk[col] = chunk[col].clip(
+                lower=None if np.isnan(lower) else lower,
+                upper=None if np.isnan(upper) else upper
+            )
+    return chunk
+
+
+def clean_in_chunks(source: ChunkSource, sink: ChunkSink, chunk_size: int = 100000,
+                    method: str = 'moments', n_std: float = 3.0,
+                    fill_value: Optional[float] = 0.0) -> Dict[str, Tuple[float, float]]:
+    """
+    Clean a dataset chunk by chunk and write the result incrementally
+
+    Args:
+        source: CSV path or zero-argument callable returning an iterable of DataFrames
+        sink: CSV path to write, or a callable receiving each cleaned chunk
+        chunk_size: Rows per chunk when reading CSV files
+        method: Clipping statistics, 'moments' or 'robust'
+        n_std: Width of the clipping band
+        fill_value: Value for missing cells (None leaves them missing)
+
+    Returns:
+        Dict[str, Tuple[float, float]]: Clipping bounds that were applied
+    """
+    bounds = compute_clip_bounds(iter_chunks(source, chunk_size), method=method,
+                                 n_std=n_std, fill_value=fill_value)
+    logger.info(f"Computed clipping bounds for {len(bounds)} columns")
+
+    rows = 0
+    for i, chunk in enumerate(iter_chunks(source, chunk_size)):
+        cleaned = apply_clip_bounds(chunk, bounds, fill_value=fill_value)
+        if isinstance(sink, str):
+            cleaned.to_csv(sink, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        else:
+            sink(cleaned)
+        rows += len(cleaned)
+
+    logger.info(f"Cleaned {rows} rows")
+    return bounds
@@ -1,9 +1,96 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
+import copy
 import logging
 
+from .providers import YahooFinanceProvider
+from .reverse import solve_implied, target_enterprise_value
+from .sampling import SAMPLING_METHODS
+from .sketch import QuantileSketch
+from .valuation import (
+    dcf_gradient, default_growth_rates, discounted_cash_flow, forecast_fcf,
+    historical_fcf, simulate_equity_values, summarize_distribution, wacc_gradient
+)
+
+# Largest number of growth-path scenarios valued in one scenario_analysis call
+MAX_SCENARIOS = 1000000
+
+# Paths valued per Monte Carlo chunk; each chunk draws from its own spawned generator
+MONTE_CARLO_CHUNK_SIZE = 65536
+
+# Smaller chunks for streamed simulations, so the first update arrives quickly
+STREAM_CHUNK_SIZE = 16384
+
+# Runs with more paths than this summarize through a quantile sketch by default
+SKETCH_THRESHOLD = 5000000
+
+# Runs with a tolerance proceed in batches of this many paths, each an
+# independent replicate of the sampling design, and stop once the confidence
+# interval of the batch estimates is narrow enough (after at least MIN_BATCHES)
+TOLERANCE_CHUNK_SIZE = 1024
+MIN_BATCHES = 16
+
+# Normal quantile of the two-sided 95% confidence level used by tolerances
+CONFIDENCE_Z = 1.959963984540054
+
+
+def _t_quantile(df):
+    """Student t quantile at the CONFIDENCE_Z level (Cornish-Fisher expansion, df >= 8)"""
+    z = CONFIDENCE_Z
+    return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+
+def tolerance_percentile(metric):
+    """
+    Percentile a tolerance metric refers to
+    
+    Args:
+        metric (str): 'mean', 'median' or a percentile such as 'p5'
+        
+    Returns:
+        float: The percentile, or None for the mean
+    """
+    if metric == 'mean':
+        return None
+    if metric == 'median':
+        return 50.0
+    percentile = None
+    if isinstance(metric, str) and metric.startswith('p'):
+        try:
+            percentile = float(metric[1:])
+        except ValueError:
+            pass
+    if percentile is None or not 0 < percentile < 100:
+        raise ValueError("tolerance_metric must be 'mean', 'median' or a percentile such as 'p5'")
+    return percentile
+
+# Intermediate results memoized by DCFModel, each with the model attributes
+# and other nodes it is computed from. Assigning an attribute invalidates
+# only the nodes that depend on it.
+VALUATION_GRAPH = {
+    'historical_fcf': ('cash_flow',),
+    'growth_rates': ('forecast_years', 'custom_growth_rates'),
+    'forecast_fcf': ('historical_fcf', 'growth_rates'),
+    'wacc': ('risk_free_rate', 'beta', 'market_risk_premium', 'market_cap', 'total_debt', 'tax_rate'),
+    'discount_factors': ('wacc', 'forecast_years'),
+    'pv_fcf': ('forecast_fcf', 'discount_factors'),
+    'terminal_value': ('forecast_fcf', 'wacc', 'terminal_growth'),
+    'pv_terminal': ('terminal_value', 'discount_factors'),
+}
+
+def _node_inputs(node):
+    """Model attributes a graph node depends on, directly or through other nodes"""
+    inputs = set()
+    for dependency in VALUATION_GRAPH[node]:
+        if dependency in VALUATION_GRAPH:
+            inputs.update(_node_inputs(dependency))
+        else:
+            inputs.add(dependency)
+    return inputs
+
+NODE_INPUTS = {node: tuple(sorted(_node_inputs(node))) for node in VALUATION_GRAPH}
+MODEL_INPUTS = frozenset().union(*NODE_INPUTS.values())
+
 class DCFModel:
     """
     Discounted Cash Flow (DCF) model for company valuation.
@@ -16,7 +103,8 @@ class DCFModel:
     """
     
     def __init__(self, ticker, forecast_years=5, terminal_growth=0.03, 
-                 risk_free_rate=0.035, market_risk_premium=0.05, tax_rate=0.21):
+                 risk_free_rate=0.035, market_risk_premium=0.05, tax_rate=0.21,
+                 provider=None):
         """
         Initialize the DCF model with company ticker and parameters.
         
@@ -27,13 +115,22 @@ class DCFModel:
             risk_free_rate (float): Risk-free rate (e.g., 10-year Treasury yield)
             market_risk_premium (float): Market risk premium
             tax_rate (float): Corporate tax rate
+            provider (DataProvider): Source of company data (defaults to Yahoo Finance)
         """
+        # Memoized graph nodes and a change counter per model input
+        object.__setattr__(self, '_memo', {})
+        object.__setattr__(self, '_input_versions', {})
+        
         self.ticker = ticker
         self.forecast_years = forecast_years
         self.terminal_growth = terminal_growth
         self.risk_free_rate = risk_free_rate
         self.market_risk_premium = market_risk_premium
         self.tax_rate = tax_rate
+        self.provider = provider or YahooFinanceProvider()
+        
+        # User-supplied forecast growth path (None for the default path)
+        self.custom_growth_rates = None
         
         # Initialize data attributes
         self.company_data = None
@@ -46,21 +143,93 @@ class DCFModel:
         self.total_debt = None
         self.cash = None
         self.shares_outstanding = None
+        self.as_of = None
+        
+        # Data quality: stale when the provider served an earlier copy after an
+        # upstream failure, fallback when no data was available and placeholder
+        # values are used instead
+        self.stale = False
+        self.fallback = False
+        self.data_error = None
         
         # Fetch company data
         self._fetch_company_data()
     
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in MODEL_INPUTS:
+            self._input_versions[name] = self._input_versions.get(name, 0) + 1
+    
+    def _node(self, name):
+        """
+        Return a node of the valuation graph, recomputing it only when one of
+        its inputs has been assigned since it was last computed.
+        
+        Inputs are tracked by assignment, so statements modified in place
+        are not detected; assign a new DataFrame instead.
+        """
+        stamp = tuple(self._input_versions.get(i, 0) for i in NODE_INPUTS[name])
+        cached = self._memo.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        
+        value = getattr(self, f'_compute_{name}')()
+        self._memo[name] = (stamp, value)
+        return value
+    
+    def clone(self, **params):
+        """
+        Copy the model without fetching data again.
+        
+        The copy shares the fetched statements and starts with the memoized
+        results of this model, so changing a parameter on it recomputes only
+        the results that depend on that parameter.
+        
+        Args:
+            **params: Attributes to set on the copy (e.g. terminal_growth=0.025)
+            
+        Returns:
+            DCFModel: The copy
+        """
+        model = copy.copy(self)
+        object.__setattr__(model, '_memo', dict(self._memo))
+        object.__setattr__(model, '_input_versions', dict(self._input_versions))
+        for name, value in params.items():
+            setattr(model, name, value)
+        return model
+    
+    @classmethod
+    def from_snapshot(cls, ticker, store, as_of=None, **kwargs):
+        """
+        Create a model from a locally stored data snapshot.
+        
+        Args:
+            ticker (str): Company stock ticker symbol
+            store (SnapshotStore): Snapshot store to read from
+            as_of (str): Use the latest snapshot on or before this ISO date
+            **kwargs: Model parameters passed to the constructor
+            
+        Returns:
+            DCFModel: Model populated from the snapshot
+        """
+        from .snapshots import SnapshotProvider
+        
+        return cls(ticker, provider=SnapshotProvider(store, as_of=as_of), **kwargs)
+    
     def _fetch_company_data(self):
-        """Fetch company financial data from Yahoo Finance."""
+        """Fetch company financial data from the data provider."""
         try:
-            # Get company info
-            company = yf.Ticker(self.ticker)
-            self.company_data = company.info
+            data = self.provider.fetch(self.ticker)
             
-            # Get financial statements
-            self.balance_sheet = company.balance_sheet
-            self.cash_flow = company.cashflow
-            self.income_stmt = company.income_stmt
+            # Get company info and financial statements
+            self.company_data = data.info
+            self.balance_sheet = data.balance_sheet
+            self.cash_flow = data.cash_flow
+            self.income_stmt = data.income_stmt
+            self.as_of = data.as_of
+            self.stale = data.stale
+            self.fallback = False
+            self.data_error = data.error
             
             # Extract key metrics
             self.beta = self.company_data.get('beta', 1.0)
@@ -71,8 +240,12 @@ class DCFModel:
             
             logging.info(f"Successfully fetched data for {self.ticker}")
         except Exception as e:
-            logging.error(f"Error fetching data for {self.ticker}: {e}")
-            # Use default values if data fetching fails
+            logging.error(f"Error fetching data for {self.ticker}: {e}; using placeholder values")
+            # Use placeholder values if data fetching fails, flagged in the results
+            self.stale = False
+            self.fallback = True
+            self.data_error = str(e)
+            self.company_data = {}
             self.beta = 1.0
             self.market_cap = 1000000000  # $1B default
             self.total_debt = 200000000   # $200M default
@@ -86,6 +259,9 @@ class DCFModel:
         Returns:
             float: WACC value
         """
+        return self._node('wacc')
+    
+    def _compute_wacc(self):
         # Cost of equity using CAPM
         cost_of_equity = self.risk_free_rate + self.beta * self.market_risk_premium
         
@@ -109,47 +285,95 @@ class DCFModel:
         
         return wacc
     
-    def forecast_cash_flows(self):
+    def get_historical_fcf(self):
         """
-        Forecast future cash flows based on historical data.
+        Get the most recent historical free cash flow.
         
         Returns:
-            list: Forecasted free cash flows for each year
+            float: Operating cash flow plus (negative) capital expenditure
         """
-        # Get historical free cash flow
-        try:
-            if self.cash_flow is not None and not self.cash_flow.empty:
-                # Calculate historical free cash flow
-                operating_cash_flow = self.cash_flow.loc['Operating Cash Flow'].iloc[0]
-                capital_expenditure = self.cash_flow.loc['Capital Expenditure'].iloc[0]
-                historical_fcf = operating_cash_flow + capital_expenditure  # CapEx is negative
-            else:
-                # Use a default value if data is not available
-                historical_fcf = 100000000  # $100M default
-        except Exception as e:
-            logging.error(f"Error calculating historical FCF: {e}")
-            historical_fcf = 100000000  # $100M default
+        return self._node('historical_fcf')
+    
+    def _compute_historical_fcf(self):
+        return historical_fcf(self.cash_flow)
+    
+    def get_growth_rates(self):
+        """
+        Get the forecast growth path.
+        
+        Returns:
+            list: Growth rate for each forecast year, the custom path if one
+                has been set and otherwise the default path
+        """
+        return list(self._node('growth_rates'))
+    
+    def _compute_growth_rates(self):
+        if self.custom_growth_rates is not None:
+            if len(self.custom_growth_rates) != self.forecast_years:
+                raise ValueError(f"The custom growth path covers {len(self.custom_growth_rates)} years "
+                                 f"but forecast_years is {self.forecast_years}")
+            return self.custom_growth_rates
+        return tuple(default_growth_rates(self.forecast_years))
+    
+    def set_growth_rates(self, growth_rates):
+        """
+        Use a custom forecast growth path.
         
-        # Calculate growth rates based on historical data
-        growth_rates = []
+        The forecast horizon becomes the length of the path. Pass None to
+        return to the default path.
         
-        # First year: 5% growth
-        growth_rates.append(0.05)
+        Args:
+            growth_rates (list): Growth rate for each forecast year
+        """
+        if growth_rates is None:
+            self.custom_growth_rates = None
+            return
         
-        # Subsequent years: gradually decreasing growth
-        for i in range(1, self.forecast_years):
-            growth_rate = 0.05 - (i * 0.005)  # Decrease by 0.5% each year
-            growth_rates.append(max(growth_rate, 0.02))  # Minimum 2% growth
+        rates = np.asarray(growth_rates, dtype=float)
+        if rates.ndim != 1 or rates.size == 0:
+            raise ValueError("growth_rates must be a non-empty list of rates")
+        if not np.all(np.isfinite(rates)) or np.any(rates <= -1):
+            raise ValueError("growth_rates must be finite and greater than -1")
         
+        self.forecast_years = int(rates.size)
+        self.custom_growth_rates = tuple(float(rate) for rate in rates)
+    
+    def forecast_cash_flows(self):
+        """
+        Forecast future cash flows based on historical data.
+        
+        Returns:
+            list: Forecasted free cash flows for each year
+        """
+        return list(self._node('forecast_fcf')), self.get_growth_rates()
+    
+    def _compute_forecast_fcf(self):
         # Forecast free cash flows
         forecasted_fcf = []
-        current_fcf = historical_fcf
+        current_fcf = self._node('historical_fcf')
         
-        for growth_rate in growth_rates:
+        for growth_rate in self._node('growth_rates'):
             current_fcf = current_fcf * (1 + growth_rate)
             forecasted_fcf.append(current_fcf)
         
-        return forecasted_fcf, growth_rates
+        return tuple(forecasted_fcf)
+    
+    def _compute_discount_factors(self):
+        # (1 + WACC)^t for each forecast year
+        wacc = self._node('wacc')
+        return tuple((1 + wacc) ** (i + 1) for i in range(self.forecast_years))
+    
+    def _compute_pv_fcf(self):
+        pv_fcf = 0
+        for fcf, factor in zip(self._node('forecast_fcf'), self._node('discount_factors')):
+            pv_fcf += fcf / factor
+        return pv_fcf
+    
+    def _compute_terminal_value(self):
+        return self.calculate_terminal_value(self._node('forecast_fcf')[-1])
+    
+    def _compute_pv_terminal(self):
+        return self._node('terminal_value') / self._node('discount_factors')[-1]
     
     def calculate_terminal_value(self, last_fcf):
         """
@@ -172,25 +396,27 @@ class DCFModel:
         """
         Run the complete DCF analysis.
         
+        Intermediate results are memoized, so after a parameter change only
+        the results that depend on it are recomputed.
+        
         Returns:
-            dict: Analysis results including enterprise value, equity value, etc.
+            dict: Analysis results including enterprise value, equity value, etc.,
+                and the stale and fallback data quality flags
         """
         # Calculate WACC
         wacc = self.calculate_wacc()
         
         # Forecast cash flows
-        forecasted_fcf, growth_rates = self.forecast_cash_flows()
+        growth_rates = self.get_growth_rates()
         
         # Calculate present value of forecasted cash flows
-        pv_fcf = 0
-        for i, fcf in enumerate(forecasted_fcf):
-            pv_fcf += fcf / ((1 + wacc) ** (i + 1))
+        pv_fcf = self._node('pv_fcf')
         
         # Calculate terminal value
-        terminal_value = self.calculate_terminal_value(forecasted_fcf[-1])
+        terminal_value = self._node('terminal_value')
         
         # Discount terminal value
-        pv_terminal = terminal_value / ((1 + wacc) ** self.forecast_years)
+        pv_terminal = self._node('pv_terminal')
         
         # Calculate enterprise value
         enterprise_value = pv_fcf + pv_terminal
@@ -214,7 +440,597 @@ class DCFModel:
             'beta': self.beta,
             'market_cap': self.market_cap,
             'total_debt': self.total_debt,
-            'cash': self.cash
+            'cash': self.cash,
+            'stale': self.stale,
+            'fallback': self.fallback,
+            'data_error': self.data_error
+        }
+        
+        return results
+    
+    def valuation_sensitivities(self):
+        """
+        Calculate analytic sensitivities of the valuation.
+        
+        Partial derivatives are taken in closed form from the same discounting
+        and Gordon Growth formulas used by run_analysis, at the model's current
+        assumptions. Beta, risk-free rate and market risk premium act through
+        WACC. Derivatives are per unit change of the input (multiply by 0.0001
+        for the effect of one basis point).
+        
+        Returns:
+            dict: 'enterprise_value' and 'per_share_value', each mapping
+                'wacc', 'terminal_growth', 'beta', 'risk_free_rate',
+                'market_risk_premium', 'historical_fcf' and 'growth_rates'
+                (one entry per forecast year) to derivatives
+        """
+        wacc = self.calculate_wacc()
+        gradient = dcf_gradient(self.get_historical_fcf(), self.get_growth_rates(),
+                                wacc, self.terminal_growth)
+        wacc_inputs = wacc_gradient(self.beta, self.market_risk_premium,
+                                    self.market_cap, self.total_debt)
+        
+        # Capital structure fallback WACC does not depend on CAPM inputs
+        if self.market_cap + self.total_debt == 0:
+            wacc_inputs = {name: 0.0 for name in wacc_inputs}
+        
+        enterprise = {
+            'wacc': gradient['wacc'],
+            'terminal_growth': gradient['terminal_growth'],
+            'historical_fcf': gradient['base_fcf'],
+            'growth_rates': gradient['growth_rates']
+        }
+        for name, dwacc in wacc_inputs.items():
+            enterprise[name] = gradient['wacc'] * dwacc
+        
+        # Debt and cash do not depend on the inputs, so equity value moves
+        # one-for-one with enterprise value
+        shares = self.shares_outstanding
+        per_share = {
+            name: value / shares if shares > 0 else value * 0
+            for name, value in enterprise.items()
+        }
+        
+        return {
+            'enterprise_value': enterprise,
+            'per_share_value': per_share,
+            'wacc': wacc,
+            'base_enterprise_value': gradient['enterprise_value']
+        }
+    
+    def reverse_dcf(self, solve_for='terminal_growth', target_price=None):
+        """
+        Solve for the assumption implied by a share price.
+        
+        Finds the terminal growth rate, flat forecast growth rate or WACC at
+        which run_analysis would report a per-share value equal to the
+        price, holding every other assumption fixed.
+        
+        Args:
+            solve_for (str): 'terminal_growth', 'growth' or 'wacc'
+            target_price (float): Price to match (defaults to the current price)
+            
+        Returns:
+            dict: Implied value (None if no value within the search range
+                matches the price), the model's assumed value and solver details
+        """
+        if self.company_data is None:
+            self._fetch_company_data()
+        
+        if target_price is None:
+            target_price = self.company_data.get('currentPrice', 0)
+        
+        wacc = self.calculate_wacc()
+        growth_rates = self.get_growth_rates()
+        target = target_enterprise_value(target_price, self.shares_outstanding,
+                                         self.total_debt, self.cash)
+        solution = solve_implied(target, self.get_historical_fcf(), growth_rates,
+                                 wacc, self.terminal_growth, solve_for=solve_for)
+        
+        assumed = {
+            'terminal_growth': self.terminal_growth,
+            'growth': float(np.mean(growth_rates)),
+            'wacc': wacc
+        }[solve_for]
+        converged = bool(solution['converged'])
+        
+        return {
+            'solve_for': solve_for,
+            'implied_value': float(solution['value']) if converged else None,
+            'assumed_value': assumed,
+            'converged': converged,
+            'iterations': int(solution['iterations']),
+            'target_price': target_price,
+            'target_enterprise_value': float(target),
+            'wacc': wacc
+        }
+    
+    def simulation_inputs(self):
+        """
+        Collect the model inputs a Monte Carlo path depends on.
+        
+        Returns:
+            dict: Plain values that can be sent to worker processes
+        """
+        return {
+            'beta': self.beta,
+            'terminal_growth': self.terminal_growth,
+            'risk_free_rate': self.risk_free_rate,
+            'market_risk_premium': self.market_risk_premium,
+            'growth_rates': self.get_growth_rates(),
+            'historical_fcf': self.get_historical_fcf(),
+            'market_cap': self.market_cap,
+            'total_debt': self.total_debt,
+            'cash': self.cash,
+            'tax_rate': self.tax_rate
+        }
+    
+    def _simulate_paths(self, rng, size, sampling='random', **stds):
+        """
+        Draw and value a block of Monte Carlo paths in one batched pass.
+        
+        Args:
+            rng (np.random.Generator): Random generator for this block
+            size (int): Number of paths
+            sampling (str): Sampling design for the block
+            **stds: Input standard deviations, as in monte_carlo_simulation
+            
+        Returns:
+            np.ndarray: Simulated equity values (NaN where WACC <= terminal growth)
+        """
+        return simulate_equity_values(self.simulation_inputs(), rng, size, sampling=sampling, **stds)
+    
+    def iter_monte_carlo(self, num_simulations, seed=None,
+                         chunk_size=MONTE_CARLO_CHUNK_SIZE, sampling='random', **stds):
+        """
+        Yield simulated equity values chunk by chunk.
+        
+        Chunk i draws from the i-th generator spawned from SeedSequence(seed),
+        so the simulated values depend only on the seed and chunk size, not on
+        how the chunks are consumed.
+        
+        Args:
+            num_simulations (int): Total number of simulated paths
+            seed (int): Seed for the random generators
+            chunk_size (int): Paths per chunk
+            sampling (str): Sampling design, one of SAMPLING_METHODS; each
+                chunk is an independent replicate of it
+            **stds: Input standard deviations, as in monte_carlo_simulation
+            
+        Yields:
+            np.ndarray: Simulated equity values for one chunk
+        """
+        num_simulations = int(num_simulations)
+        chunk_size = int(chunk_size)
+        if num_simulations <= 0:
+            raise ValueError("num_simulations must be positive")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"sampling must be one of: {', '.join(SAMPLING_METHODS)}")
+        
+        num_chunks = -(-num_simulations // chunk_size)
+        children = np.random.SeedSequence(seed).spawn(num_chunks)
+        
+        for i, child in enumerate(children):
+            size = min(chunk_size, num_simulations - i * chunk_size)
+            yield self._simulate_paths(np.random.default_rng(child), size, sampling, **stds)
+    
+    def summarize_simulation(self, equity_values):
+        """
+        Summarize simulated equity values.
+        
+        Args:
+            equity_values (np.ndarray): Simulated equity values
+            
+        Returns:
+            dict: Equity value summary with a per-share summary and path counts
+        """
+        results = summarize_distribution(equity_values)
+        if self.shares_outstanding > 0:
+            results['per_share'] = summarize_distribution(equity_values / self.shares_outstanding)
+        results['num_simulations'] = int(equity_values.size)
+        results['num_valid'] = int(np.isfinite(equity_values).sum())
+        results['summary_method'] = 'exact'
+        return results
+    
+    def summarize_sketch(self, sketch):
+        """
+        Summarize simulated equity values held in a quantile sketch.
+        
+        Args:
+            sketch (QuantileSketch): Sketch of simulated equity values
+            
+        Returns:
+            dict: Equity value summary with a per-share summary and path counts
+        """
+        results = sketch.summary()
+        if self.shares_outstanding > 0:
+            results['per_share'] = sketch.summary(scale=1 / self.shares_outstanding)
+        results['num_simulations'] = sketch.count + sketch.num_invalid
+        results['num_valid'] = sketch.count
+        results['summary_method'] = 'sketch'
+        results['relative_accuracy'] = sketch.relative_accuracy
+        return results
+    
+    @staticmethod
+    def _use_sketch(num_simulations, summary):
+        """Decide whether a run keeps every value or only a quantile sketch."""
+        if summary not in ('auto', 'exact', 'sketch'):
+            raise ValueError("summary must be 'auto', 'exact' or 'sketch'")
+        if summary == 'auto':
+            return num_simulations > SKETCH_THRESHOLD
+        return summary == 'sketch'
+    
+    def monte_carlo_simulation(self, num_simulations=1000, seed=None,
+                               beta_std=0.2, terminal_growth_std=0.005,
+                               risk_free_rate_std=0.005, market_risk_premium_std=0.01,
+                               growth_std=0.02, return_values=False,
+                               chunk_size=None, progress_callback=None,
+                               summary='auto', workers=None, sampling='random',
+                               tolerance=None, tolerance_metric='mean'):
+        """
+        Run a Monte Carlo simulation of the DCF valuation.
+        
+        Beta, terminal growth, risk-free rate, market risk premium and each
+        forecast year's growth rate are drawn from normal distributions centred
+        on the model's current assumptions. Paths are valued in batched NumPy
+        chunks. Paths where WACC does not exceed terminal growth have no finite
+        value and are dropped from the summaries.
+        
+        Above SKETCH_THRESHOLD paths (or with summary='sketch') values are not
+        kept: each chunk updates a mergeable quantile sketch, so memory stays
+        constant and percentiles carry a small bounded relative error.
+        
+        With workers above 1 the chunks are shared out across a process pool
+        (see parallel.py). Every chunk keeps its own spawned generator, so the
+        results for a seed are the same for any number of workers.
+        
+        Sampling designs other than plain random draws (antithetic pairs,
+        Latin hypercube, randomized Sobol; see sampling.py) reach a given
+        precision with far fewer paths. With a tolerance, num_simulations is
+        only an upper bound: paths are valued in batches, each an independent
+        replicate of the design, and the run stops once the 95% confidence
+        half-width of the per-share metric, estimated from the spread of the
+        batch estimates (a Student t interval), is within the tolerance. Such runs stay in this
+        process.
+        
+        Args:
+            num_simulations (int): Number of simulated paths
+            seed (int): Seed for the random generators, for reproducible runs
+            beta_std (float): Standard deviation of beta
+            terminal_growth_std (float): Standard deviation of terminal growth
+            risk_free_rate_std (float): Standard deviation of the risk-free rate
+            market_risk_premium_std (float): Standard deviation of the market risk premium
+            growth_std (float): Standard deviation of each year's growth rate
+            return_values (bool): Include the simulated equity values
+            chunk_size (int): Paths valued per chunk (defaults to
+                MONTE_CARLO_CHUNK_SIZE, or TOLERANCE_CHUNK_SIZE with a tolerance)
+            progress_callback (callable): Called as progress_callback(done, total)
+                after each chunk; raising from it aborts the run
+            summary (str): 'exact', 'sketch' or 'auto' (sketch above SKETCH_THRESHOLD)
+            workers (int): Worker processes to run the chunks on (None or 1
+                runs them in this process)
+            sampling (str): 'random', 'antithetic', 'lhs' or 'sobol'
+            tolerance (float): Stop once the per-share metric is known to
+                within this amount (e.g. 0.10 for +/- $0.10)
+            tolerance_metric (str): Per-share metric the tolerance applies to:
+                'mean', 'median' or a percentile such as 'p5'
+            
+        Returns:
+            dict: Equity value summary (mean, median, std, ci_lower, ci_upper,
+                percentiles), per-share summary and path counts, plus the
+                convergence of the run when a tolerance is given
+        """
+        stds = {
+            'beta_std': beta_std,
+            'terminal_growth_std': terminal_growth_std,
+            'risk_free_rate_std': risk_free_rate_std,
+            'market_risk_premium_std': market_risk_premium_std,
+            'growth_std': growth_std
         }
         
+        num_simulations = int(num_simulations)
+        use_sketch = self._use_sketch(num_simulations, summary)
+        if use_sketch and return_values:
+            raise ValueError("return_values is not available with sketch summaries")
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"sampling must be one of: {', '.join(SAMPLING_METHODS)}")
+        if chunk_size is None:
+            chunk_size = MONTE_CARLO_CHUNK_SIZE if tolerance is None else TOLERANCE_CHUNK_SIZE
+        
+        if tolerance is not None:
+            results, equity_values = self._monte_carlo_to_tolerance(
+                num_simulations, seed, chunk_size, stds, sampling, tolerance, tolerance_metric,
+                use_sketch, progress_callback
+            )
+        elif workers is not None and workers > 1:
+            from .parallel import run_monte_carlo
+            
+            simulated = run_monte_carlo(self.simulation_inputs(), num_simulations, seed, chunk_size,
+                                        stds, workers=workers, sketch=use_sketch, sampling=sampling,
+                                        progress_callback=progress_callback)
+            sketch = equity_values = simulated
+        else:
+            if use_sketch:
+                sketch = QuantileSketch()
+            else:
+                equity_values = np.empty(max(num_simulations, 0))
+            
+            done = 0
+            for chunk in self.iter_monte_carlo(num_simulations, seed, chunk_size, sampling, **stds):
+                if use_sketch:
+                    sketch.update(chunk)
+                else:
+                    equity_values[done:done + chunk.size] = chunk
+                done += chunk.size
+                if progress_callback is not None:
+                    progress_callback(done, num_simulations)
+        
+        if tolerance is None:
+            if use_sketch:
+                results = self.summarize_sketch(sketch)
+            else:
+                results = self.summarize_simulation(equity_values)
+        results['seed'] = seed
+        results['sampling'] = sampling
+        
+        if return_values:
+            results['values'] = equity_values
+        
         return results
+    
+    def _monte_carlo_to_tolerance(self, num_simulations, seed, chunk_size, stds, sampling,
+                                  tolerance, metric, use_sketch, progress_callback):
+        """
+        Simulate batch by batch until the per-share metric is within tolerance.
+        
+        Returns:
+            tuple: (summary with a 'convergence' entry, simulated equity values
+                or None for sketch summaries)
+        """
+        if not tolerance > 0:
+            raise ValueError("tolerance must be positive")
+        if self.shares_outstanding <= 0:
+            raise ValueError("A tolerance needs shares outstanding to value per share")
+        percentile = tolerance_percentile(metric)
+        
+        sketch = QuantileSketch() if use_sketch else None
+        chunks = []
+        estimates = []
+        half_width = standard_error = float('inf')
+        done = 0
+        for chunk in self.iter_monte_carlo(num_simulations, seed, chunk_size, sampling, **stds):
+            if use_sketch:
+                sketch.update(chunk)
+            else:
+                chunks.append(chunk)
+            done += chunk.size
+            
+            per_share = chunk[np.isfinite(chunk)] / self.shares_outstanding
+            if per_share.size:
+                estimates.append(per_share.mean() if percentile is None
+                                 else np.percentile(per_share, percentile))
+            if len(estimates) >= MIN_BATCHES:
+                standard_error = float(np.std(estimates, ddof=1) / np.sqrt(len(estimates)))
+                half_width = _t_quantile(len(estimates) - 1) * standard_error
+            
+            if progress_callback is not None:
+                progress_callback(done, num_simulations)
+            if half_width <= tolerance:
+                break
+        
+        if use_sketch:
+            equity_values = None
+            results = self.summarize_sketch(sketch)
+        else:
+            equity_values = np.concatenate(chunks)
+            results = self.summarize_simulation(equity_values)
+        results['convergence'] = {
+            'metric': metric,
+            'tolerance': tolerance,
+            'half_width': half_width if np.isfinite(half_width) else None,
+            'standard_error': standard_error if np.isfinite(standard_error) else None,
+            'batches': len(estimates),
+            'converged': bool(half_width <= tolerance)
+        }
+        return results, equity_values
+    
+    def stream_monte_carlo(self, num_simulations=1000, seed=None,
+                           chunk_size=STREAM_CHUNK_SIZE, bins=50, summary='auto',
+                           sampling='random', **stds):
+        """
+        Run a Monte Carlo simulation, yielding running summaries per chunk.
+        
+        Running summaries come from a quantile sketch updated per chunk. The
+        final summary is exact unless the run uses sketch summaries (see
+        monte_carlo_simulation). The histogram bin edges are fixed from the
+        first chunk's 0.5-99.5 percentile range; later values outside it are
+        counted as underflow or overflow.
+        
+        Args:
+            num_simulations (int): Total number of simulated paths
+            seed (int): Seed for the random generators
+            chunk_size (int): Paths valued between updates
+            bins (int): Number of histogram bins
+            summary (str): 'exact', 'sketch' or 'auto', as in monte_carlo_simulation
+            sampling (str): Sampling design, as in monte_carlo_simulation
+            **stds: Input standard deviations, as in monte_carlo_simulation
+            
+        Yields:
+            dict: Running equity value summary with progress and histogram;
+                the last update has 'final' set and the full summary
+        """
+        num_simulations = int(num_simulations)
+        use_sketch = self._use_sketch(num_simulations, summary)
+        if not use_sketch:
+            equity_values = np.empty(max(num_simulations, 0))
+        sketch = QuantileSketch()
+        edges = None
+        counts = np.zeros(bins, dtype=np.int64)
+        underflow = overflow = 0
+        done = 0
+        
+        for chunk in self.iter_monte_carlo(num_simulations, seed, chunk_size, sampling, **stds):
+            if not use_sketch:
+                equity_values[done:done + chunk.size] = chunk
+            sketch.update(chunk)
+            done += chunk.size
+            
+            finite = chunk[np.isfinite(chunk)]
+            if edges is None and finite.size:
+                lo, hi = np.percentile(finite, [0.5, 99.5])
+                if hi <= lo:
+                    hi = lo + max(abs(lo), 1.0) * 1e-6
+                edges = np.linspace(lo, hi, bins + 1)
+            if edges is not None:
+                counts += np.histogram(finite, bins=edges)[0]
+                underflow += int((finite < edges[0]).sum())
+                overflow += int((finite > edges[-1]).sum())
+            
+            final = done == num_simulations
+            if final and not use_sketch:
+                update = self.summarize_simulation(equity_values)
+            else:
+                update = self.summarize_sketch(sketch)
+            if final:
+                update['seed'] = seed
+            
+            update['done'] = done
+            update['total'] = num_simulations
+            update['final'] = final
+            update['histogram'] = {
+                'edges': edges if edges is not None else np.empty(0),
+                'counts': counts.copy(),
+                'underflow': underflow,
+                'overflow': overflow
+            }
+            yield update
+    
+    def scenario_analysis(self, growth_paths, terminal_growth=None, wacc=None, names=None):
+        """
+        Value the company under many forecast growth paths at once.
+        
+        Every scenario is one row of the growth path matrix, optionally with
+        its own terminal growth rate and WACC. Forecast cash flows for all
+        scenarios come from one cumulative product over the matrix and are
+        discounted with one discount-factor matrix, so thousands of
+        scenarios cost little more than one. Scenarios where WACC does not
+        exceed terminal growth are NaN and left out of the summary.
+        
+        Args:
+            growth_paths (list): Growth rates, one row of forecast years per
+                scenario (a single path is treated as one scenario)
+            terminal_growth (float or list): Terminal growth rate, shared or
+                one per scenario (defaults to the model's)
+            wacc (float or list): Discount rate, shared or one per scenario
+                (defaults to the model's WACC)
+            names (list): Optional scenario names
+            
+        Returns:
+            dict: Per-scenario assumptions and enterprise, equity and
+                per-share values, with summary statistics of the per-share
+                and enterprise values
+        """
+        paths = np.atleast_2d(np.asarray(growth_paths, dtype=float))
+        if paths.ndim != 2 or paths.shape[1] == 0:
+            raise ValueError("growth_paths must be a matrix of scenarios x forecast years")
+        if paths.shape[0] > MAX_SCENARIOS:
+            raise ValueError(f"At most {MAX_SCENARIOS} scenarios are allowed")
+        if not np.all(np.isfinite(paths)) or np.any(paths <= -1):
+            raise ValueError("growth_paths must be finite and greater than -1")
+        
+        num_scenarios = paths.shape[0]
+        if names is not None and len(names) != num_scenarios:
+            raise ValueError("names must have one entry per scenario")
+        
+        def per_scenario(values, default, label):
+            values = np.asarray(default if values is None else values, dtype=float)
+            if values.ndim > 1 or (values.ndim == 1 and values.size != num_scenarios):
+                raise ValueError(f"{label} must be a number or have one entry per scenario")
+            return np.broadcast_to(values, (num_scenarios,))
+        
+        terminal_growth = per_scenario(terminal_growth, self.terminal_growth, 'terminal_growth')
+        wacc = per_scenario(wacc, self.calculate_wacc(), 'wacc')
+        
+        forecasted_fcf = forecast_fcf(self.get_historical_fcf(), paths)
+        valuation = discounted_cash_flow(forecasted_fcf, wacc, terminal_growth)
+        
+        enterprise_value = valuation['enterprise_value']
+        equity_value = enterprise_value - self.total_debt + self.cash
+        if self.shares_outstanding > 0:
+            per_share_value = equity_value / self.shares_outstanding
+        else:
+            per_share_value = np.zeros_like(equity_value)
+        
+        current_price = self.company_data.get('currentPrice', 0) if self.company_data else 0
+        finite = np.isfinite(per_share_value)
+        
+        summary = summarize_distribution(per_share_value)
+        summary['num_valid'] = int(finite.sum())
+        summary['min'] = float(per_share_value[finite].min()) if finite.any() else float('nan')
+        summary['max'] = float(per_share_value[finite].max()) if finite.any() else float('nan')
+        summary['prob_above_current_price'] = (
+            float(np.mean(per_share_value[finite] > current_price)) if finite.any() else float('nan')
+        )
+        
+        return {
+            'num_scenarios': num_scenarios,
+            'names': list(names) if names is not None else None,
+            'growth_paths': paths,
+            'terminal_growth': terminal_growth,
+            'wacc': wacc,
+            'enterprise_value': enterprise_value,
+            'terminal_value': valuation['terminal_value'],
+            'equity_value': equity_value,
+            'per_share_value': per_share_value,
+            'current_price': current_price,
+            'summary': summary,
+            'enterprise_value_summary': summarize_distribution(enterprise_value)
+        }
+    
+    def sensitivity_grid(self, wacc_values=None, growth_values=None):
+        """
+        Value the company over a WACC x terminal growth grid.
+        
+        The forecast is computed once and the discount factors and Gordon
+        Growth terminal value are broadcast over the whole grid. Cells where
+        WACC does not exceed terminal growth are NaN.
+        
+        Args:
+            wacc_values (list): Discount rates for the rows (defaults to the
+                model's WACC +/- 2% in 0.5% steps)
+            growth_values (list): Terminal growth rates for the columns
+                (defaults to 1% to 5% in 0.5% steps)
+            
+        Returns:
+            dict: Grid axes and enterprise, equity and per-share value matrices
+                of shape (len(wacc_values), len(growth_values))
+        """
+        if wacc_values is None:
+            wacc_values = self.calculate_wacc() + np.arange(-0.02, 0.0201, 0.005)
+        if growth_values is None:
+            growth_values = np.arange(0.01, 0.0501, 0.005)
+        
+        wacc_values = np.asarray(wacc_values, dtype=float)
+        growth_values = np.asarray(growth_values, dtype=float)
+        if wacc_values.ndim != 1 or growth_values.ndim != 1:
+            raise ValueError("wacc_values and growth_values must be one-dimensional")
+        
+        forecasted_fcf = forecast_fcf(self.get_historical_fcf(), self.get_growth_rates())
+        valuation = discounted_cash_flow(forecasted_fcf, wacc_values[:, None], growth_values[None, :])
+        
+        enterprise_value = valuation['enterprise_value']
+        equity_value = enterprise_value - self.total_debt + self.cash
+        if self.shares_outstanding > 0:
+            per_share_value = equity_value / self.shares_outstanding
+        else:
+            per_share_value = np.zeros_like(equity_value)
+        
+        return {
+            'wacc_values': wacc_values,
+            'growth_values': growth_values,
+            'enterprise_value': enterprise_value,
+            'equity_value': equity_value,
+            'per_share_value': per_share_value
+        }
@@ -0,0 +1,172 @@
+"""
+Multi-process Monte Carlo
+
+run_monte_carlo shards the chunks of a Monte Carlo run across a pool of
+worker processes. Chunk i always draws from the i-th generator spawned from
+SeedSequence(seed), as in DCFModel.iter_monte_carlo, so a run produces the
+same values whatever the number of workers, and the same values as a
+single-process run with the same seed and chunk size.
+
+Workers write simulated values straight into a shared-memory array created
+by the parent, so only the shard description is pickled, never the values.
+Runs summarized by a quantile sketch keep no values: each worker returns one
+sketch per chunk, and the parent merges them in chunk order, which gives
+exactly the sketch a single process would have built.
+
+The pool uses the forkserver start method where available, so workers are
+never forked from a multi-threaded server process, and is reused between
+runs.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, List, Optional
+import threading
+
+import numpy as np
+
+from .sketch import QuantileSketch
+from .valuation import simulate_equity_values
+
+# Shards per worker; more, smaller shards balance load when some finish early
+SHARDS_PER_WORKER = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    The shared worker pool, started on first use
+
+    Args:
+        workers: Number of worker processes; the pool is restarted if the
+            number changes
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            method = 'forkserver' if 'forkserver' in get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context(method))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the worker pool, if one was started"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool, _pool_workers = None, 0
+
+
+def _run_shard(inputs: dict, stds: dict, sampling: str, children: list, sizes: List[int],
+               offset: int, total: int, shm_name: Optional[str]):
+    """
+    Simulate consecutive chunks in a worker process
+
+    With shm_name, values are written into the shared array at offset and
+    the number of paths is returned; otherwise one sketch per chunk is.
+    """
+    if shm_name is None:
+        sketches = []
+        for child, size in zip(children, sizes):
+            sketch = QuantileSketch()
+            sketch.update(simulate_equity_values(inputs, np.random.default_rng(child), size,
+                                                 sampling=sampling, **stds))
+            sketches.append(sketch)
+        return sketches
+
+    shm = SharedMemory(name=shm_name)
+    try:
+        values = np.ndarray((total,), dtype=np.float64, buffer=shm.buf)
+        position = offset
+        for child, size in zip(children, sizes):
+            values[position:position + size] = simulate_equity_values(
+                inputs, np.random.default_rng(child), size, sampling=sampling, **stds
+            )
+            position += size
+        del values
+    finally:
+        shm.close()
+    return position - offset
+
+
+def run_monte_carlo(inputs: Dict, num_simulations: int, seed=None, chunk_size: int = 65536,
+                    stds: Optional[Dict] = None, workers: int = 2, sketch: bool = False,
+                    sampling: str = 'random', progress_callback: Optional[Callable[[int, int], None]] = None):
+    """
+    Simulate equity values across worker processes
+
+    Args:
+        inputs: Model inputs (see DCFModel.simulation_inputs)
+        num_simulations: Total number of paths
+        seed: Seed for the random generators
+        chunk_size: Paths per chunk; results depend on it, not on workers
+        stds: Input standard deviations, as in DCFModel.monte_carlo_simulation
+        workers: Number of worker processes
+        sketch: Return a QuantileSketch instead of every value
+        sampling: Sampling design of each chunk (see sampling.py)
+        progress_callback: Called as progress_callback(done, total) as shards
+            finish; raising from it cancels the remaining shards
+
+    Returns:
+        np.ndarray or QuantileSketch: Simulated equity values in path order,
+            or their sketch
+    """
+    num_simulations = int(num_simulations)
+    chunk_size = int(chunk_size)
+    if num_simulations <= 0:
+        raise ValueError("num_simulations must be positive")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    num_chunks = -(-num_simulations // chunk_size)
+    children = np.random.SeedSequence(seed).spawn(num_chunks)
+    sizes = [min(chunk_size, num_simulations - i * chunk_size) for i in range(num_chunks)]
+    bounds = np.linspace(0, num_chunks, min(num_chunks, workers * SHARDS_PER_WORKER) + 1).astype(int)
+
+    shm = None if sketch else SharedMemory(create=True, size=num_simulations * 8)
+    pool = get_pool(workers)
+    try:
+        futures = {}
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            future = pool.submit(_run_shard, inputs, stds or {}, sampling, children[start:stop],
+                                 sizes[start:stop], start * chunk_size, num_simulations,
+                                 shm.name if shm else None)
+            futures[future] = start
+
+        done = 0
+        pending = set(futures)
+        try:
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    done += sum(s.count + s.num_invalid for s in result) if sketch else result
+                if progress_callback is not None:
+                    progress_callback(done, num_simulations)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            raise
+
+        if sketch:
+            merged = QuantileSketch()
+            for future in sorted(futures, key=futures.get):
+                for chunk_sketch in future.result():
+                    merged.merge(chunk_sketch)
+            return merged
+        return np.ndarray((num_simulations,), dtype=np.float64, buffer=shm.buf).copy()
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
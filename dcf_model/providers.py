@@ -0,0 +1,390 @@
+"""
+Financial data providers
+
+This module defines the interface DCFModel uses to obtain company data and
+the default implementation backed by Yahoo Finance. Alternative sources
+(local snapshots, fixtures, an HTTP service) implement the same fetch()
+method.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Optional
+import logging
+import threading
+
+if TYPE_CHECKING:
+    # Only needed for annotations; keeps importing the providers cheap
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Statement fields of FinancialData, in record order
+STATEMENTS = ('balance_sheet', 'income_stmt', 'cash_flow')
+
+
+@dataclass
+class FinancialData:
+    """Company info and financial statements for a single ticker"""
+    ticker: str
+    info: Dict[str, Any] = field(default_factory=dict)
+    balance_sheet: Optional['pd.DataFrame'] = None
+    cash_flow: Optional['pd.DataFrame'] = None
+    income_stmt: Optional['pd.DataFrame'] = None
+    as_of: Optional[str] = None
+    # Daily closing prices indexed by date, when the source provides them
+    prices: Optional['pd.Series'] = None
+    # Set when the upstream fetch failed and an earlier copy was served instead
+    stale: bool = False
+    error: Optional[str] = None
+
+
+def _frame_to_json(df):
+    import pandas as pd
+
+    if df is None or df.empty:
+        return None
+    columns = [pd.Timestamp(col).strftime('%Y-%m-%d') for col in df.columns]
+    rows = {
+        str(item): [None if pd.isna(v) else float(v) for v in values]
+        for item, values in zip(df.index, df.to_numpy())
+    }
+    return {'columns': columns, 'rows': rows}
+
+
+def _frame_from_json(record):
+    import numpy as np
+    import pandas as pd
+
+    if record is None:
+        return pd.DataFrame()
+    rows = record['rows']
+    values = np.array([[np.nan if v is None else v for v in rows[item]] for item in rows], dtype=float)
+    return pd.DataFrame(values, index=list(rows), columns=pd.to_datetime(record['columns']))
+
+
+def _prices_to_json(prices):
+    import pandas as pd
+
+    if prices is None or prices.empty:
+        return None
+    return {
+        'dates': [pd.Timestamp(d).strftime('%Y-%m-%d') for d in prices.index],
+        'close': [None if pd.isna(v) else float(v) for v in prices.to_numpy()]
+    }
+
+
+def _prices_from_json(record):
+    import numpy as np
+    import pandas as pd
+
+    if record is None:
+        return None
+    close = np.array([np.nan if v is None else v for v in record['close']], dtype=float)
+    return pd.Series(close, index=pd.to_datetime(record['dates']), name='Close')
+
+
+def to_record(data: FinancialData) -> Dict[str, Any]:
+    """
+    Encode company data as a JSON-compatible record
+
+    Statements are stored as their period columns (most recent first) and
+    line item rows, the same layout yfinance returns.
+
+    Args:
+        data: Company data
+
+    Returns:
+        Dict[str, Any]: Record with 'as_of', 'info', each statement and
+            'prices' when present
+    """
+    record = {'as_of': data.as_of, 'info': dict(data.info)}
+    for name in STATEMENTS:
+        record[name] = _frame_to_json(getattr(data, name))
+    if data.prices is not None:
+        record['prices'] = _prices_to_json(data.prices)
+    return record
+
+
+def from_record(ticker: str, record: Dict[str, Any]) -> FinancialData:
+    """
+    Decode a record written by to_record()
+
+    Args:
+        ticker: Company stock ticker symbol
+        record: Encoded company data
+
+    Returns:
+        FinancialData: Company info and statements
+    """
+    return FinancialData(
+        ticker=ticker,
+        info=dict(record.get('info') or {}),
+        as_of=record.get('as_of'),
+        prices=_prices_from_json(record.get('prices')),
+        **{name: _frame_from_json(record.get(name)) for name in STATEMENTS}
+    )
+
+
+class DataProvider:
+    """Base class for sources of company financial data"""
+
+    def fetch(self, ticker: str) -> FinancialData:
+        """
+        Fetch info and financial statements for a ticker
+
+        Args:
+            ticker: Company stock ticker symbol
+
+        Returns:
+            FinancialData: Company info and statements
+        """
+        raise NotImplementedError
+
+    def fetch_info(self, ticker: str) -> Dict[str, Any]:
+        """
+        Fetch only the company info dictionary for a ticker
+
+        Args:
+            ticker: Company stock ticker symbol
+
+        Returns:
+            Dict[str, Any]: Company info
+        """
+        return self.fetch(ticker).info
+
+    def fetch_prices(self, ticker: str) -> Optional['pd.Series']:
+        """
+        Fetch daily closing prices for a ticker
+
+        Args:
+            ticker: Company stock ticker symbol
+
+        Returns:
+            Optional[pd.Series]: Closing prices indexed by date, or None if
+                the source has no price history
+        """
+        return self.fetch(ticker).prices
+
+
+def pooled_session(pool_size: int = 16):
+    """
+    HTTP session with a connection pool shared by every upstream request
+
+    Recent yfinance releases only accept curl_cffi sessions, which are used
+    when curl_cffi is installed (they keep one connection handle per thread);
+    otherwise a requests session with a sized connection pool is returned.
+
+    Args:
+        pool_size: Connections kept open per host by a requests session
+            (match the fetch concurrency)
+    """
+    try:
+        from curl_cffi import requests as curl_requests
+    except ImportError:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    return curl_requests.Session(impersonate='chrome')
+
+
+class _SessionProvider(DataProvider):
+    """Provider making HTTP requests through one shared session"""
+
+    def __init__(self, session=None, pool_size: Optional[int] = None):
+        """
+        Args:
+            session: HTTP session shared by every request
+            pool_size: Without a session, create a pooled_session() with this
+                many connections on first use
+        """
+        self._session = session
+        self._owns_session = session is None
+        self.pool_size = pool_size
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        # Created on first use so that importing and configuring the provider stays cheap
+        if self._session is None and self.pool_size:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = pooled_session(self.pool_size)
+        return self._session
+
+    def close_session(self):
+        """
+        Close the session this provider created, if any
+
+        The next request opens a new one. Call before forking, so that child
+        processes never inherit open connections.
+        """
+        if not self._owns_session:
+            return
+        with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+
+class YahooFinanceProvider(_SessionProvider):
+    """
+    Fetch live data from Yahoo Finance via yfinance
+
+    Without a session or pool_size, yfinance uses its own session.
+    """
+
+    def _ticker(self, ticker: str):
+        import yfinance as yf
+
+        if self.session is None:
+            return yf.Ticker(ticker)
+        return yf.Ticker(ticker, session=self.session)
+
+    def fetch(self, ticker: str) -> FinancialData:
+        company = self._ticker(ticker)
+        info = company.info
+        if not _has_quote(info):
+            raise LookupError(f"No data for {ticker}")
+        return FinancialData(
+            ticker=ticker,
+            info=info,
+            balance_sheet=company.balance_sheet,
+            cash_flow=company.cashflow,
+            income_stmt=company.income_stmt,
+        )
+
+    def fetch_info(self, ticker: str) -> Dict[str, Any]:
+        info = self._ticker(ticker).info
+        if not _has_quote(info):
+            raise LookupError(f"No data for {ticker}")
+        return info
+
+    def fetch_prices(self, ticker: str) -> Optional['pd.Series']:
+        history = self._ticker(ticker).history(period='max', auto_adjust=True)
+        if history is None or history.empty:
+            return None
+        closes = history['Close']
+        if closes.index.tz is not None:
+            closes.index = closes.index.tz_localize(None)
+        return closes
+
+
+def _has_quote(info: Optional[Dict[str, Any]]) -> bool:
+    """Whether a yfinance info dict describes a listed company; unknown symbols return a near-empty dict"""
+    return bool(info) and any(info.get(key) is not None
+                              for key in ('currentPrice', 'regularMarketPrice', 'marketCap'))
+
+
+class HTTPProvider(_SessionProvider):
+    """
+    Fetch company data from an HTTP service serving to_record() JSON
+
+    The service answers GET {base_url}/{ticker} with a record and 404 for
+    unknown tickers. Point it at a local stub server to exercise the fetch
+    path (scheduling, retries, stale data) without reaching Yahoo Finance.
+    """
+
+    def __init__(self, base_url: str, session=None, pool_size: int = 10, timeout: float = 10.0):
+        """
+        Args:
+            base_url: Service URL, e.g. http://localhost:8001/companies
+            session: requests-compatible session shared by every request
+            pool_size: Connections of the session created when none is given
+            timeout: Per-request timeout in seconds
+        """
+        super().__init__(session, pool_size)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def fetch(self, ticker: str) -> FinancialData:
+        response = self.session.get(f"{self.base_url}/{ticker}", timeout=self.timeout)
+        if response.status_code == 404:
+            raise LookupError(f"No data for {ticker}")
+        response.raise_for_status()
+        return from_record(ticker, response.json())
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time
+
+    Callers that arrive while a call for the same key is in flight wait for
+    it and receive its result (or exception) instead of starting their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, '_Call'] = {}
+
+    def do(self, key, fn):
+        """
+        Call fn(), or wait for an in-flight call with the same key
+
+        Args:
+            key: Hashable key identifying the call
+            fn: Zero-argument callable
+
+        Returns:
+            The result of fn()
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _Call:
+    """State of one in-flight SingleFlight call"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class CoalescingProvider(DataProvider):
+    """
+    Share one upstream fetch between concurrent requests for the same ticker
+
+    Results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, provider: DataProvider):
+        """
+        Args:
+            provider: Provider performing the actual fetches
+        """
+        self.provider = provider
+        self._flight = SingleFlight()
+
+    def fetch(self, ticker: str) -> FinancialData:
+        return self._flight.do(('fetch', ticker.upper()), lambda: self.provider.fetch(ticker))
+
+    def fetch_info(self, ticker: str) -> Dict[str, Any]:
+        return self._flight.do(('info', ticker.upper()), lambda: self.provider.fetch_info(ticker))
+
+    def fetch_prices(self, ticker: str) -> Optional['pd.Series']:
+        return self._flight.do(('prices', ticker.upper()), lambda: self.provider.fetch_prices(ticker))
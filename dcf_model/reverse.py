@@ -0,0 +1,269 @@
+"""
+Reverse DCF: the assumption implied by the market price
+
+Given a share price, solve for the terminal growth rate, flat forecast
+growth rate or WACC at which the DCF per-share value equals that price.
+Every company is solved at once with a safeguarded Newton iteration: each
+element keeps a bracket around its root, takes Newton steps using the
+closed-form derivatives from dcf_gradient, and falls back to bisection
+whenever a step leaves the bracket or stops shrinking fast enough. This
+converges in a handful of iterations where Newton behaves and can never
+diverge where it does not.
+"""
+
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+from .batch import batch_inputs
+from .providers import FinancialData
+from .valuation import dcf_gradient, default_growth_rates, vectorized_wacc
+
+logger = logging.getLogger(__name__)
+
+SOLVE_FOR = ('terminal_growth', 'growth', 'wacc')
+
+# Search ranges; the WACC/terminal growth side stays this far from the
+# point where the terminal value diverges
+MIN_SPREAD = 1e-6
+GROWTH_BOUNDS = (-0.5, 1.0)
+TERMINAL_GROWTH_LOWER = -0.5
+WACC_UPPER = 2.0
+
+
+def _evaluate(solve_for, x, base_fcf, growth_rates, wacc, terminal_growth):
+    """Enterprise value and its derivative with respect to the unknown x"""
+    if solve_for == 'terminal_growth':
+        gradient = dcf_gradient(base_fcf, growth_rates, wacc, x)
+        return gradient['enterprise_value'], gradient['terminal_growth']
+    if solve_for == 'wacc':
+        gradient = dcf_gradient(base_fcf, growth_rates, x, terminal_growth)
+        return gradient['enterprise_value'], gradient['wacc']
+
+    # A flat path moves every year's growth rate together
+    years = np.shape(growth_rates)[-1]
+    gradient = dcf_gradient(base_fcf, x[..., None] * np.ones(years), wacc, terminal_growth)
+    return gradient['enterprise_value'], gradient['growth_rates'].sum(axis=-1)
+
+
+def _bracket(solve_for, wacc, terminal_growth):
+    """Default lower and upper bounds for the unknown"""
+    if solve_for == 'terminal_growth':
+        return np.full_like(wacc, TERMINAL_GROWTH_LOWER), wacc - MIN_SPREAD
+    if solve_for == 'wacc':
+        return terminal_growth + MIN_SPREAD, np.full_like(terminal_growth, WACC_UPPER)
+    return np.full_like(wacc, GROWTH_BOUNDS[0]), np.full_like(wacc, GROWTH_BOUNDS[1])
+
+
+def solve_implied(target_enterprise_value, base_fcf, growth_rates, wacc, terminal_growth,
+                  solve_for: str = 'terminal_growth', lower=None, upper=None,
+                  rtol: float = 1e-10, xtol: float = 1e-12, max_iter: int = 100) -> dict:
+    """
+    Solve for the assumption that produces a target enterprise value
+
+    Inputs broadcast against each other; the unknown's own input is ignored
+    except as a starting point when it lies inside the bracket.
+
+    Args:
+        target_enterprise_value: Enterprise value to match, shape (...)
+        base_fcf: Base-year free cash flow, shape (...)
+        growth_rates: Growth rate per forecast year, shape (..., years)
+        wacc: Discount rate, shape (...)
+        terminal_growth: Terminal growth rate, shape (...)
+        solve_for: 'terminal_growth', 'growth' (one rate for every forecast
+            year) or 'wacc'
+        lower: Lower bound of the search range (defaults per solve_for)
+        upper: Upper bound of the search range (defaults per solve_for)
+        rtol: Convergence tolerance on enterprise value, relative to the target
+        xtol: Convergence tolerance on the width of the bracket
+        max_iter: Maximum number of iterations
+
+    Returns:
+        dict: 'value' (NaN where the target is not reachable inside the
+            bracket), 'converged', 'iterations' and 'residual' (enterprise
+            value minus target), each of shape (...)
+    """
+    if solve_for not in SOLVE_FOR:
+        raise ValueError(f"solve_for must be one of {', '.join(SOLVE_FOR)}")
+
+    growth_rates = np.asarray(growth_rates, dtype=float)
+    shape = np.broadcast_shapes(np.shape(target_enterprise_value), np.shape(base_fcf),
+                                np.shape(wacc), np.shape(terminal_growth), growth_rates.shape[:-1])
+
+    def expand(v):
+        return np.broadcast_to(np.asarray(v, dtype=float), shape).copy()
+
+    target, base_fcf = expand(target_enterprise_value), expand(base_fcf)
+    wacc, terminal_growth = expand(wacc), expand(terminal_growth)
+
+    default_lower, default_upper = _bracket(solve_for, wacc, terminal_growth)
+    lo = default_lower if lower is None else expand(lower)
+    hi = default_upper if upper is None else expand(upper)
+
+    def residual(x):
+        value, derivative = _evaluate(solve_for, x, base_fcf, growth_rates, wacc, terminal_growth)
+        return value - target, derivative
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        f_lo, _ = residual(lo)
+        f_hi, _ = residual(hi)
+        tolerance = rtol * np.maximum(np.abs(target), 1.0)
+
+        # Only elements with a sign change (or a root on a bound) are solvable
+        solvable = (np.isfinite(f_lo) & np.isfinite(f_hi) & np.isfinite(target)
+                    & (lo < hi) & (np.sign(f_lo) != np.sign(f_hi)))
+
+        # Orient the bracket so that the residual is negative at lo
+        flip = f_lo > 0
+        lo, hi = np.where(flip, hi, lo), np.where(flip, lo, hi)
+
+        # Start from the model's own assumption when it is inside the bracket
+        if solve_for == 'terminal_growth':
+            start = terminal_growth
+        elif solve_for == 'wacc':
+            start = wacc
+        else:
+            start = expand(growth_rates.mean(axis=-1))
+        inside = (start > np.minimum(lo, hi)) & (start < np.maximum(lo, hi))
+        x = np.where(inside, start, 0.5 * (lo + hi))
+        step = np.abs(hi - lo)
+
+        value = np.full(target.shape, np.nan)
+        converged = np.zeros(target.shape, dtype=bool)
+        iterations = np.zeros(target.shape, dtype=int)
+        f = np.full(target.shape, np.nan)
+        active = solvable.copy()
+
+        for _ in range(max_iter):
+            if not active.any():
+                break
+            iterations += active
+
+            f_x, df_x = residual(x)
+            f = np.where(active, f_x, f)
+
+            done = active & ((np.abs(f_x) <= tolerance) | (np.abs(hi - lo) <= xtol))
+            value = np.where(done, x, value)
+            converged |= done
+            active &= ~done
+
+            # Shrink the bracket around the root
+            below = f_x < 0
+            lo = np.where(active & below, x, lo)
+            hi = np.where(active & ~below, x, hi)
+
+            # Newton step, unless it leaves the bracket or the previous
+            # step did not at least halve
+            newton = x - f_x / df_x
+            previous_step = step
+            use_newton = (np.isfinite(newton)
+                          & ((newton - lo) * (newton - hi) < 0)
+                          & (np.abs(2 * f_x) <= np.abs(previous_step * df_x)))
+            bisection = 0.5 * (lo + hi)
+            x_next = np.where(use_newton, newton, bisection)
+            step = np.where(active, np.abs(x_next - x), step)
+            x = np.where(active, x_next, x)
+
+        # Out of iterations: report the best estimate as not converged
+        value = np.where(active, x, value)
+
+    return {
+        'value': value,
+        'converged': converged,
+        'iterations': iterations,
+        'residual': f,
+    }
+
+
+def target_enterprise_value(price, shares_outstanding, total_debt, cash):
+    """
+    Enterprise value implied by a share price
+
+    Inverts per_share_value = (EV - total_debt + cash) / shares_outstanding.
+    """
+    price = np.asarray(price, dtype=float)
+    shares_outstanding = np.asarray(shares_outstanding, dtype=float)
+    valid = (price > 0) & (shares_outstanding > 0)
+    return np.where(valid, price * shares_outstanding + total_debt - cash, np.nan)
+
+
+def reverse_dcf_batch(companies: List[FinancialData], solve_for: str = 'terminal_growth',
+                      forecast_years: int = 5, terminal_growth: float = 0.03,
+                      risk_free_rate: float = 0.035, market_risk_premium: float = 0.05,
+                      tax_rate: float = 0.21, growth_rates: Optional[List[float]] = None,
+                      target_prices: Optional[Dict[str, float]] = None) -> Dict[str, dict]:
+    """
+    Solve the reverse DCF for many companies at once
+
+    All other assumptions match value_batch, so the implied value is the one
+    at which value_batch would report a per-share value equal to the price.
+
+    Args:
+        companies: Fetched company data
+        solve_for: 'terminal_growth', 'growth' or 'wacc'
+        forecast_years: Number of years to forecast
+        terminal_growth: Long-term growth rate for terminal value
+        risk_free_rate: Risk-free rate
+        market_risk_premium: Market risk premium
+        tax_rate: Corporate tax rate
+        growth_rates: Growth path shared by all companies (defaults to the
+            DCFModel default path)
+        target_prices: Prices to match keyed by ticker (defaults to each
+            company's current price)
+
+    Returns:
+        Dict[str, dict]: Results keyed by ticker with 'implied_value',
+            'assumed_value', 'converged', 'iterations', 'target_price' and
+            the 'stale' and 'data_error' flags of the company data
+    """
+    if solve_for not in SOLVE_FOR:
+        raise ValueError(f"solve_for must be one of {', '.join(SOLVE_FOR)}")
+    if not companies:
+        return {}
+
+    if growth_rates is None:
+        growth_rates = default_growth_rates(forecast_years)
+    if len(growth_rates) != forecast_years:
+        raise ValueError("growth_rates must have one entry per forecast year")
+
+    inputs = batch_inputs(companies)
+    prices = inputs['current_price']
+    if target_prices:
+        prices = np.array([
+            target_prices.get(company.ticker, price) for company, price in zip(companies, prices)
+        ], dtype=float)
+
+    wacc = vectorized_wacc(inputs['beta'], risk_free_rate, market_risk_premium,
+                           inputs['market_cap'], inputs['total_debt'], tax_rate)
+    target = target_enterprise_value(prices, inputs['shares_outstanding'],
+                                     inputs['total_debt'], inputs['cash'])
+    solution = solve_implied(target, inputs['base_fcf'], np.asarray(growth_rates, dtype=float),
+                             wacc, terminal_growth, solve_for=solve_for)
+
+    assumed = {
+        'terminal_growth': np.full(len(companies), terminal_growth),
+        'wacc': wacc,
+        'growth': np.full(len(companies), float(np.mean(growth_rates))),
+    }[solve_for]
+
+    results = {}
+    for i, company in enumerate(companies):
+        results[company.ticker] = {
+            'solve_for': solve_for,
+            'implied_value': solution['value'][i],
+            'assumed_value': assumed[i],
+            'converged': bool(solution['converged'][i]),
+            'iterations': int(solution['iterations'][i]),
+            'target_price': prices[i],
+            'target_enterprise_value': target[i],
+            'wacc': wacc[i],
+            'stale': company.stale,
+            'data_error': company.error
+        }
+
+    unsolved = [ticker for ticker, result in results.items() if not result['converged']]
+    if unsolved:
+        logger.info(f"No implied {solve_for} within bounds for: {', '.join(unsolved)}")
+
+    return results
@@ -0,0 +1,208 @@
+"""
+Sampling designs for Monte Carlo simulation
+
+standard_normals draws a block of standard normal inputs, one column per
+simulated input, under one of these designs:
+
+- 'random': independent pseudo-random draws;
+- 'antithetic': pseudo-random draws paired with their negation, which
+  cancels the odd-order error terms of smooth outputs;
+- 'lhs': Latin hypercube sampling, which stratifies every input so each
+  marginal is covered evenly;
+- 'sobol': a Sobol low-discrepancy sequence with a random digital shift,
+  which fills the input space far more evenly than random points (use
+  blocks of a power of two points).
+
+Each block is an independent randomization of its design, so estimates from
+separate blocks are independent and their spread gives an honest standard
+error (randomized quasi-Monte Carlo).
+
+Everything is implemented in NumPy, so a seed gives the same draws in any
+environment. SciPy is optional and only needed for Sobol sampling of more
+inputs than the bundled direction numbers cover.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+SAMPLING_METHODS = ('random', 'antithetic', 'lhs', 'sobol')
+
+# Bits of precision in the Sobol points
+SOBOL_BITS = 32
+
+# Primitive polynomial (as a bit mask, highest bit the leading term) and
+# initial direction numbers of Sobol dimensions 2 onwards, from Joe and Kuo's
+# new-joe-kuo-6.21201 table; dimension 1 uses all-ones direction numbers
+SOBOL_DIRECTIONS = (
+    (3, (1,)),
+    (7, (1, 3)),
+    (11, (1, 3, 1)),
+    (13, (1, 1, 1)),
+    (19, (1, 1, 3, 3)),
+    (25, (1, 3, 5, 13)),
+    (37, (1, 1, 5, 5, 17)),
+    (41, (1, 1, 5, 5, 5)),
+    (47, (1, 1, 7, 11, 19)),
+    (55, (1, 1, 5, 1, 1)),
+    (59, (1, 1, 1, 3, 11)),
+    (61, (1, 3, 5, 5, 31)),
+    (67, (1, 3, 3, 9, 7, 49)),
+    (91, (1, 1, 1, 15, 21, 21)),
+    (97, (1, 3, 1, 13, 27, 49)),
+    (103, (1, 1, 1, 15, 7, 5)),
+    (109, (1, 3, 1, 15, 13, 25)),
+    (115, (1, 1, 5, 5, 19, 61)),
+    (131, (1, 3, 7, 11, 23, 15, 103)),
+    (137, (1, 3, 7, 13, 13, 15, 69)),
+    (143, (1, 1, 3, 13, 7, 35, 63)),
+    (145, (1, 3, 5, 9, 1, 25, 53)),
+    (157, (1, 3, 1, 13, 9, 35, 107)),
+    (167, (1, 3, 1, 5, 27, 61, 31)),
+    (171, (1, 1, 5, 11, 19, 41, 61)),
+    (185, (1, 3, 5, 3, 3, 13, 69)),
+    (191, (1, 1, 7, 13, 1, 19, 1)),
+    (193, (1, 3, 7, 5, 13, 19, 59)),
+    (203, (1, 1, 3, 9, 25, 29, 41)),
+    (211, (1, 3, 5, 13, 23, 1, 55)),
+    (213, (1, 3, 7, 3, 13, 59, 17)),
+)
+
+# Coefficients of Acklam's rational approximation to the inverse normal CDF
+_PPF_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+          1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_PPF_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+          6.680131188771720e+01, -1.328068155288572e+01)
+_PPF_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+          -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_PPF_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+          3.754408661907416e+00)
+_PPF_LOW = 0.02425
+
+_directions: Optional[np.ndarray] = None
+
+
+def norm_ppf(u: np.ndarray) -> np.ndarray:
+    """
+    Inverse of the standard normal CDF
+
+    Acklam's rational approximation, accurate to a relative error of about
+    1e-9, far below sampling noise.
+
+    Args:
+        u: Probabilities in (0, 1)
+
+    Returns:
+        np.ndarray: Standard normal quantiles
+    """
+    u = np.asarray(u, dtype=float)
+    z = np.empty_like(u)
+
+    central = (u >= _PPF_LOW) & (u <= 1 - _PPF_LOW)
+    q = u[central] - 0.5
+    r = q * q
+    a, b = _PPF_A, _PPF_B
+    z[central] = ((((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q /
+                  (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1))
+
+    tails = ~central
+    q = np.sqrt(-2 * np.log(np.minimum(u[tails], 1 - u[tails])))
+    c, d = _PPF_C, _PPF_D
+    tail = ((((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) /
+            ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1))
+    z[tails] = np.where(u[tails] < 0.5, tail, -tail)
+    return z
+
+
+def _sobol_directions() -> np.ndarray:
+    """Direction numbers, shape (dimensions, SOBOL_BITS), built once"""
+    global _directions
+    if _directions is None:
+        directions = np.zeros((len(SOBOL_DIRECTIONS) + 1, SOBOL_BITS), dtype=np.uint64)
+        directions[0] = [1 << (SOBOL_BITS - 1 - k) for k in range(SOBOL_BITS)]
+        for dim, (poly, initial) in enumerate(SOBOL_DIRECTIONS, start=1):
+            degree = poly.bit_length() - 1
+            v = [m << (SOBOL_BITS - 1 - k) for k, m in enumerate(initial)]
+            for k in range(degree, SOBOL_BITS):
+                value = v[k - degree] ^ (v[k - degree] >> degree)
+                for i in range(1, degree):
+                    if (poly >> (degree - i)) & 1:
+                        value ^= v[k - i]
+                v.append(value)
+            directions[dim] = v
+        _directions = directions
+    return _directions
+
+
+def sobol(n: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    First n points of a Sobol sequence with a random digital shift
+
+    Beyond the dimensions covered by SOBOL_DIRECTIONS, SciPy's scrambled
+    Sobol generator is used if SciPy is installed.
+
+    Args:
+        n: Number of points (a power of two keeps the balance properties)
+        dims: Number of dimensions
+        rng: Random source for the shift
+
+    Returns:
+        np.ndarray: Points in (0, 1), shape (n, dims)
+    """
+    directions = _sobol_directions()
+    if dims > directions.shape[0]:
+        try:
+            from scipy.stats import qmc
+        except ImportError:
+            raise ValueError(f"Sobol sampling supports at most {directions.shape[0]} inputs "
+                             "without SciPy installed") from None
+        return qmc.Sobol(dims, scramble=True, seed=rng).random(n)
+    if n > 2 ** SOBOL_BITS:
+        raise ValueError(f"Sobol sampling supports at most 2**{SOBOL_BITS} points")
+
+    index = np.arange(n, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+    points = np.zeros((n, dims), dtype=np.uint64)
+    for bit in range(max(int(n - 1).bit_length(), 1)):
+        mask = ((gray >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+        points[mask] ^= directions[:dims, bit]
+
+    points ^= rng.integers(0, 2 ** SOBOL_BITS, dims, dtype=np.uint64)
+    return (points.astype(float) + 0.5) / 2.0 ** SOBOL_BITS
+
+
+def latin_hypercube(n: int, dims: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Latin hypercube sample: every input has exactly one point per 1/n stratum
+
+    Returns:
+        np.ndarray: Points in (0, 1), shape (n, dims)
+    """
+    strata = rng.permuted(np.broadcast_to(np.arange(n), (dims, n)), axis=1).T
+    return (strata + rng.random((n, dims))) / n
+
+
+def standard_normals(rng: np.random.Generator, size: int, dims: int,
+                     method: str = 'random') -> np.ndarray:
+    """
+    Draw a block of standard normal inputs under a sampling design
+
+    Args:
+        rng: Random generator for this block
+        size: Number of paths
+        dims: Number of inputs per path
+        method: One of SAMPLING_METHODS
+
+    Returns:
+        np.ndarray: Standard normal draws, shape (size, dims)
+    """
+    if method == 'random':
+        return rng.standard_normal((size, dims))
+    if method == 'antithetic':
+        half = rng.standard_normal((-(-size // 2), dims))
+        return np.concatenate([half, -half])[:size]
+    if method == 'lhs':
+        return norm_ppf(latin_hypercube(size, dims, rng))
+    if method == 'sobol':
+        return norm_ppf(sobol(size, dims, rng))
+    raise ValueError(f"sampling must be one of: {', '.join(SAMPLING_METHODS)}")
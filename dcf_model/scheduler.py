@@ -0,0 +1,242 @@
+"""
+Central scheduler for upstream data fetches
+
+FetchScheduler wraps the provider that performs network calls (the
+transport) and routes every upstream request through one place:
+
+- a token bucket caps the sustained request rate while allowing short bursts,
+  so bursts of traffic are smoothed instead of tripping upstream throttling;
+- a semaphore bounds the number of requests in flight;
+- transient failures (connection errors, timeouts, HTTP 429 and 5xx) are
+  retried with exponential backoff and full jitter, so concurrent callers
+  retrying the same outage do not retry in lockstep;
+- the last good copy of each ticker's data is kept, and served flagged as
+  stale when the upstream keeps failing.
+
+The transport is any DataProvider: YahooFinanceProvider with a shared pooled
+session (providers.pooled_session) in production, or HTTPProvider pointed
+at a local stub server to exercise throttling and failures.
+"""
+
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+import random
+import threading
+import time
+
+from .providers import DataProvider, FinancialData
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: throttling and server-side failures
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class UpstreamError(Exception):
+    """The upstream source could not provide data after all retries"""
+
+
+def _status(exc: BaseException) -> Optional[int]:
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Whether a failed fetch is worth retrying
+
+    Connection errors, timeouts, throttling and server errors are transient;
+    unknown tickers and malformed data are not.
+    """
+    if isinstance(exc, LookupError):
+        return False
+    status = _status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    if isinstance(exc, (ConnectionError, TimeoutError, OSError)):
+        return True
+    # yfinance reports throttling with its own exception types or messages
+    text = f"{type(exc).__name__} {exc}"
+    return 'RateLimit' in text or 'Too Many Requests' in text or 'Timeout' in text
+
+
+def _retry_after(exc: BaseException) -> float:
+    """Delay requested by a Retry-After header, in seconds (0 when absent)"""
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return max(0.0, float(headers.get('Retry-After', 0)))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+
+    Tokens accrue at rate per second up to capacity, and each request takes
+    one. A caller that finds the bucket empty reserves the next token and
+    sleeps until it accrues, so waiting callers are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate: Tokens added per second (0 or less disables the limit)
+            capacity: Maximum tokens held, i.e. the largest burst
+            clock: Monotonic clock in seconds
+            sleep: Sleep function
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting for one if necessary
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class FetchScheduler(DataProvider):
+    """Rate-limited, bounded-concurrency, retrying provider with stale fallback"""
+
+    def __init__(self, transport: DataProvider, rate: float = 5.0, burst: int = 10,
+                 max_concurrency: int = 8, max_attempts: int = 4, base_delay: float = 0.5,
+                 max_delay: float = 10.0, stale_ttl: float = 86400.0, max_stale_entries: int = 1024,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        """
+        Args:
+            transport: Provider performing the network calls
+            rate: Sustained upstream requests per second (0 for no limit)
+            burst: Requests allowed at once before the rate applies
+            max_concurrency: Maximum upstream requests in flight
+            max_attempts: Attempts per fetch, including the first
+            base_delay: Backoff before the first retry, in seconds; doubles per retry
+            max_delay: Upper bound on a single backoff, in seconds
+            stale_ttl: How long the last good copy of a ticker's data may be
+                served when the upstream fails, in seconds (0 to never serve stale data)
+            max_stale_entries: Number of tickers whose last good copy is kept
+            sleep: Sleep function (replaceable in tests)
+            rng: Random source for the backoff jitter
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.transport = transport
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stale_ttl = stale_ttl
+        self.max_stale_entries = max_stale_entries
+        self._bucket = TokenBucket(rate, burst, sleep=sleep)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._last_good: 'OrderedDict[Tuple[str, str], Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'failures': 0, 'stale_served': 0,
+                       'throttled_seconds': 0.0}
+
+    def backoff(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        """
+        Delay before retry number attempt (1 for the first retry)
+
+        Full jitter: a uniform draw between 0 and the capped exponential
+        delay, but never less than a Retry-After the upstream asked for.
+        """
+        delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if exc is not None:
+            delay = max(delay, min(self.max_delay, _retry_after(exc)))
+        return delay
+
+    def _count(self, name: str, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _call(self, fn: Callable[[str], Any], ticker: str) -> Any:
+        """Call the transport with rate limiting, bounded concurrency and retries"""
+        for attempt in range(1, self.max_attempts + 1):
+            self._count('throttled_seconds', self._bucket.acquire())
+            self._count('requests')
+            try:
+                with self._slots:
+                    return fn(ticker)
+            except Exception as e:
+                if attempt == self.max_attempts or not is_retryable(e):
+                    self._count('failures')
+                    raise
+                delay = self.backoff(attempt, e)
+                logger.warning(f"Upstream fetch for {ticker} failed ({e}); "
+                               f"retry {attempt} of {self.max_attempts - 1} in {delay:.2f}s")
+                self._count('retries')
+                self._sleep(delay)
+
+    def _fetch(self, kind: str, fn: Callable[[str], Any], ticker: str) -> Tuple[Any, Optional[str]]:
+        """
+        Fetch through the transport, falling back to the last good copy
+
+        Returns:
+            tuple: (result, error message if the result is a stale copy else None)
+        """
+        key = (kind, ticker.upper())
+        try:
+            result = self._call(fn, ticker)
+        except Exception as e:
+            with self._lock:
+                entry = self._last_good.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.stale_ttl:
+                if isinstance(e, LookupError):
+                    raise
+                raise UpstreamError(f"Could not fetch data for {ticker}: {e}") from e
+            logger.warning(f"Serving stale data for {ticker}: {e}")
+            self._count('stale_served')
+            return entry[1], str(e)
+
+        if self.stale_ttl > 0:
+            with self._lock:
+                self._last_good[key] = (time.monotonic(), result)
+                self._last_good.move_to_end(key)
+                while len(self._last_good) > self.max_stale_entries:
+                    self._last_good.popitem(last=False)
+        return result, None
+
+    def fetch(self, ticker: str) -> FinancialData:
+        data, error = self._fetch('fetch', self.transport.fetch, ticker)
+        if error is not None:
+            return replace(data, stale=True, error=error)
+        return data
+
+    def fetch_info(self, ticker: str) -> Dict[str, Any]:
+        info, error = self._fetch('info', self.transport.fetch_info, ticker)
+        if error is not None:
+            # Info dicts have no room for flags; report staleness in-band
+            return {**info, 'stale': True, 'error': error}
+        return info
+
+    def fetch_prices(self, ticker: str):
+        return self._call(self.transport.fetch_prices, ticker)
+
+    def stats(self) -> Dict[str, float]:
+        """Request, retry, failure and stale counters and total time spent throttled"""
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,351 @@
+"""
+In-memory valuation index for screening a universe
+
+ValuationIndex keeps the valuation inputs of every indexed company as
+aligned arrays (one row per ticker) and the valuations computed from them,
+per set of model parameters. Screens are answered from these arrays with
+vectorized filters and a partial sort for the top k, so a query over
+thousands of names needs no fetches and no per-ticker model.
+
+Valuations are refreshed incrementally: each row carries a version that is
+bumped when new data for the ticker changes any valuation input, and a
+query under given parameters revalues only the rows whose version differs
+from the one its cached valuation was computed at. Valuations are cached
+for a few recent parameter sets, so switching between them is cheap too.
+
+Rows built from a stale copy (served by the fetch scheduler while the
+upstream is failing) are flagged in screen results until fresh data
+replaces them. Tickers that fail to fetch are remembered for a short time,
+so repeated screens do not refetch a failing symbol on every request.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+
+import numpy as np
+
+from .batch import batch_inputs, value_inputs
+from .providers import FinancialData
+from .valuation import default_growth_rates
+
+# Valuation inputs held per row; a change in any of them triggers revaluation
+INPUT_FIELDS = ('beta', 'market_cap', 'total_debt', 'cash', 'shares_outstanding',
+                'current_price', 'base_fcf')
+
+# Metrics that can be sorted and filtered on
+SCREEN_METRICS = ('margin_of_safety', 'value_to_price', 'per_share_value', 'current_price',
+                  'enterprise_value', 'equity_value', 'ev_fcf', 'fcf_yield', 'wacc',
+                  'market_cap', 'beta', 'base_fcf')
+
+# Default model parameters, matching DCFModel and value_batch
+DEFAULT_PARAMS = {
+    'forecast_years': 5,
+    'terminal_growth': 0.03,
+    'risk_free_rate': 0.035,
+    'market_risk_premium': 0.05,
+    'tax_rate': 0.21,
+    'growth_rates': None,
+}
+
+
+def _params_key(params: dict) -> tuple:
+    """Hashable key of a complete parameter set"""
+    growth_rates = params['growth_rates']
+    if growth_rates is None:
+        growth_rates = default_growth_rates(params['forecast_years'])
+    return tuple(
+        (name, tuple(float(g) for g in growth_rates) if name == 'growth_rates' else params[name])
+        for name in sorted(params)
+    )
+
+
+class ValuationIndex:
+    """Thread-safe index of valuation inputs and cached valuations by ticker"""
+
+    def __init__(self, max_param_sets: int = 8, failure_ttl: float = 300.0):
+        """
+        Args:
+            max_param_sets: Number of parameter sets whose valuations are kept
+            failure_ttl: Seconds a failed fetch keeps an unindexed ticker out
+                of missing()
+        """
+        self.max_param_sets = max_param_sets
+        self.failure_ttl = failure_ttl
+        self._lock = threading.RLock()
+        self._rows: Dict[str, int] = {}
+        self._tickers: List[str] = []
+        self._inputs = {field: np.empty(0) for field in INPUT_FIELDS}
+        self._sectors = np.empty(0, dtype=object)
+        self._names = np.empty(0, dtype=object)
+        self._versions = np.empty(0, dtype=np.int64)
+        self._fetched_at = np.empty(0)
+        self._stale = np.empty(0, dtype=bool)
+        self._errors = np.empty(0, dtype=object)
+        self._valuations: 'OrderedDict[tuple, dict]' = OrderedDict()
+        self._failures: Dict[str, Tuple[float, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker.upper() in self._rows
+
+    def update(self, companies: List[FinancialData], fetched_at: Optional[float] = None) -> int:
+        """
+        Add or refresh companies
+
+        Args:
+            companies: Fetched company data
+            fetched_at: Fetch time as a Unix timestamp (defaults to now)
+
+        Returns:
+            int: Number of companies that are new or whose valuation inputs changed
+        """
+        if not companies:
+            return 0
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        inputs = batch_inputs(companies)
+        tickers = [company.ticker.upper() for company in companies]
+        infos = [company.info or {} for company in companies]
+
+        with self._lock:
+            new = [ticker for ticker in dict.fromkeys(tickers) if ticker not in self._rows]
+            if new:
+                self._grow(new)
+
+            rows = np.array([self._rows[ticker] for ticker in tickers], dtype=np.int64)
+            changed = np.zeros(len(rows), dtype=bool)
+            for field in INPUT_FIELDS:
+                before, after = self._inputs[field][rows], inputs[field]
+                changed |= ~((before == after) | (np.isnan(before) & np.isnan(after)))
+                self._inputs[field][rows] = after
+
+            self._versions[rows[changed]] += 1
+            self._fetched_at[rows] = fetched_at
+            self._stale[rows] = [company.stale for company in companies]
+            self._errors[rows] = [company.error for company in companies]
+            self._sectors[rows] = [info.get('sector') for info in infos]
+            self._names[rows] = [info.get('shortName') for info in infos]
+            for ticker in tickers:
+                self._failures.pop(ticker, None)
+            return int(np.unique(rows[changed]).size)
+
+    def record_failures(self, errors: Dict[str, str], failed_at: Optional[float] = None):
+        """
+        Remember tickers whose fetch failed, so missing() skips them for failure_ttl seconds
+
+        Args:
+            errors: Error messages keyed by ticker
+            failed_at: Failure time as a Unix timestamp (defaults to now)
+        """
+        failed_at = time.time() if failed_at is None else failed_at
+        with self._lock:
+            # Expired entries are dropped here, so the record stays small
+            self._failures = {
+                ticker: entry for ticker, entry in self._failures.items()
+                if entry[0] >= failed_at - self.failure_ttl
+            }
+            for ticker, message in errors.items():
+                self._failures[ticker.upper()] = (failed_at, message)
+
+    def recent_failures(self, tickers: Sequence[str], now: Optional[float] = None) -> Dict[str, str]:
+        """Error messages of tickers that failed to fetch within failure_ttl seconds"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entries = ((ticker, self._failures.get(ticker.upper())) for ticker in tickers)
+            return {
+                ticker: entry[1] for ticker, entry in entries
+                if entry is not None and entry[0] >= now - self.failure_ttl
+            }
+
+    def _grow(self, tickers: List[str]):
+        """Append empty rows for new tickers; their NaN inputs and version 0 mark them unvalued"""
+        start = len(self._tickers)
+        for i, ticker in enumerate(tickers):
+            self._rows[ticker] = start + i
+        self._tickers.extend(tickers)
+
+        count = len(tickers)
+        for field in INPUT_FIELDS:
+            self._inputs[field] = np.concatenate([self._inputs[field], np.full(count, np.nan)])
+        self._sectors = np.concatenate([self._sectors, np.full(count, None, dtype=object)])
+        self._names = np.concatenate([self._names, np.full(count, None, dtype=object)])
+        self._versions = np.concatenate([self._versions, np.zeros(count, dtype=np.int64)])
+        self._fetched_at = np.concatenate([self._fetched_at, np.full(count, -np.inf)])
+        self._stale = np.concatenate([self._stale, np.zeros(count, dtype=bool)])
+        self._errors = np.concatenate([self._errors, np.full(count, None, dtype=object)])
+
+    def missing(self, tickers: Sequence[str], now: Optional[float] = None) -> List[str]:
+        """Tickers that have never been indexed, except those that failed to fetch recently"""
+        retry_before = (time.time() if now is None else now) - self.failure_ttl
+        with self._lock:
+            return [
+                ticker for ticker in tickers
+                if ticker.upper() not in self._rows
+                and self._failures.get(ticker.upper(), (-np.inf,))[0] < retry_before
+            ]
+
+    def stale(self, max_age: float, tickers: Optional[Sequence[str]] = None,
+              now: Optional[float] = None) -> List[str]:
+        """
+        Indexed tickers fetched more than max_age seconds ago
+
+        Args:
+            max_age: Maximum data age in seconds
+            tickers: Tickers to check (defaults to all indexed tickers)
+            now: Current Unix timestamp (defaults to now)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if tickers is None:
+                tickers = self._tickers
+            rows = [self._rows[t.upper()] for t in tickers if t.upper() in self._rows]
+            old = np.asarray(rows, dtype=np.int64)[self._fetched_at[rows] < now - max_age]
+            return [self._tickers[row] for row in old]
+
+    def _metrics(self, params: dict) -> tuple:
+        """
+        Valuation metrics for every row under a parameter set, revaluing only
+        rows whose inputs changed since they were last valued
+
+        Returns:
+            tuple: (metrics dict of arrays, number of rows revalued)
+        """
+        key = _params_key(params)
+        entry = self._valuations.get(key)
+        count = len(self._tickers)
+        if entry is None:
+            entry = {'versions': np.empty(0, dtype=np.int64),
+                     'metrics': {name: np.empty(0) for name in SCREEN_METRICS}}
+            self._valuations[key] = entry
+        self._valuations.move_to_end(key)
+        while len(self._valuations) > self.max_param_sets:
+            self._valuations.popitem(last=False)
+
+        # Rows added since this parameter set was last used start unvalued
+        grow = count - entry['versions'].size
+        if grow:
+            entry['versions'] = np.concatenate([entry['versions'], np.full(grow, -1, dtype=np.int64)])
+            for name in SCREEN_METRICS:
+                entry['metrics'][name] = np.concatenate([entry['metrics'][name], np.full(grow, np.nan)])
+
+        rows = np.flatnonzero(entry['versions'] != self._versions)
+        if rows.size:
+            inputs = {field: values[rows] for field, values in self._inputs.items()}
+            valuation = value_inputs(inputs, **params)
+            price, base_fcf = inputs['current_price'], inputs['base_fcf']
+            enterprise_value = valuation['enterprise_value']
+            with np.errstate(divide='ignore', invalid='ignore'):
+                value_to_price = np.where(price > 0, valuation['per_share_value'] / price, np.nan)
+                computed = {
+                    'margin_of_safety': value_to_price - 1,
+                    'value_to_price': value_to_price,
+                    'per_share_value': valuation['per_share_value'],
+                    'current_price': price,
+                    'enterprise_value': enterprise_value,
+                    'equity_value': valuation['equity_value'],
+                    'ev_fcf': np.where(base_fcf > 0, enterprise_value / base_fcf, np.nan),
+                    'fcf_yield': np.where(inputs['market_cap'] > 0, base_fcf / inputs['market_cap'], np.nan),
+                    'wacc': valuation['wacc'],
+                    'market_cap': inputs['market_cap'],
+                    'beta': inputs['beta'],
+                    'base_fcf': base_fcf,
+                }
+            for name in SCREEN_METRICS:
+                entry['metrics'][name][rows] = computed[name]
+            entry['versions'][rows] = self._versions[rows]
+
+        return entry['metrics'], int(rows.size)
+
+    def query(self, sort_by: str = 'margin_of_safety', descending: bool = True,
+              top_k: Optional[int] = 50, filters: Optional[dict] = None,
+              sectors: Optional[Sequence[str]] = None, tickers: Optional[Sequence[str]] = None,
+              **params) -> dict:
+        """
+        Rank indexed companies by a metric
+
+        Args:
+            sort_by: Metric to rank by (one of SCREEN_METRICS)
+            descending: Rank the highest values first
+            top_k: Number of results to return (None for all matches)
+            filters: Bounds per metric, as {'metric': {'min': x, 'max': y}}
+                or {'metric': [min, max]} with None for an open end
+            sectors: Keep only companies in these sectors
+            tickers: Restrict the screen to these tickers
+            **params: Model parameters (forecast_years, terminal_growth,
+                risk_free_rate, market_risk_premium, tax_rate, growth_rates)
+
+        Returns:
+            dict: 'universe' and 'matched' counts, 'revalued' rows and the
+                ranked 'results' with every metric and the stale data flag
+                per company
+        """
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        params = {**DEFAULT_PARAMS, **{k: v for k, v in params.items() if v is not None}}
+        if sort_by not in SCREEN_METRICS:
+            raise ValueError(f"sort_by must be one of: {', '.join(SCREEN_METRICS)}")
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k must be positive")
+
+        with self._lock:
+            metrics, revalued = self._metrics(params)
+            count = len(self._tickers)
+
+            mask = np.ones(count, dtype=bool)
+            if tickers is not None:
+                mask[:] = False
+                mask[[self._rows[t.upper()] for t in tickers if t.upper() in self._rows]] = True
+            if sectors:
+                mask &= np.isin(self._sectors, list(sectors))
+
+            for name, bounds in (filters or {}).items():
+                if name not in SCREEN_METRICS:
+                    raise ValueError(f"Cannot filter on {name!r}; use one of: {', '.join(SCREEN_METRICS)}")
+                if isinstance(bounds, dict):
+                    lower, upper = bounds.get('min'), bounds.get('max')
+                else:
+                    lower, upper = bounds
+                values = metrics[name]
+                mask &= np.isfinite(values)
+                if lower is not None:
+                    mask &= values >= lower
+                if upper is not None:
+                    mask &= values <= upper
+
+            # Companies without a finite value of the sort metric cannot be ranked
+            keys = metrics[sort_by]
+            mask &= np.isfinite(keys)
+            candidates = np.flatnonzero(mask)
+            keys = -keys[candidates] if descending else keys[candidates]
+
+            # Partial sort: select the top k, then order only those
+            if top_k is not None and top_k < candidates.size:
+                selected = np.argpartition(keys, top_k - 1)[:top_k]
+            else:
+                selected = np.arange(candidates.size)
+            order = candidates[selected[np.argsort(keys[selected], kind='stable')]]
+
+            results = [
+                {
+                    'ticker': self._tickers[row],
+                    'name': self._names[row],
+                    'sector': self._sectors[row],
+                    **{name: float(metrics[name][row]) for name in SCREEN_METRICS},
+                    'stale': bool(self._stale[row]),
+                    'data_error': self._errors[row]
+                }
+                for row in order
+            ]
+
+        return {
+            'universe': count if tickers is None else int(len(tickers)),
+            'matched': int(candidates.size),
+            'revalued': revalued,
+            'sort_by': sort_by,
+            'descending': descending,
+            'results': results
+        }
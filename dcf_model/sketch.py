@@ -0,0 +1,228 @@
+"""
+Mergeable streaming quantile sketch
+
+QuantileSketch summarizes an arbitrarily long stream of values in memory
+proportional to the logarithm of their range, not their count. Values are
+counted in logarithmically spaced buckets (as in DDSketch), which bounds the
+relative error of every quantile estimate by relative_accuracy. Sketches
+built on separate chunks merge exactly by adding bucket counts, so parallel
+or chunked simulations report the same quantiles as a single pass.
+
+Mean and standard deviation are tracked exactly with running moments.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+
+# Magnitudes below this are counted as zero
+MIN_MAGNITUDE = 1e-9
+
+
+class _BucketStore:
+    """Dense bucket counts indexed by integer key, grown on demand"""
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def _extend(self, min_key, max_key):
+        if self.counts.size == 0:
+            self.offset = min_key
+            self.counts = np.zeros(max_key - min_key + 1, dtype=np.int64)
+            return
+
+        new_min = min(min_key, self.offset)
+        new_max = max(max_key, self.offset + self.counts.size - 1)
+        if new_min == self.offset and new_max == self.offset + self.counts.size - 1:
+            return
+
+        counts = np.zeros(new_max - new_min + 1, dtype=np.int64)
+        start = self.offset - new_min
+        counts[start:start + self.counts.size] = self.counts
+        self.offset, self.counts = new_min, counts
+
+    def add(self, keys):
+        if keys.size == 0:
+            return
+        min_key, max_key = int(keys.min()), int(keys.max())
+        self._extend(min_key, max_key)
+        self.counts += np.bincount(keys - self.offset, minlength=self.counts.size)
+
+    def merge(self, other):
+        if other.counts.size == 0:
+            return
+        self._extend(other.offset, other.offset + other.counts.size - 1)
+        start = other.offset - self.offset
+        self.counts[start:start + other.counts.size] += other.counts
+
+    def keys_and_counts(self):
+        nonzero = np.nonzero(self.counts)[0]
+        return nonzero + self.offset, self.counts[nonzero]
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch with exact merging"""
+
+    def __init__(self, relative_accuracy: float = 0.001):
+        """
+        Args:
+            relative_accuracy: Bound on the relative error of quantile estimates
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+
+        self._positive = _BucketStore()
+        self._negative = _BucketStore()
+        self.zero_count = 0
+        self.num_invalid = 0
+
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _keys(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def update(self, values: Iterable[float]):
+        """
+        Add a chunk of values; non-finite values are counted as invalid
+
+        Args:
+            values: Values to add
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        finite = values[np.isfinite(values)]
+        self.num_invalid += values.size - finite.size
+        if finite.size == 0:
+            return
+
+        positive = finite[finite > MIN_MAGNITUDE]
+        negative = -finite[finite < -MIN_MAGNITUDE]
+        self._positive.add(self._keys(positive))
+        self._negative.add(self._keys(negative))
+        self.zero_count += finite.size - positive.size - negative.size
+
+        chunk_mean = float(finite.mean())
+        chunk_m2 = float(np.square(finite - chunk_mean).sum())
+        self._combine_moments(finite.size, chunk_mean, chunk_m2)
+
+        self.min = min(self.min, float(finite.min()))
+        self.max = max(self.max, float(finite.max()))
+
+    def _combine_moments(self, count, mean, m2):
+        # Chan et al. parallel combination of running means and squared deviations
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        Merge another sketch into this one
+
+        Args:
+            other: Sketch built with the same relative accuracy
+
+        Returns:
+            QuantileSketch: self
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+        self.zero_count += other.zero_count
+        self.num_invalid += other.num_invalid
+        if other.count:
+            self._combine_moments(other.count, other.mean, other._m2)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self._m2 / (self.count - 1))) if self.count > 1 else 0.0
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        """
+        Estimate quantiles
+
+        Args:
+            qs: Quantiles in [0, 1]
+
+        Returns:
+            np.ndarray: Estimated values (NaN if the sketch is empty)
+        """
+        qs = np.asarray(list(qs), dtype=float)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+
+        # Buckets in ascending value order: negatives (largest magnitude
+        # first), zero, then positives
+        neg_keys, neg_counts = self._negative.keys_and_counts()
+        pos_keys, pos_counts = self._positive.keys_and_counts()
+        values = np.concatenate([
+            -self._value(neg_keys[::-1]),
+            [0.0] if self.zero_count else [],
+            self._value(pos_keys),
+        ])
+        counts = np.concatenate([
+            neg_counts[::-1],
+            [self.zero_count] if self.zero_count else [],
+            pos_counts,
+        ])
+
+        cumulative = np.cumsum(counts)
+        ranks = np.clip(qs, 0, 1) * (self.count - 1)
+        index = np.searchsorted(cumulative, ranks, side='right')
+        estimates = values[np.minimum(index, values.size - 1)]
+        return np.clip(estimates, self.min, self.max)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a single quantile"""
+        return float(self.quantiles([q])[0])
+
+    def summary(self, percentiles=(1, 5, 10, 25, 50, 75, 90, 95, 99),
+                scale: Optional[float] = None) -> dict:
+        """
+        Summarize the sketch in the same form as summarize_distribution
+
+        Args:
+            percentiles: Percentiles to report
+            scale: Positive factor applied to every reported value (e.g.
+                1 / shares outstanding for per-share figures)
+
+        Returns:
+            dict: Mean, median, std, 95% interval and requested percentiles
+        """
+        scale = 1.0 if scale is None else scale
+        points = self.quantiles(np.array([2.5, 50, 97.5, *percentiles]) / 100) * scale
+
+        if self.count == 0:
+            mean = std = float('nan')
+        else:
+            mean, std = self.mean * scale, self.std * scale
+
+        return {
+            'mean': float(mean),
+            'median': float(points[1]),
+            'std': float(std),
+            'ci_lower': float(points[0]),
+            'ci_upper': float(points[2]),
+            'percentiles': {f'p{p:g}': float(v) for p, v in zip(percentiles, points[3:])},
+        }
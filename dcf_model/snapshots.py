@@ -0,0 +1,265 @@
+"""
+On-disk snapshot store for company financial data
+
+Each snapshot holds one ticker's info and statements as of a given date and
+is written as a single NumPy .npz file at <root>/<TICKER>/<YYYY-MM-DD>.npz.
+Statements are stored column-wise (a float value matrix plus line-item and
+period labels), so loading a snapshot is a few array reads with no network.
+A daily closing price history can be stored alongside for backtesting.
+
+Snapshots are refreshed from a live provider with:
+
+    python -m dcf_model.snapshots refresh AAPL MSFT --root data/snapshots
+"""
+
+from datetime import date
+from typing import List, Optional
+import argparse
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from .providers import DataProvider, FinancialData, YahooFinanceProvider
+from .scheduler import FetchScheduler
+
+logger = logging.getLogger(__name__)
+
+STATEMENTS = ('balance_sheet', 'cash_flow', 'income_stmt')
+
+
+def _encode_statement(df: Optional[pd.DataFrame]) -> dict:
+    """Split a statement into value, line-item and period arrays"""
+    if df is None or df.empty:
+        return {}
+
+    columns = [c.strftime('%Y-%m-%d') if hasattr(c, 'strftime') else str(c) for c in df.columns]
+    return {
+        'values': df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float),
+        'index': np.array([str(i) for i in df.index]),
+        'columns': np.array(columns),
+    }
+
+
+def _decode_statement(arrays: dict) -> Optional[pd.DataFrame]:
+    """Rebuild a statement from its value, line-item and period arrays"""
+    if not arrays:
+        return None
+
+    columns = pd.to_datetime(arrays['columns'], errors='coerce')
+    if columns.isna().any():
+        columns = arrays['columns']
+    return pd.DataFrame(arrays['values'], index=arrays['index'], columns=columns)
+
+
+def _encode_prices(prices: Optional[pd.Series]) -> dict:
+    """Split a closing price series into date and value arrays"""
+    if prices is None or prices.empty:
+        return {}
+
+    index = pd.DatetimeIndex(prices.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return {
+        'dates': index.to_numpy(dtype='datetime64[D]'),
+        'values': pd.to_numeric(prices, errors='coerce').to_numpy(dtype=float),
+    }
+
+
+def _decode_prices(arrays: dict) -> Optional[pd.Series]:
+    """Rebuild a closing price series from its date and value arrays"""
+    if not arrays:
+        return None
+    return pd.Series(arrays['values'], index=pd.DatetimeIndex(arrays['dates']), name='Close')
+
+
+class SnapshotStore:
+    """Directory of per-ticker, per-date financial data snapshots"""
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Directory holding the snapshots
+        """
+        self.root = root
+
+    def _ticker_dir(self, ticker: str) -> str:
+        if not ticker or ticker.startswith('.') or '/' in ticker or '\\' in ticker:
+            raise ValueError(f"Invalid ticker symbol: {ticker!r}")
+        return os.path.join(self.root, ticker.upper())
+
+    def path(self, ticker: str, as_of: str) -> str:
+        """Path of the snapshot for a ticker and as-of date"""
+        return os.path.join(self._ticker_dir(ticker), f"{as_of}.npz")
+
+    def list_dates(self, ticker: str) -> List[str]:
+        """
+        List available as-of dates for a ticker
+
+        Args:
+            ticker: Company stock ticker symbol
+
+        Returns:
+            List[str]: ISO dates, oldest first
+        """
+        directory = self._ticker_dir(ticker)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(directory) if name.endswith('.npz'))
+
+    def save(self, data: FinancialData, as_of: Optional[str] = None) -> str:
+        """
+        Write a snapshot
+
+        Args:
+            data: Company info and statements
+            as_of: ISO date of the snapshot (defaults to data.as_of or today)
+
+        Returns:
+            str: Path of the written file
+        """
+        as_of = as_of or data.as_of or date.today().isoformat()
+        arrays = {'info': np.array(json.dumps(data.info or {}, default=str))}
+        for name in STATEMENTS:
+            for key, value in _encode_statement(getattr(data, name)).items():
+                arrays[f"{name}__{key}"] = value
+        for key, value in _encode_prices(data.prices).items():
+            arrays[f"prices__{key}"] = value
+
+        path = self.path(data.ticker, as_of)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial snapshot
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+        logger.info(f"Saved snapshot for {data.ticker} as of {as_of}")
+        return path
+
+    def load(self, ticker: str, as_of: Optional[str] = None) -> FinancialData:
+        """
+        Load the latest snapshot on or before a date
+
+        Args:
+            ticker: Company stock ticker symbol
+            as_of: ISO date (defaults to the latest snapshot)
+
+        Returns:
+            FinancialData: Company info and statements
+
+        Raises:
+            FileNotFoundError: If no snapshot exists for the ticker and date
+        """
+        dates = [d for d in self.list_dates(ticker) if as_of is None or d <= as_of]
+        if not dates:
+            raise FileNotFoundError(f"No snapshot for {ticker}" + (f" as of {as_of}" if as_of else ""))
+
+        snapshot_date = dates[-1]
+        with np.load(self.path(ticker, snapshot_date), allow_pickle=False) as npz:
+            statements = {name: {} for name in STATEMENTS}
+            prices = {}
+            for key in npz.files:
+                if '__' in key:
+                    name, part = key.split('__', 1)
+                    (prices if name == 'prices' else statements[name])[part] = npz[key]
+            info = json.loads(str(npz['info']))
+
+        return FinancialData(
+            ticker=ticker,
+            info=info,
+            as_of=snapshot_date,
+            prices=_decode_prices(prices),
+            **{name: _decode_statement(arrays) for name, arrays in statements.items()},
+        )
+
+
+class SnapshotProvider(DataProvider):
+    """Serve company data from a SnapshotStore, optionally falling back to another provider"""
+
+    def __init__(self, store: SnapshotStore, as_of: Optional[str] = None,
+                 fallback: Optional[DataProvider] = None):
+        """
+        Args:
+            store: Snapshot store to read from
+            as_of: Use the latest snapshot on or before this ISO date
+            fallback: Provider used when no snapshot exists
+        """
+        self.store = store
+        self.as_of = as_of
+        self.fallback = fallback
+
+    def fetch(self, ticker: str) -> FinancialData:
+        try:
+            return self.store.load(ticker, self.as_of)
+        except FileNotFoundError:
+            if self.fallback is None:
+                raise
+            logger.info(f"No snapshot for {ticker}, using fallback provider")
+            return self.fallback.fetch(ticker)
+
+    def fetch_prices(self, ticker: str):
+        try:
+            return self.store.load(ticker, self.as_of).prices
+        except FileNotFoundError:
+            if self.fallback is None:
+                raise
+            return self.fallback.fetch_prices(ticker)
+
+
+def refresh(store: SnapshotStore, tickers: List[str],
+            provider: Optional[DataProvider] = None,
+            as_of: Optional[str] = None, prices: bool = False) -> List[str]:
+    """
+    Fetch fresh data for tickers and write snapshots
+
+    Args:
+        store: Snapshot store to write to
+        tickers: Ticker symbols to refresh
+        provider: Source of fresh data (defaults to rate-limited, retried
+            Yahoo Finance fetches)
+        as_of: ISO date of the snapshots (defaults to today)
+        prices: Also store the daily closing price history
+
+    Returns:
+        List[str]: Tickers that failed to refresh
+    """
+    # Snapshots must hold fresh data only, so never serve stale copies here
+    provider = provider or FetchScheduler(YahooFinanceProvider(pool_size=1), stale_ttl=0)
+    failed = []
+    for ticker in tickers:
+        try:
+            data = provider.fetch(ticker)
+            if prices and data.prices is None:
+                data.prices = provider.fetch_prices(ticker)
+            store.save(data, as_of)
+        except Exception as e:
+            logger.error(f"Error refreshing snapshot for {ticker}: {str(e)}")
+            failed.append(ticker)
+    return failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage financial data snapshots")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    refresh_parser = subparsers.add_parser('refresh', help="Fetch and store fresh snapshots")
+    refresh_parser.add_argument('tickers', nargs='+', help="Ticker symbols")
+    refresh_parser.add_argument('--root', default=os.environ.get('DCF_SNAPSHOT_DIR', 'snapshots'),
+                                help="Snapshot directory")
+    refresh_parser.add_argument('--as-of', help="Snapshot date (YYYY-MM-DD, default today)")
+    refresh_parser.add_argument('--prices', action='store_true',
+                                help="Also store the daily closing price history (for backtests)")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    failed = refresh(SnapshotStore(args.root), args.tickers, as_of=args.as_of, prices=args.prices)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
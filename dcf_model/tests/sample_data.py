@@ -0,0 +1,79 @@
+"""Small in-memory company data for tests"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dcf_model.providers import DataProvider, FinancialData
+
+
+def sample_company(ticker, price=100.0, operating_cash_flow=1.2e9, prices=False):
+    """
+    Company data with enough info and statements for every valuation path
+
+    Args:
+        ticker: Ticker symbol
+        price: Current share price
+        operating_cash_flow: Most recent operating cash flow
+        prices: Include a short daily closing price history
+    """
+    periods = pd.to_datetime(['2024-12-31', '2023-12-31'])
+    cash_flow = pd.DataFrame(
+        [[operating_cash_flow, operating_cash_flow * 0.9], [-2.0e8, -1.5e8]],
+        index=['Operating Cash Flow', 'Capital Expenditure'], columns=periods
+    )
+    balance_sheet = pd.DataFrame(
+        [[5.0e8, np.nan], [2.0e8, 1.8e8]],
+        index=['Total Debt', 'Cash And Cash Equivalents'], columns=periods
+    )
+    history = None
+    if prices:
+        dates = pd.date_range('2024-12-02', periods=5, freq='B')
+        history = pd.Series([price * 0.98, price * 0.99, np.nan, price * 1.01, price],
+                            index=dates, name='Close')
+    return FinancialData(
+        ticker=ticker, cash_flow=cash_flow, balance_sheet=balance_sheet, as_of='2025-01-02',
+        prices=history, info={
+            'currentPrice': price, 'sharesOutstanding': 1e8, 'marketCap': price * 1e8,
+            'beta': 1.1, 'totalDebt': 5e8, 'totalCash': 2e8, 'shortName': f'{ticker} Corp',
+            'sector': 'Technology'
+        }
+    )
+
+
+class SampleProvider(DataProvider):
+    """
+    Serve sample companies and count the fetches
+
+    Unknown tickers raise LookupError, like the live providers.
+    """
+
+    def __init__(self, companies=None, delay=0.0):
+        """
+        Args:
+            companies: FinancialData to serve (defaults to AAPL and MSFT samples)
+            delay: Seconds each fetch takes
+        """
+        companies = companies or [sample_company('AAPL', 150.0), sample_company('MSFT', 300.0)]
+        self.companies = {data.ticker: data for data in companies}
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _get(self, kind, ticker):
+        with self._lock:
+            self.calls.append((kind, ticker))
+        if self.delay:
+            time.sleep(self.delay)
+        data = self.companies.get(ticker.upper())
+        if data is None:
+            raise LookupError(f"No data for {ticker}")
+        return data
+
+    def fetch(self, ticker):
+        return self._get('fetch', ticker)
+
+    def fetch_prices(self, ticker):
+        return self._get('prices', ticker).prices
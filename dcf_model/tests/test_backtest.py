@@ -0,0 +1,124 @@
+"""Point-in-time backtest: price lookups and no look-ahead"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dcf_model.backtest import PriceIndex, backtest, to_frame
+from dcf_model.providers import FinancialData
+
+PERIODS = pd.to_datetime(['2023-12-31', '2022-12-31', '2021-12-31'])
+
+
+def daily_prices(start, end, first, step):
+    dates = pd.date_range(start, end, freq='D')
+    return pd.Series(first + step * np.arange(len(dates)), index=dates, name='Close')
+
+
+def company(ticker, operating_cash_flow=(1.3e9, 1.2e9, 1.1e9), prices=None):
+    cash_flow = pd.DataFrame([list(operating_cash_flow), [-2e8, -2e8, -2e8]],
+                             index=['Operating Cash Flow', 'Capital Expenditure'], columns=PERIODS)
+    balance_sheet = pd.DataFrame([[5e8, 4e8, 3e8], [2e8, 2e8, 2e8], [1e8, 1e8, 1e8]],
+                                 index=['Total Debt', 'Cash And Cash Equivalents', 'Ordinary Shares Number'],
+                                 columns=PERIODS)
+    return FinancialData(ticker=ticker, cash_flow=cash_flow, balance_sheet=balance_sheet,
+                         info={'beta': 1.1, 'sharesOutstanding': 1e8}, prices=prices)
+
+
+def day(value):
+    return np.datetime64(value, 'D')
+
+
+@pytest.fixture
+def index():
+    return PriceIndex([
+        daily_prices('2022-01-01', '2022-12-31', 10.0, 1.0),
+        None,
+        pd.Series([50.0, np.nan, 52.0], index=pd.to_datetime(['2023-01-05', '2023-01-04', '2023-01-02'])),
+        daily_prices('2021-06-01', '2024-06-01', 100.0, 0.5),
+    ])
+
+
+def test_lookup_uses_the_last_price_on_or_before_the_date(index):
+    assert index.lookup(0, day('2022-01-01')) == 10.0
+    assert index.lookup(0, day('2022-01-11')) == 20.0
+    # Unsorted input is sorted and NaN prices are skipped
+    assert index.lookup(2, day('2023-01-03')) == 52.0
+    assert index.lookup(2, day('2023-01-04')) == 52.0
+    assert index.lookup(2, day('2023-01-05')) == 50.0
+
+
+def test_lookup_never_crosses_into_another_tickers_prices(index):
+    # Before ticker 2's first price the previous key belongs to ticker 0
+    assert np.isnan(index.lookup(2, day('2023-01-01')))
+    # After ticker 0's last price the next ticker's prices follow in the key order
+    assert np.isnan(index.lookup(0, day('2023-01-03')))
+    assert np.isnan(index.lookup(0, day('2021-12-31')))
+    assert np.isnan(index.lookup(1, day('2022-06-01')))
+
+
+def test_lookup_broadcasts_and_handles_missing_dates(index):
+    dates = np.array([day('2022-01-02'), np.datetime64('NaT'), day('2024-06-01')])
+    prices = index.lookup(np.array([[0], [3]]), dates)
+
+    assert prices.shape == (2, 3)
+    assert prices[0, 0] == 11.0 and np.isnan(prices[0, 1]) and np.isnan(prices[0, 2])
+    assert prices[1, 2] == 100.0 + 0.5 * (day('2024-06-01') - day('2021-06-01')).astype(int)
+
+
+def test_empty_index():
+    assert np.isnan(PriceIndex([None]).lookup(0, day('2022-01-01')))
+
+
+@pytest.fixture
+def companies():
+    prices = daily_prices('2021-01-01', '2025-06-30', 80.0, 0.05)
+    return [company('AAA', prices=prices),
+            company('BBB', (9e8, 1.0e9, 1.1e9), prices=prices * 0.5)]
+
+
+def test_prices_and_returns_come_from_the_signal_date(companies):
+    # Periods are ordered oldest first
+    results = backtest(companies, horizons=[30, 365, 730], reporting_lag=90)
+    prices = companies[0].prices
+
+    signal = pd.Timestamp('2022-12-31') + pd.Timedelta(days=90)
+    assert results['signal_date'][0, 1] == day('2023-03-31')
+    assert results['price'][0, 1] == prices[signal]
+    expected_return = prices[signal + pd.Timedelta(days=365)] / prices[signal] - 1
+    assert results['forward_returns'][0, 1, 1] == pytest.approx(expected_return)
+    # The latest period's two-year horizon runs past the price history
+    assert np.isfinite(results['forward_returns'][0, -1, 1])
+    assert np.isnan(results['forward_returns'][0, -1, 2])
+
+
+def test_no_look_ahead(companies):
+    base = backtest(companies)
+
+    # Later statements and later prices leave earlier valuations unchanged
+    changed = [company('AAA', (5e9, 1.2e9, 1.1e9), prices=companies[0].prices.copy()), companies[1]]
+    signal = pd.Timestamp('2022-12-31') + pd.Timedelta(days=90)
+    changed[0].prices[changed[0].prices.index > signal] *= 3
+    results = backtest(changed)
+
+    np.testing.assert_array_equal(results['per_share_value'][0, :2], base['per_share_value'][0, :2])
+    np.testing.assert_array_equal(results['margin_of_safety'][0, :2], base['margin_of_safety'][0, :2])
+    assert results['per_share_value'][0, -1] != base['per_share_value'][0, -1]
+    np.testing.assert_array_equal(results['per_share_value'][1], base['per_share_value'][1])
+
+
+def test_summary_and_frame(companies):
+    results = backtest(companies, horizons=[91])
+    summary = results['summary']['91d']
+    frame = to_frame(results)
+
+    assert summary['observations'] == 6
+    assert -1 <= summary['information_coefficient'] <= 1
+    assert len(frame) == 6 and list(frame['ticker']) == ['AAA'] * 3 + ['BBB'] * 3
+    assert frame['return_91d'].notna().all()
+
+
+@pytest.mark.parametrize('kwargs', [{'horizons': [0]}, {'growth_rates': [0.05]}])
+def test_invalid_arguments(companies, kwargs):
+    with pytest.raises(ValueError):
+        backtest(companies, **kwargs)
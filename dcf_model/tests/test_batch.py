@@ -0,0 +1,87 @@
+"""Batch valuation parity with DCFModel and concurrent fetching"""
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from dcf_model.batch import analyze_batch, fetch_many, value_batch
+from dcf_model.dcf import DCFModel
+
+from .sample_data import SampleProvider, sample_company
+
+
+def companies():
+    no_beta = sample_company('NOB', 40.0, operating_cash_flow=3e8)
+    no_beta.info = {k: v for k, v in no_beta.info.items() if k not in ('beta', 'totalCash')}
+    return [sample_company('AAPL', 150.0), sample_company('MSFT', 300.0, 2.5e9),
+            replace(sample_company('NEG', 20.0, -4e8), stale=True, error='HTTP 503'), no_beta]
+
+
+PARAMS = [
+    {},
+    {'terminal_growth': 0.025, 'risk_free_rate': 0.04, 'market_risk_premium': 0.06, 'tax_rate': 0.25},
+    {'forecast_years': 3, 'growth_rates': [0.12, 0.08, 0.04]},
+]
+
+
+@pytest.mark.parametrize('params', PARAMS)
+def test_batch_matches_run_analysis(params):
+    data = companies()
+    batch = value_batch(data, **params)
+    provider = SampleProvider(data)
+
+    for company in data:
+        model = DCFModel(company.ticker, provider=provider,
+                         **{k: v for k, v in params.items() if k not in ('forecast_years', 'growth_rates')})
+        if 'growth_rates' in params:
+            model.set_growth_rates(params['growth_rates'])
+        expected = model.run_analysis()
+        result = batch[company.ticker]
+
+        for field in ('enterprise_value', 'equity_value', 'terminal_value', 'wacc', 'per_share_value',
+                      'beta', 'market_cap', 'total_debt', 'cash'):
+            assert result[field] == pytest.approx(expected[field], rel=1e-12), field
+        for field in ('forecast_years', 'current_price', 'stale', 'fallback', 'data_error'):
+            assert result[field] == expected[field], field
+        assert result['growth_rates'] == pytest.approx(expected['growth_rates'])
+        np.testing.assert_allclose(result['forecast_cash_flows'], model.forecast_cash_flows()[0])
+
+
+def test_empty_batch():
+    assert value_batch([]) == {}
+
+
+def test_fetch_many_collects_errors_and_reports_progress():
+    provider = SampleProvider()
+    progress = []
+
+    fetched, errors = fetch_many(provider, ['AAPL', 'ZZZZ', 'MSFT', 'AAPL'], max_workers=2,
+                                 progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert set(fetched) == {'AAPL', 'MSFT'}
+    assert list(errors) == ['ZZZZ'] and 'ZZZZ' in errors['ZZZZ']
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert sorted(provider.calls) == [('fetch', 'AAPL'), ('fetch', 'MSFT'), ('fetch', 'ZZZZ')]
+
+
+def test_raising_from_the_progress_callback_cancels_remaining_fetches():
+    tickers = [f'T{i}' for i in range(20)]
+    provider = SampleProvider([sample_company(ticker) for ticker in tickers], delay=0.01)
+
+    def cancel(done, total):
+        if done == 2:
+            raise RuntimeError('cancelled')
+
+    with pytest.raises(RuntimeError):
+        fetch_many(provider, tickers, max_workers=2, progress_callback=cancel)
+
+    assert len(provider.calls) < len(tickers)
+
+
+def test_analyze_batch_values_what_was_fetched():
+    results, errors = analyze_batch(SampleProvider(), ['AAPL', 'MSFT', 'ZZZZ'], terminal_growth=0.02)
+
+    assert set(results) == {'AAPL', 'MSFT'} and set(errors) == {'ZZZZ'}
+    expected = DCFModel('AAPL', provider=SampleProvider(), terminal_growth=0.02).run_analysis()
+    assert results['AAPL']['per_share_value'] == pytest.approx(expected['per_share_value'])
@@ -0,0 +1,86 @@
+"""Chunked cleaning: parity with clean_financial_data and the two-pass bounds"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dcf_model.cleaning import clean_in_chunks, compute_clip_bounds
+from dcf_model.utils import clean_financial_data
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    rows = 5000
+    df = pd.DataFrame({
+        'revenue': rng.lognormal(20, 1, rows),
+        'margin': rng.standard_t(3, rows),
+        'shares': rng.integers(1_000, 1_000_000, rows),
+        'sector': rng.choice(['Tech', 'Energy'], rows),
+    })
+    df.loc[rng.choice(rows, 200, replace=False), 'margin'] = np.nan
+    df.loc[[10, 20], 'revenue'] = [1e15, -1e15]
+    return df
+
+
+def reference_clean(df):
+    """The original in-memory rules: fill with 0, clip to mean +/- 3 sample std"""
+    df = df.fillna(0)
+    for col in df.columns:
+        if df[col].dtype in ['float64', 'int64']:
+            mean, std = df[col].mean(), df[col].std()
+            df[col] = df[col].clip(lower=mean - 3 * std, upper=mean + 3 * std)
+    return df
+
+
+def chunked(df, size):
+    return lambda: (df.iloc[start:start + size] for start in range(0, len(df), size))
+
+
+def test_in_memory_cleaning_keeps_the_original_rules(frame):
+    pd.testing.assert_frame_equal(clean_financial_data(frame), reference_clean(frame))
+
+
+@pytest.mark.parametrize('chunk_size', [100, 333, 5000])
+def test_chunked_cleaning_matches_in_memory(frame, chunk_size):
+    chunks = []
+    clean_in_chunks(chunked(frame, chunk_size), chunks.append)
+
+    cleaned = pd.concat(chunks)
+    expected = clean_financial_data(frame)
+    pd.testing.assert_frame_equal(cleaned, expected, check_exact=False, rtol=1e-9)
+    assert cleaned['revenue'].max() < 1e15 and cleaned['margin'].notna().all()
+
+
+def test_bounds_do_not_depend_on_chunking(frame):
+    whole = compute_clip_bounds([frame])
+    split = compute_clip_bounds(chunked(frame, 7)())
+
+    assert set(whole) == {'revenue', 'margin', 'shares'}
+    for col, (lower, upper) in whole.items():
+        assert split[col] == pytest.approx((lower, upper), rel=1e-9)
+
+
+def test_csv_source_and_sink(frame, tmp_path):
+    source, sink = tmp_path / 'in.csv', tmp_path / 'out.csv'
+    frame.to_csv(source, index=False)
+
+    bounds = clean_in_chunks(str(source), str(sink), chunk_size=700)
+
+    cleaned = pd.read_csv(sink)
+    assert len(cleaned) == len(frame)
+    lower, upper = bounds['margin']
+    assert cleaned['margin'].between(lower, upper).all()
+    pd.testing.assert_series_equal(cleaned['sector'], frame['sector'])
+
+
+def test_robust_bounds_ignore_the_outliers(frame):
+    robust = compute_clip_bounds(chunked(frame, 1000)(), method='robust')
+    moments = compute_clip_bounds([frame])
+
+    lower, upper = robust['revenue']
+    assert lower < np.median(frame['revenue']) < upper
+    assert upper - lower < (moments['revenue'][1] - moments['revenue'][0]) / 100
+
+    with pytest.raises(ValueError):
+        compute_clip_bounds([frame], method='winsorize')
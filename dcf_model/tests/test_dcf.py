@@ -0,0 +1,123 @@
+"""DCFModel: memoized valuation graph and the sensitivity grid"""
+
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from dcf_model.dcf import VALUATION_GRAPH, DCFModel
+
+from .sample_data import SampleProvider
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """Count calls to each _compute_<node> method"""
+    counts = Counter()
+    for node in VALUATION_GRAPH:
+        method = getattr(DCFModel, f'_compute_{node}')
+
+        def counted(self, _node=node, _method=method):
+            counts[_node] += 1
+            return _method(self)
+
+        monkeypatch.setattr(DCFModel, f'_compute_{node}', counted)
+    return counts
+
+
+def model(**params):
+    return DCFModel('AAPL', provider=SampleProvider(), **params)
+
+
+def test_repeated_analysis_reuses_every_node(computed):
+    dcf = model()
+    first = dcf.run_analysis()
+    assert set(computed) == set(VALUATION_GRAPH)
+    assert all(count == 1 for count in computed.values())
+
+    computed.clear()
+    assert dcf.run_analysis() == first
+    assert not computed
+
+
+def test_changing_an_input_recomputes_only_its_dependents(computed):
+    dcf = model()
+    dcf.run_analysis()
+    computed.clear()
+
+    dcf.terminal_growth = 0.025
+    results = dcf.run_analysis()
+
+    assert set(computed) == {'terminal_value', 'pv_terminal'}
+    assert results == model(terminal_growth=0.025).run_analysis()
+
+
+def test_changing_wacc_inputs_keeps_the_forecast(computed):
+    dcf = model()
+    dcf.run_analysis()
+    computed.clear()
+
+    dcf.beta = 1.4
+    results = dcf.run_analysis()
+
+    assert set(computed) == {'wacc', 'discount_factors', 'pv_fcf', 'terminal_value', 'pv_terminal'}
+    fresh = model()
+    fresh.beta = 1.4
+    assert results == fresh.run_analysis()
+
+
+def test_custom_growth_path_invalidates_the_forecast(computed):
+    dcf = model()
+    dcf.run_analysis()
+    computed.clear()
+
+    dcf.set_growth_rates([0.1, 0.08, 0.06])
+    results = dcf.run_analysis()
+
+    assert computed['growth_rates'] == 1 and computed['forecast_fcf'] == 1
+    assert results['forecast_years'] == 3
+    assert results['growth_rates'] == [0.1, 0.08, 0.06]
+
+    dcf.set_growth_rates(None)
+    dcf.forecast_years = 5
+    assert dcf.run_analysis() == model().run_analysis()
+
+
+def test_clone_starts_from_the_memo_and_stays_independent(computed):
+    dcf = model()
+    base = dcf.run_analysis()
+    computed.clear()
+
+    copy = dcf.clone(terminal_growth=0.02)
+    cloned = copy.run_analysis()
+
+    assert set(computed) == {'terminal_value', 'pv_terminal'}
+    assert cloned == model(terminal_growth=0.02).run_analysis()
+    assert dcf.terminal_growth == 0.03 and dcf.run_analysis() == base
+
+
+def test_sensitivity_grid_cells_match_run_analysis():
+    dcf = model()
+    betas = [0.8, 1.1, 1.6]
+    growth_values = [0.01, 0.025, 0.04]
+    wacc_values = [dcf.clone(beta=beta).calculate_wacc() for beta in betas]
+
+    grid = dcf.sensitivity_grid(wacc_values, growth_values)
+
+    assert grid['per_share_value'].shape == (3, 3)
+    for i, beta in enumerate(betas):
+        for j, terminal_growth in enumerate(growth_values):
+            expected = dcf.clone(beta=beta, terminal_growth=terminal_growth).run_analysis()
+            for field in ('enterprise_value', 'equity_value', 'per_share_value'):
+                assert grid[field][i, j] == pytest.approx(expected[field], rel=1e-12)
+
+
+def test_sensitivity_grid_defaults_and_divergent_cells():
+    dcf = model()
+    grid = dcf.sensitivity_grid()
+
+    assert grid['wacc_values'][4] == pytest.approx(dcf.calculate_wacc())
+    assert grid['growth_values'] == pytest.approx(np.arange(0.01, 0.0501, 0.005))
+    assert np.isnan(dcf.sensitivity_grid([0.03], [0.03, 0.04])['per_share_value']).all()
+    with pytest.raises(ValueError):
+        dcf.sensitivity_grid([[0.08]], [0.02])
@@ -0,0 +1,92 @@
+"""FinancialPanel alignment and the batched ratio functions"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dcf_model.utils import (
+    FinancialPanel, batch_capex_ratio, batch_debt_ratio, batch_ebit_margin,
+    batch_interest_coverage_ratio, batch_working_capital_ratio, calculate_capex_ratio,
+    calculate_debt_ratio, calculate_ebit_margin, calculate_interest_coverage_ratio,
+    calculate_working_capital_ratio
+)
+
+from .sample_data import sample_company
+
+ITEMS = ['Total Revenue', 'EBIT', 'Interest Expense', 'Capital Expenditure',
+         'Working Capital', 'Total Debt', 'Total Assets']
+
+
+def statements(seed, num_periods):
+    """Periods x line items, oldest first, in the scalar ratio functions' layout"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-12-31', periods=num_periods, freq='YE')
+    values = rng.uniform(1e8, 1e9, size=(num_periods, len(ITEMS)))
+    values[:, ITEMS.index('Capital Expenditure')] *= -1
+    return pd.DataFrame(values, index=index, columns=ITEMS)
+
+
+@pytest.fixture
+def frames():
+    return {'AAA': statements(1, 4), 'BBB': statements(2, 2), 'CCC': statements(3, 4)}
+
+
+def test_short_histories_are_padded_at_the_oldest_end(frames):
+    panel = FinancialPanel.from_frames(frames)
+
+    assert panel.values.shape == (3, 4, len(ITEMS))
+    revenue = panel.item('Total Revenue')
+    np.testing.assert_array_equal(revenue[1, 2:], frames['BBB']['Total Revenue'].to_numpy())
+    assert np.isnan(revenue[1, :2]).all()
+    pd.testing.assert_frame_equal(panel.ticker('AAA'), frames['AAA'], check_freq=False,
+                                  check_index_type=False)
+    assert np.isnan(panel.item('Goodwill')).all()
+
+
+def test_num_periods_keeps_the_most_recent(frames):
+    panel = FinancialPanel.from_frames(frames, items=['EBIT'], num_periods=2)
+
+    assert panel.values.shape == (3, 2, 1)
+    np.testing.assert_array_equal(panel.item('EBIT')[0], frames['AAA']['EBIT'].to_numpy()[-2:])
+
+
+def test_batched_ratios_match_the_scalar_functions(frames):
+    panel = FinancialPanel.from_frames(frames)
+    batched = {
+        'ebit_margin': panel.latest(batch_ebit_margin(panel)),
+        'capex': panel.latest(batch_capex_ratio(panel)),
+        'working_capital': panel.latest(batch_working_capital_ratio(panel)),
+        'debt': panel.latest(batch_debt_ratio(panel)),
+        'interest_coverage': panel.latest(batch_interest_coverage_ratio(panel)),
+    }
+
+    for i, df in enumerate(frames.values()):
+        assert batched['ebit_margin'][i] == pytest.approx(calculate_ebit_margin(df))
+        assert batched['capex'][i] == pytest.approx(calculate_capex_ratio(df, df))
+        assert batched['working_capital'][i] == pytest.approx(calculate_working_capital_ratio(df, df))
+        assert batched['debt'][i] == pytest.approx(calculate_debt_ratio(df))
+        assert batched['interest_coverage'][i] == pytest.approx(calculate_interest_coverage_ratio(df))
+
+
+def test_ratios_are_nan_where_the_scalar_functions_raise(frames):
+    frames['BBB'].loc[frames['BBB'].index[-1], 'Total Revenue'] = 0.0
+    panel = FinancialPanel.from_frames(frames)
+
+    with pytest.raises(ValueError):
+        calculate_ebit_margin(frames['BBB'])
+    margins = panel.latest(batch_ebit_margin(panel))
+    assert np.isnan(margins[1]) and np.isfinite(margins[[0, 2]]).all()
+    # padded periods stay NaN rather than dividing by missing values
+    assert np.isnan(batch_ebit_margin(panel)[1, :2]).all()
+
+
+def test_statements_are_merged_per_ticker():
+    companies = [sample_company('AAPL', operating_cash_flow=1.2e9),
+                 sample_company('MSFT', operating_cash_flow=2.0e9)]
+    panel = FinancialPanel.from_financial_data(companies)
+
+    assert panel.tickers == ['AAPL', 'MSFT'] and panel.num_periods == 2
+    np.testing.assert_array_equal(panel.latest(panel.item('Operating Cash Flow')), [1.2e9, 2.0e9])
+    np.testing.assert_array_equal(panel.item('Capital Expenditure')[0], [-1.5e8, -2.0e8])
+    assert np.isnan(panel.item('Total Debt')[0, 0]) and panel.item('Total Debt')[0, 1] == 5.0e8
+    assert panel.period_dates[0, -1] == np.datetime64('2024-12-31')
@@ -0,0 +1,79 @@
+"""
+Multi-process Monte Carlo: results do not depend on the number of workers
+
+Worker processes start through forkserver (or spawn), which imports this
+module's package afresh in each worker, so everything the workers run lives
+in dcf_model and nothing here runs at import time. The pool fixture shuts
+the shared pool down once the module's tests are done.
+"""
+
+import numpy as np
+import pytest
+
+from dcf_model import parallel
+from dcf_model.dcf import DCFModel
+
+from .sample_data import SampleProvider
+
+CHUNK_SIZE = 1000
+
+
+@pytest.fixture(scope='module', autouse=True)
+def pool():
+    yield
+    parallel.shutdown_pool()
+
+
+@pytest.fixture(scope='module')
+def model():
+    return DCFModel('AAPL', provider=SampleProvider())
+
+
+def simulate(model, workers, **kwargs):
+    return model.monte_carlo_simulation(5500, seed=11, chunk_size=CHUNK_SIZE, workers=workers, **kwargs)
+
+
+def without_values(results):
+    return {key: value for key, value in results.items() if key != 'values'}
+
+
+@pytest.mark.parametrize('sampling', ['random', 'sobol'])
+def test_values_are_the_same_for_any_number_of_workers(model, sampling):
+    runs = [simulate(model, workers, summary='exact', return_values=True, sampling=sampling)
+            for workers in (1, 2, 3)]
+
+    for run in runs[1:]:
+        np.testing.assert_array_equal(run['values'], runs[0]['values'])
+        assert without_values(run) == without_values(runs[0])
+
+
+def test_sketch_summaries_are_the_same_for_any_number_of_workers(model):
+    runs = [simulate(model, workers, summary='sketch') for workers in (1, 2, 3)]
+
+    assert runs[1] == runs[0] and runs[2] == runs[0]
+
+
+def test_shared_memory_output_is_in_path_order(model):
+    expected = np.concatenate(list(model.iter_monte_carlo(5500, seed=11, chunk_size=CHUNK_SIZE)))
+
+    values = parallel.run_monte_carlo(model.simulation_inputs(), 5500, seed=11,
+                                      chunk_size=CHUNK_SIZE, workers=2)
+
+    np.testing.assert_array_equal(values, expected)
+
+
+def test_progress_reaches_the_total(model):
+    progress = []
+    parallel.run_monte_carlo(model.simulation_inputs(), 5500, seed=11, chunk_size=CHUNK_SIZE,
+                             workers=2, sketch=True,
+                             progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert progress[-1] == (5500, 5500)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+
+@pytest.mark.parametrize('kwargs', [{'num_simulations': 0}, {'chunk_size': 0}, {'workers': 0}])
+def test_invalid_runs_are_rejected(model, kwargs):
+    options = dict({'num_simulations': 100, 'chunk_size': 10, 'workers': 2}, **kwargs)
+    with pytest.raises(ValueError):
+        parallel.run_monte_carlo(model.simulation_inputs(), **options)
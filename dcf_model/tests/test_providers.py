@@ -0,0 +1,121 @@
+"""FinancialData record codec and CoalescingProvider single-flight"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dcf_model.providers import CoalescingProvider, SingleFlight, from_record, to_record
+
+from .sample_data import SampleProvider, sample_company
+
+
+def assert_same_data(actual, expected):
+    assert actual.ticker == expected.ticker
+    assert actual.info == expected.info
+    assert actual.as_of == expected.as_of
+    for name in ('balance_sheet', 'cash_flow'):
+        pd.testing.assert_frame_equal(getattr(actual, name), getattr(expected, name),
+                                      check_freq=False, check_column_type=False)
+    if expected.prices is None:
+        assert actual.prices is None
+    else:
+        pd.testing.assert_series_equal(actual.prices, expected.prices, check_freq=False,
+                                       check_index_type=False)
+
+
+def test_record_round_trip():
+    data = sample_company('AAPL', prices=True)
+
+    record = json.loads(json.dumps(to_record(data)))  # records must survive JSON
+    decoded = from_record('AAPL', record)
+
+    assert_same_data(decoded, data)
+    # NaN cells are written as null and read back as NaN
+    assert record['balance_sheet']['rows']['Total Debt'][1] is None
+    assert np.isnan(decoded.balance_sheet.loc['Total Debt'].iloc[1])
+
+
+def test_record_without_prices_or_statements():
+    data = sample_company('AAPL')
+    data.income_stmt = None
+
+    record = to_record(data)
+    decoded = from_record('AAPL', record)
+
+    assert 'prices' not in record and decoded.prices is None
+    assert record['income_stmt'] is None and decoded.income_stmt.empty
+
+
+def test_concurrent_fetches_share_one_upstream_call():
+    upstream = SampleProvider(delay=0.05)
+    provider = CoalescingProvider(upstream)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(provider.fetch, ['AAPL'] * 8))
+
+    assert upstream.calls == [('fetch', 'AAPL')]
+    assert all(result is results[0] for result in results)
+
+
+def test_different_tickers_are_fetched_separately():
+    upstream = SampleProvider(delay=0.02)
+    provider = CoalescingProvider(upstream)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(provider.fetch, ['AAPL', 'MSFT', 'aapl', 'MSFT']))
+
+    assert sorted(upstream.calls) == [('fetch', 'AAPL'), ('fetch', 'MSFT')]
+
+
+def test_results_are_not_cached_after_the_flight_lands():
+    upstream = SampleProvider()
+    provider = CoalescingProvider(upstream)
+
+    provider.fetch('AAPL')
+    provider.fetch('AAPL')
+
+    assert len(upstream.calls) == 2
+
+
+def test_fetch_prices_is_delegated_and_coalesced():
+    upstream = SampleProvider([sample_company('AAPL', prices=True)], delay=0.05)
+    provider = CoalescingProvider(upstream)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(provider.fetch_prices, ['AAPL'] * 4))
+
+    assert upstream.calls == [('prices', 'AAPL')]
+    assert results[0] is upstream.companies['AAPL'].prices
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        started.set()
+        release.wait()
+        raise LookupError('No data for ZZZZ')
+
+    def call():
+        with pytest.raises(LookupError):
+            flight.do('ZZZZ', failing)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    waiters = [threading.Thread(target=call) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    release.set()
+    for thread in [leader, *waiters]:
+        thread.join()
+
+    assert calls == [1]
@@ -0,0 +1,93 @@
+"""Reverse DCF: implied assumptions reproduce the target price"""
+
+import numpy as np
+import pytest
+
+from dcf_model.batch import batch_inputs, value_batch
+from dcf_model.dcf import DCFModel
+from dcf_model.reverse import reverse_dcf_batch, solve_implied
+from dcf_model.valuation import default_growth_rates, discounted_cash_flow, forecast_fcf
+
+from .sample_data import SampleProvider, sample_company
+
+COMPANIES = [sample_company('AAPL', 150.0), sample_company('MSFT', 300.0), sample_company('F', 200.0)]
+
+
+def per_share_at_wacc(company, wacc, terminal_growth=0.03):
+    """Per-share value of one company with the WACC overridden"""
+    inputs = batch_inputs([company])
+    fcf = forecast_fcf(inputs['base_fcf'], default_growth_rates(5))
+    enterprise_value = discounted_cash_flow(fcf, np.array([wacc]), terminal_growth)['enterprise_value']
+    equity_value = enterprise_value - inputs['total_debt'] + inputs['cash']
+    return float((equity_value / inputs['shares_outstanding'])[0])
+
+
+def test_implied_terminal_growth_reproduces_the_price():
+    results = reverse_dcf_batch(COMPANIES, solve_for='terminal_growth')
+
+    for company in COMPANIES:
+        result = results[company.ticker]
+        assert result['converged'] and result['iterations'] < 20
+        valued = value_batch([company], terminal_growth=result['implied_value'])[company.ticker]
+        assert valued['per_share_value'] == pytest.approx(company.info['currentPrice'], rel=1e-8)
+
+
+def test_implied_growth_reproduces_the_price():
+    results = reverse_dcf_batch(COMPANIES, solve_for='growth')
+
+    for company in COMPANIES:
+        growth = results[company.ticker]['implied_value']
+        valued = value_batch([company], growth_rates=[growth] * 5)[company.ticker]
+        assert valued['per_share_value'] == pytest.approx(company.info['currentPrice'], rel=1e-8)
+
+
+def test_implied_wacc_reproduces_the_price():
+    results = reverse_dcf_batch(COMPANIES, solve_for='wacc')
+
+    for company in COMPANIES:
+        wacc = results[company.ticker]['implied_value']
+        assert wacc > 0.03
+        assert per_share_at_wacc(company, wacc) == pytest.approx(company.info['currentPrice'], rel=1e-8)
+
+
+def test_target_prices_override_the_current_price():
+    results = reverse_dcf_batch(COMPANIES[:1], target_prices={'AAPL': 120.0})
+
+    implied = results['AAPL']['implied_value']
+    assert results['AAPL']['target_price'] == 120.0
+    assert value_batch(COMPANIES[:1], terminal_growth=implied)['AAPL']['per_share_value'] == pytest.approx(120.0)
+
+
+@pytest.mark.parametrize('price', [1e6, 0.0])
+def test_unreachable_targets_are_nan_and_not_converged(price):
+    results = reverse_dcf_batch(COMPANIES, solve_for='growth', target_prices={'F': price})
+
+    assert np.isnan(results['F']['implied_value'])
+    assert results['F']['converged'] is False
+    assert results['AAPL']['converged'] and results['MSFT']['converged']
+
+
+@pytest.mark.parametrize('solve_for', ['terminal_growth', 'growth', 'wacc'])
+def test_batch_matches_the_model(solve_for):
+    batch = reverse_dcf_batch(COMPANIES, solve_for=solve_for)
+    provider = SampleProvider(COMPANIES)
+
+    for company in COMPANIES:
+        single = DCFModel(company.ticker, provider=provider).reverse_dcf(solve_for=solve_for)
+        assert single['converged']
+        assert single['implied_value'] == pytest.approx(batch[company.ticker]['implied_value'], rel=1e-9)
+        assert single['assumed_value'] == pytest.approx(batch[company.ticker]['assumed_value'])
+
+
+def test_model_reports_none_when_unreachable():
+    result = DCFModel('F', provider=SampleProvider(COMPANIES)).reverse_dcf('growth', target_price=1e6)
+    assert result['implied_value'] is None and result['converged'] is False
+
+
+def test_solver_broadcasts_and_rejects_unknown_unknowns():
+    targets = np.array([[1e10, 2e10], [3e10, 4e10]])
+    solution = solve_implied(targets, 1e9, [0.05] * 5, 0.09, 0.02, solve_for='terminal_growth')
+    assert solution['value'].shape == (2, 2) and solution['converged'].all()
+
+    with pytest.raises(ValueError):
+        solve_implied(1e10, 1e9, [0.05] * 5, 0.09, 0.02, solve_for='beta')
@@ -0,0 +1,129 @@
+"""Sampling designs and tolerance-based stopping"""
+
+import numpy as np
+import pytest
+
+from dcf_model.dcf import MIN_BATCHES, DCFModel
+from dcf_model.sampling import (SOBOL_DIRECTIONS, latin_hypercube, norm_ppf, sobol,
+                                standard_normals)
+
+from .sample_data import SampleProvider
+
+SOBOL_DIMS = len(SOBOL_DIRECTIONS) + 1
+
+
+class NoShift:
+    """Stands in for the generator so the Sobol points are left unshifted"""
+
+    def integers(self, low, high, size, dtype):
+        return np.zeros(size, dtype=dtype)
+
+
+def test_sobol_matches_the_published_sequence():
+    # First points of the Joe-Kuo sequence (e.g. scipy.stats.qmc.Sobol(3, scramble=False))
+    expected = [[0, 0, 0], [0.5, 0.5, 0.5], [0.75, 0.25, 0.25], [0.25, 0.75, 0.75],
+                [0.375, 0.375, 0.625], [0.875, 0.875, 0.125], [0.625, 0.125, 0.875],
+                [0.125, 0.625, 0.375]]
+
+    points = sobol(8, 3, NoShift())
+
+    np.testing.assert_allclose(points, expected, atol=1e-9)
+
+
+@pytest.mark.parametrize('k', [1, 4, 10])
+def test_sobol_points_fill_every_dyadic_stratum(k):
+    n = 2 ** k
+    points = sobol(n, SOBOL_DIMS, np.random.default_rng(k))
+
+    assert points.min() > 0 and points.max() < 1
+    # Each dimension has exactly one of the first 2^k points per 1/2^k interval
+    strata = np.floor(points * n).astype(int)
+    assert all(np.array_equal(np.sort(strata[:, d]), np.arange(n)) for d in range(SOBOL_DIMS))
+
+
+def test_sobol_pairs_of_dimensions_are_balanced():
+    # The first two dimensions form a (0, m, 2)-net: every 2^-a x 2^-b box
+    # with a + b = m holds exactly one of the first 2^m points
+    m = 8
+    points = sobol(2 ** m, 2, np.random.default_rng(0))
+    for a in range(m + 1):
+        boxes = np.floor(points[:, 0] * 2 ** a) * 2 ** (m - a) + np.floor(points[:, 1] * 2 ** (m - a))
+        assert len(np.unique(boxes)) == 2 ** m
+
+
+def test_sobol_shift_depends_on_the_generator():
+    first = sobol(16, 4, np.random.default_rng(1))
+    np.testing.assert_array_equal(first, sobol(16, 4, np.random.default_rng(1)))
+    assert not np.array_equal(first, sobol(16, 4, np.random.default_rng(2)))
+
+
+def test_latin_hypercube_has_one_point_per_stratum():
+    n, dims = 200, 7
+    points = latin_hypercube(n, dims, np.random.default_rng(3))
+
+    assert points.shape == (n, dims)
+    assert points.min() > 0 and points.max() < 1
+    for d in range(dims):
+        assert np.array_equal(np.sort(np.floor(points[:, d] * n).astype(int)), np.arange(n))
+
+
+@pytest.mark.parametrize('size', [10, 11])
+def test_antithetic_pairs_mirror_each_other(size):
+    draws = standard_normals(np.random.default_rng(4), size, 5, 'antithetic')
+    half = -(-size // 2)
+
+    assert draws.shape == (size, 5)
+    np.testing.assert_array_equal(draws[half:], -draws[:size - half])
+
+
+def test_norm_ppf_matches_known_quantiles():
+    u = np.array([0.001, 0.025, 0.5, 0.8413447460685429, 0.975, 0.999])
+    expected = [-3.090232306167813, -1.959963984540054, 0.0, 1.0, 1.959963984540054, 3.090232306167813]
+    np.testing.assert_allclose(norm_ppf(u), expected, rtol=1e-8, atol=1e-9)
+
+
+def test_unknown_sampling_is_rejected():
+    with pytest.raises(ValueError):
+        standard_normals(np.random.default_rng(), 4, 2, 'halton')
+
+
+@pytest.fixture(scope='module')
+def model():
+    return DCFModel('AAPL', provider=SampleProvider())
+
+
+@pytest.mark.parametrize('sampling', ['random', 'sobol'])
+def test_run_stops_once_within_tolerance(model, sampling):
+    results = model.monte_carlo_simulation(2 ** 20, seed=5, sampling=sampling, tolerance=0.5)
+    convergence = results['convergence']
+
+    assert convergence['converged'] is True
+    assert convergence['half_width'] <= 0.5
+    assert convergence['batches'] >= MIN_BATCHES
+    assert results['num_simulations'] == convergence['batches'] * 1024 < 2 ** 20
+
+
+def test_sobol_converges_in_fewer_paths_than_random(model):
+    def paths(sampling):
+        results = model.monte_carlo_simulation(2 ** 20, seed=5, sampling=sampling, tolerance=0.2)
+        assert results['convergence']['converged']
+        return results['num_simulations']
+
+    assert paths('sobol') < paths('random')
+
+
+@pytest.mark.parametrize('metric', ['mean', 'p5'])
+def test_run_reports_when_the_budget_runs_out(model, metric):
+    results = model.monte_carlo_simulation(32 * 1024, seed=5, tolerance=1e-6, tolerance_metric=metric)
+    convergence = results['convergence']
+
+    assert convergence['converged'] is False
+    assert convergence['batches'] == 32
+    assert convergence['half_width'] > 1e-6
+    assert results['num_simulations'] == 32 * 1024
+
+
+def test_too_few_batches_for_an_interval(model):
+    results = model.monte_carlo_simulation(4 * 1024, seed=5, tolerance=100.0)
+    assert results['convergence']['converged'] is False
+    assert results['convergence']['half_width'] is None
@@ -0,0 +1,67 @@
+"""Vectorized growth-path scenarios"""
+
+import numpy as np
+import pytest
+
+from dcf_model.dcf import DCFModel
+from dcf_model.valuation import fade_growth_paths
+
+from .sample_data import SampleProvider
+
+PATHS = [[0.10, 0.08, 0.06, 0.05, 0.04], [0.02, 0.02, 0.02, 0.02, 0.02], [-0.05, 0.0, 0.05, 0.05, 0.05]]
+
+
+@pytest.fixture
+def model():
+    return DCFModel('AAPL', provider=SampleProvider())
+
+
+def test_each_scenario_matches_run_analysis(model):
+    results = model.scenario_analysis(PATHS, terminal_growth=[0.02, 0.03, 0.025], names=['bull', 'flat', 'turn'])
+
+    assert results['num_scenarios'] == 3 and results['names'] == ['bull', 'flat', 'turn']
+    for i, path in enumerate(PATHS):
+        copy = model.clone(terminal_growth=results['terminal_growth'][i])
+        copy.set_growth_rates(path)
+        expected = copy.run_analysis()
+        for field in ('enterprise_value', 'equity_value', 'terminal_value', 'per_share_value'):
+            assert results[field][i] == pytest.approx(expected[field], rel=1e-12)
+
+
+def test_shared_wacc_override_matches_the_grid(model):
+    model.set_growth_rates(PATHS[0])
+    results = model.scenario_analysis([PATHS[0]], wacc=0.11, terminal_growth=0.02)
+    grid = model.sensitivity_grid([0.11], [0.02])
+
+    assert results['per_share_value'][0] == pytest.approx(grid['per_share_value'][0, 0])
+
+
+def test_divergent_scenarios_are_left_out_of_the_summary(model):
+    results = model.scenario_analysis(PATHS, wacc=[0.09, 0.02, 0.10], terminal_growth=0.03)
+    values = results['per_share_value']
+
+    assert np.isnan(values[1]) and np.isfinite(values[[0, 2]]).all()
+    summary = results['summary']
+    assert summary['num_valid'] == 2
+    assert (summary['min'], summary['max']) == (values[[0, 2]].min(), values[[0, 2]].max())
+    assert summary['prob_above_current_price'] in (0.0, 0.5, 1.0)
+
+
+def test_fade_paths_are_linear():
+    paths = fade_growth_paths([0.10, 0.20], [0.02, 0.04], 5)
+
+    assert paths.shape == (2, 5)
+    np.testing.assert_allclose(paths[0], [0.10, 0.08, 0.06, 0.04, 0.02])
+    np.testing.assert_allclose(np.diff(paths[1]), -0.04)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'growth_paths': [[]]},
+    {'growth_paths': [[0.05, -1.0]]},
+    {'growth_paths': [[0.05, np.nan]]},
+    {'growth_paths': PATHS, 'names': ['one']},
+    {'growth_paths': PATHS, 'wacc': [0.08, 0.09]},
+])
+def test_invalid_scenarios_are_rejected(model, kwargs):
+    with pytest.raises(ValueError):
+        model.scenario_analysis(**kwargs)
@@ -0,0 +1,234 @@
+"""
+FetchScheduler against a local stub server
+
+The stub serves to_record() JSON the way HTTPProvider expects and can be
+told to fail, so retries, backoff, rate limiting, the concurrency bound and
+the stale fallback are exercised over real HTTP without reaching Yahoo
+Finance.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import threading
+import time
+
+import pytest
+
+from dcf_model.batch import analyze_batch
+from dcf_model.providers import HTTPProvider, to_record
+from dcf_model.scheduler import FetchScheduler, TokenBucket, UpstreamError, is_retryable
+
+from .sample_data import sample_company
+
+
+class StubUpstream:
+    """Threaded HTTP server answering GET /companies/{ticker}"""
+
+    def __init__(self, companies, delay=0.0):
+        self.records = {data.ticker: to_record(data) for data in companies}
+        self.delay = delay
+        self.failures = 0          # next requests to fail
+        self.down = False          # fail every request
+        self.status = 503
+        self.retry_after = None
+        self.hits = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; avoid delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/companies'
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def handle(self, handler):
+        ticker = handler.path.rsplit('/', 1)[-1].upper()
+        with self._lock:
+            self.hits += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.down or self.failures > 0
+            if self.failures > 0:
+                self.failures -= 1
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+
+        if fail:
+            status, body = self.status, b'{}'
+        elif ticker not in self.records:
+            status, body = 404, b'{}'
+        else:
+            status, body = 200, json.dumps(self.records[ticker]).encode()
+        handler.send_response(status)
+        if fail and self.retry_after is not None:
+            handler.send_header('Retry-After', str(self.retry_after))
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def upstream():
+    stub = StubUpstream([sample_company('AAPL', 150.0), sample_company('MSFT', 300.0),
+                          sample_company('F', 12.0)])
+    yield stub
+    stub.close()
+
+
+def scheduler(stub, **kwargs):
+    """Scheduler over the stub that records backoff sleeps instead of sleeping"""
+    sleeps = []
+    options = {'rate': 0, 'base_delay': 0.5, 'max_delay': 4.0, 'rng': random.Random(0),
+               'sleep': sleeps.append}
+    options.update(kwargs)
+    return FetchScheduler(HTTPProvider(stub.url, pool_size=4), **options), sleeps
+
+
+def test_fetch_decodes_the_record(upstream):
+    fetch, _ = scheduler(upstream)
+    data = fetch.fetch('AAPL')
+    assert data.ticker == 'AAPL'
+    assert data.info['currentPrice'] == 150.0
+    assert data.cash_flow.loc['Operating Cash Flow'].iloc[0] == 1.2e9
+    assert not data.stale and data.error is None
+
+
+def test_transient_failures_are_retried_with_backoff(upstream):
+    fetch, sleeps = scheduler(upstream, max_attempts=4)
+    upstream.failures = 2
+
+    data = fetch.fetch('AAPL')
+
+    assert not data.stale
+    assert upstream.hits == 3
+    assert fetch.stats()['retries'] == 2
+    # Full jitter: retry k sleeps at most base_delay * 2 ** (k - 1)
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+
+
+def test_retry_after_is_a_floor_on_the_backoff(upstream):
+    fetch, sleeps = scheduler(upstream, max_attempts=2)
+    upstream.failures = 1
+    upstream.status = 429
+    upstream.retry_after = 3
+
+    fetch.fetch('AAPL')
+
+    assert sleeps == [3.0]
+
+
+def test_backoff_is_capped():
+    fetch = FetchScheduler(None, base_delay=1.0, max_delay=2.0, rng=random.Random(0))
+    assert all(fetch.backoff(attempt) <= 2.0 for attempt in range(1, 20))
+
+
+def test_unknown_ticker_is_not_retried(upstream):
+    fetch, sleeps = scheduler(upstream)
+    with pytest.raises(LookupError):
+        fetch.fetch('ZZZZ')
+    assert upstream.hits == 1 and sleeps == []
+
+
+def test_stale_copy_is_served_when_the_upstream_fails(upstream):
+    fetch, _ = scheduler(upstream, max_attempts=2)
+    fetch.fetch('AAPL')
+    upstream.down = True
+
+    data = fetch.fetch('AAPL')
+
+    assert data.stale
+    assert '503' in data.error
+    assert data.info['currentPrice'] == 150.0
+    assert fetch.stats()['stale_served'] == 1
+
+
+def test_failure_without_a_stale_copy_raises(upstream):
+    fetch, _ = scheduler(upstream, max_attempts=2)
+    upstream.down = True
+    with pytest.raises(UpstreamError):
+        fetch.fetch('MSFT')
+
+
+def test_stale_copy_expires(upstream):
+    fetch, _ = scheduler(upstream, max_attempts=1, stale_ttl=0)
+    fetch.fetch('AAPL')
+    upstream.down = True
+    with pytest.raises(UpstreamError):
+        fetch.fetch('AAPL')
+
+
+def test_stale_flag_reaches_batch_results(upstream):
+    fetch, _ = scheduler(upstream, max_attempts=1)
+    fetch.fetch('AAPL')
+    upstream.down = True
+
+    results, errors = analyze_batch(fetch, ['AAPL', 'MSFT'])
+
+    assert results['AAPL']['stale'] is True
+    assert '503' in results['AAPL']['data_error']
+    assert results['AAPL']['fallback'] is False
+    assert 'MSFT' in errors
+
+
+def test_concurrency_is_bounded(upstream):
+    upstream.delay = 0.02
+    fetch, _ = scheduler(upstream, max_concurrency=3)
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        list(executor.map(fetch.fetch, ['AAPL', 'MSFT', 'F'] * 8))
+    assert upstream.max_in_flight <= 3
+    assert upstream.hits == 24
+
+
+def test_rate_limit_spaces_requests(upstream):
+    fetch = FetchScheduler(HTTPProvider(upstream.url), rate=50, burst=2)
+    start = time.perf_counter()
+    for _ in range(12):
+        fetch.fetch('F')
+    # Two requests go out at once, the other ten wait 1/50 s each
+    assert time.perf_counter() - start >= 10 / 50 * 0.9
+    assert fetch.stats()['throttled_seconds'] > 0
+
+
+def test_token_bucket_allows_a_burst_then_the_rate():
+    now = [0.0]
+    sleeps = []
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=lambda: now[0], sleep=sleeps.append)
+
+    waits = [bucket.acquire() for _ in range(5)]
+
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3:] == pytest.approx([0.5, 1.0])
+    assert sleeps == pytest.approx([0.5, 1.0])
+
+
+@pytest.mark.parametrize('error, retryable', [
+    (ConnectionError('reset'), True),
+    (TimeoutError('slow'), True),
+    (LookupError('unknown'), False),
+    (ValueError('bad data'), False),
+])
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
@@ -0,0 +1,61 @@
+"""ValuationIndex: incremental revaluation, stale flags and failed-fetch memory"""
+
+from dataclasses import replace
+
+from dcf_model.batch import value_batch
+from dcf_model.screen import ValuationIndex
+
+from .sample_data import sample_company
+
+
+def test_query_matches_value_batch():
+    companies = [sample_company('AAA', 10.0), sample_company('BBB', 40.0), sample_company('CCC', 25.0)]
+    index = ValuationIndex()
+    index.update(companies)
+
+    results = index.query(sort_by='per_share_value')['results']
+    expected = value_batch(companies)
+
+    values = [row['per_share_value'] for row in results]
+    assert len(results) == 3 and values == sorted(values, reverse=True)
+    for row in results:
+        assert row['per_share_value'] == expected[row['ticker']]['per_share_value']
+
+
+def test_only_changed_rows_are_revalued():
+    index = ValuationIndex()
+    index.update([sample_company('AAA', 10.0), sample_company('BBB', 40.0)])
+    assert index.query()['revalued'] == 2
+
+    assert index.update([sample_company('AAA', 10.0)]) == 0
+    assert index.query()['revalued'] == 0
+
+    assert index.update([sample_company('BBB', 45.0)]) == 1
+    assert index.query()['revalued'] == 1
+
+
+def test_stale_rows_are_flagged_until_refreshed():
+    index = ValuationIndex()
+    index.update([sample_company('AAA'), replace(sample_company('BBB'), stale=True, error='HTTP 503')])
+    flags = {row['ticker']: (row['stale'], row['data_error']) for row in index.query()['results']}
+    assert flags == {'AAA': (False, None), 'BBB': (True, 'HTTP 503')}
+
+    index.update([sample_company('BBB')])
+    assert not any(row['stale'] for row in index.query()['results'])
+
+
+def test_failed_tickers_are_not_missing_until_the_ttl_passes():
+    index = ValuationIndex(failure_ttl=60)
+    index.record_failures({'NOPE': 'No data for NOPE'}, failed_at=1000.0)
+
+    assert index.missing(['NOPE', 'NEW'], now=1030.0) == ['NEW']
+    assert index.recent_failures(['NOPE', 'NEW'], now=1030.0) == {'NOPE': 'No data for NOPE'}
+    assert index.missing(['NOPE'], now=1061.0) == ['NOPE']
+    assert index.recent_failures(['NOPE'], now=1061.0) == {}
+
+
+def test_a_successful_fetch_clears_the_failure():
+    index = ValuationIndex(failure_ttl=60)
+    index.record_failures({'AAA': 'timeout'})
+    index.update([sample_company('AAA')])
+    assert index.recent_failures(['AAA']) == {}
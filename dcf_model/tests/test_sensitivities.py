@@ -0,0 +1,95 @@
+"""Closed-form valuation sensitivities against finite differences"""
+
+import numpy as np
+import pytest
+
+from dcf_model.dcf import DCFModel
+from dcf_model.valuation import dcf_gradient, discounted_cash_flow, forecast_fcf, wacc_gradient
+
+from .sample_data import SampleProvider
+
+STEP = 1e-6
+
+
+def central_difference(value_at, x):
+    return (value_at(x + STEP) - value_at(x - STEP)) / (2 * STEP)
+
+
+@pytest.fixture
+def model():
+    return DCFModel('AAPL', provider=SampleProvider())
+
+
+@pytest.fixture
+def sensitivities(model):
+    return model.valuation_sensitivities()
+
+
+def enterprise_value(model, **params):
+    return model.clone(**params).run_analysis()['enterprise_value']
+
+
+def test_base_enterprise_value_matches_run_analysis(model, sensitivities):
+    assert sensitivities['base_enterprise_value'] == pytest.approx(model.run_analysis()['enterprise_value'])
+
+
+@pytest.mark.parametrize('name', ['terminal_growth', 'beta', 'risk_free_rate', 'market_risk_premium'])
+def test_model_input_partials(model, sensitivities, name):
+    numeric = central_difference(lambda x: enterprise_value(model, **{name: x}), getattr(model, name))
+
+    assert sensitivities['enterprise_value'][name] == pytest.approx(numeric, rel=1e-5)
+    assert sensitivities['per_share_value'][name] == pytest.approx(numeric / model.shares_outstanding, rel=1e-5)
+
+
+def test_wacc_partial(model, sensitivities):
+    fcf = forecast_fcf(model.get_historical_fcf(), model.get_growth_rates())
+
+    def value_at(wacc):
+        return discounted_cash_flow(fcf, wacc, model.terminal_growth)['enterprise_value']
+
+    numeric = central_difference(value_at, model.calculate_wacc())
+    assert sensitivities['enterprise_value']['wacc'] == pytest.approx(numeric, rel=1e-5)
+
+
+def test_growth_rate_partials(model, sensitivities):
+    base = np.array(model.get_growth_rates())
+    analytic = sensitivities['enterprise_value']['growth_rates']
+    assert len(analytic) == len(base)
+
+    for year in range(len(base)):
+        def value_at(rate):
+            path = base.copy()
+            path[year] = rate
+            copy = model.clone()
+            copy.set_growth_rates(path)
+            return copy.run_analysis()['enterprise_value']
+
+        assert analytic[year] == pytest.approx(central_difference(value_at, base[year]), rel=1e-5)
+
+
+def test_base_fcf_partial_is_linear(model, sensitivities):
+    # Enterprise value is linear in the base-year cash flow
+    slope = sensitivities['enterprise_value']['historical_fcf']
+    assert slope * model.get_historical_fcf() == pytest.approx(sensitivities['base_enterprise_value'])
+
+
+def test_gradient_is_vectorized():
+    base_fcf = np.array([1e9, 2e9, -5e8])
+    growth_rates = np.array([[0.1, 0.08, 0.06], [0.05, 0.05, 0.05], [0.2, 0.1, 0.0]])
+    wacc = np.array([0.09, 0.08, 0.12])
+    gradient = dcf_gradient(base_fcf, growth_rates, wacc, 0.03)
+
+    for i in range(3):
+        single = dcf_gradient(base_fcf[i], growth_rates[i], wacc[i], 0.03)
+        for name, value in single.items():
+            np.testing.assert_allclose(gradient[name][i], value)
+
+
+def test_terminal_value_diverges_at_the_wacc():
+    gradient = dcf_gradient(1e9, [0.05] * 5, 0.03, 0.03)
+    assert np.isnan(gradient['enterprise_value']) and np.isnan(gradient['terminal_growth'])
+
+
+def test_wacc_gradient_weights_by_equity():
+    partials = wacc_gradient(beta=1.2, market_risk_premium=0.05, market_cap=3e9, total_debt=1e9)
+    assert partials == pytest.approx({'beta': 0.0375, 'risk_free_rate': 0.75, 'market_risk_premium': 0.9})
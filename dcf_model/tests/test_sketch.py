@@ -0,0 +1,115 @@
+"""QuantileSketch: relative error bound, exact merging and running moments"""
+
+import numpy as np
+import pytest
+
+from dcf_model.sketch import QuantileSketch
+
+QS = np.array([0, 0.001, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 0.999, 1])
+
+
+def sample_values(size=200_000, seed=0):
+    """Mixed-sign values spanning several orders of magnitude, plus exact zeros"""
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(mean=20, sigma=2, size=size) * rng.choice([-1, 1], size=size, p=[0.2, 0.8])
+    values[:100] = 0.0
+    return rng.permutation(values)
+
+
+def exact_quantiles(values, qs):
+    # The sketch reports the order statistic at rank floor(q * (n - 1))
+    ordered = np.sort(values)
+    return ordered[np.floor(qs * (len(values) - 1)).astype(int)]
+
+
+@pytest.mark.parametrize('relative_accuracy', [0.01, 0.001])
+def test_quantiles_are_within_the_relative_error_bound(relative_accuracy):
+    values = sample_values()
+    sketch = QuantileSketch(relative_accuracy)
+    sketch.update(values)
+
+    estimates = sketch.quantiles(QS)
+    exact = exact_quantiles(values, QS)
+
+    assert np.all(np.abs(estimates - exact) <= relative_accuracy * np.abs(exact) + 1e-12)
+    assert values.min() <= estimates.min() and estimates.max() <= values.max()
+
+
+def test_merged_chunks_equal_a_single_update():
+    values = sample_values()
+    single = QuantileSketch()
+    single.update(values)
+
+    merged = QuantileSketch()
+    for chunk in np.array_split(values, 7):
+        part = QuantileSketch()
+        part.update(chunk)
+        merged.merge(part)
+
+    np.testing.assert_array_equal(merged.quantiles(QS), single.quantiles(QS))
+    assert (merged.count, merged.zero_count, merged.min, merged.max) == \
+        (single.count, single.zero_count, single.min, single.max)
+    assert merged.mean == pytest.approx(single.mean, rel=1e-12)
+    assert merged.std == pytest.approx(single.std, rel=1e-12)
+
+
+def test_chunked_updates_equal_a_single_update():
+    values = sample_values(50_000, seed=1)
+    single, chunked = QuantileSketch(), QuantileSketch()
+    single.update(values)
+    for chunk in np.array_split(values, 13):
+        chunked.update(chunk)
+
+    np.testing.assert_array_equal(chunked.quantiles(QS), single.quantiles(QS))
+
+
+def test_moments_combine_exactly_across_distant_chunks():
+    # Chan's combination stays accurate where a naive sum of squares would not
+    rng = np.random.default_rng(2)
+    chunks = [1e9 + rng.normal(size=1000), 1e9 + 5 + rng.normal(size=3000), rng.normal(size=10)]
+    sketch = QuantileSketch()
+    for chunk in chunks:
+        part = QuantileSketch()
+        part.update(chunk)
+        sketch.merge(part)
+
+    values = np.concatenate(chunks)
+    assert sketch.count == values.size
+    assert sketch.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert sketch.std == pytest.approx(values.std(ddof=1), rel=1e-9)
+
+
+def test_non_finite_values_are_counted_as_invalid():
+    sketch = QuantileSketch()
+    sketch.update([1.0, np.nan, 2.0, np.inf, -np.inf, 3.0])
+
+    assert sketch.count == 3 and sketch.num_invalid == 3
+    assert sketch.mean == 2.0 and sketch.std == 1.0
+
+
+def test_empty_sketch():
+    sketch = QuantileSketch()
+    sketch.update([np.nan])
+
+    assert np.isnan(sketch.quantile(0.5))
+    summary = sketch.summary()
+    assert np.isnan(summary['mean']) and np.isnan(summary['median'])
+
+
+def test_summary_matches_the_quantiles():
+    values = sample_values(10_000, seed=3)
+    sketch = QuantileSketch()
+    sketch.update(values)
+
+    summary = sketch.summary(percentiles=(5, 95), scale=0.5)
+
+    assert summary['median'] == pytest.approx(sketch.quantile(0.5) * 0.5)
+    assert summary['percentiles']['p5'] == pytest.approx(sketch.quantile(0.05) * 0.5)
+    assert summary['mean'] == pytest.approx(values.mean() * 0.5)
+
+
+def test_only_sketches_with_the_same_accuracy_merge():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.001))
+    with pytest.raises(ValueError):
+        QuantileSketch(0)
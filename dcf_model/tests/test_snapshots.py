@@ -0,0 +1,83 @@
+"""SnapshotStore round-trips and SnapshotProvider fallback"""
+
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from dcf_model.dcf import DCFModel
+from dcf_model.snapshots import SnapshotProvider, SnapshotStore, refresh
+
+from .sample_data import SampleProvider, sample_company
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path))
+
+
+def test_save_and_load_round_trip(store):
+    data = sample_company('AAPL', prices=True)
+    store.save(data)
+
+    loaded = store.load('AAPL')
+
+    assert loaded.as_of == '2025-01-02'
+    assert loaded.info == data.info
+    pd.testing.assert_frame_equal(loaded.cash_flow, data.cash_flow, check_freq=False)
+    pd.testing.assert_frame_equal(loaded.balance_sheet, data.balance_sheet, check_freq=False)
+    pd.testing.assert_series_equal(loaded.prices, data.prices, check_freq=False,
+                                   check_index_type=False)
+    assert loaded.income_stmt is None
+
+
+def test_load_picks_the_latest_snapshot_on_or_before_the_date(store):
+    store.save(sample_company('AAPL', 100.0), as_of='2024-01-02')
+    store.save(sample_company('AAPL', 120.0), as_of='2024-07-01')
+
+    assert store.list_dates('aapl') == ['2024-01-02', '2024-07-01']
+    assert store.load('AAPL').info['currentPrice'] == 120.0
+    assert store.load('AAPL', '2024-06-30').info['currentPrice'] == 100.0
+    with pytest.raises(FileNotFoundError):
+        store.load('AAPL', '2023-12-31')
+
+
+def test_model_from_snapshot_matches_the_live_model(store):
+    store.save(sample_company('AAPL', 150.0))
+
+    offline = DCFModel.from_snapshot('AAPL', store).run_analysis()
+    live = DCFModel('AAPL', provider=SampleProvider()).run_analysis()
+
+    assert offline['per_share_value'] == pytest.approx(live['per_share_value'])
+
+
+def test_provider_falls_back_when_there_is_no_snapshot(store):
+    store.save(sample_company('AAPL'))
+    fallback = SampleProvider([sample_company('MSFT', prices=True)])
+    provider = SnapshotProvider(store, fallback=fallback)
+
+    assert provider.fetch('AAPL').ticker == 'AAPL'
+    assert provider.fetch('MSFT').ticker == 'MSFT'
+    assert provider.fetch_prices('MSFT') is fallback.companies['MSFT'].prices
+    assert fallback.calls == [('fetch', 'MSFT'), ('prices', 'MSFT')]
+
+    with pytest.raises(FileNotFoundError):
+        SnapshotProvider(store).fetch('MSFT')
+
+
+def test_refresh_stores_prices_and_reports_failures(store):
+    company = replace(sample_company('AAPL', prices=True), prices=None)
+    provider = SampleProvider([company])
+    provider.fetch_prices = lambda ticker: sample_company(ticker, prices=True).prices
+
+    failed = refresh(store, ['AAPL', 'ZZZZ'], provider=provider, as_of='2025-01-03', prices=True)
+
+    assert failed == ['ZZZZ']
+    assert store.list_dates('AAPL') == ['2025-01-03']
+    assert len(store.load('AAPL').prices) == 5
+
+
+@pytest.mark.parametrize('ticker', ['', '../etc', 'A/B', '.hidden'])
+def test_invalid_tickers_are_rejected(store, ticker):
+    with pytest.raises(ValueError):
+        store.load(ticker)
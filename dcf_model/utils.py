@@ -7,8 +7,11 @@ and data processing tasks used in the DCF model.
 
 import pandas as pd
 import numpy as np
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
+from datetime import datetime
+
+from .cleaning import apply_clip_bounds, compute_clip_bounds
 
 # Configure logging
 logging.basicConfig(
@@ -242,6 +245,10 @@ def clean_financial_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Clean financial data by handling missing values and outliers
     
+    For datasets too large for memory use cleaning.clean_in_chunks, which
+    applies the same rules in two streaming passes, except that it clips
+    every numeric column (float32 and int32 too), not only float64 and int64.
+    
     Args:
         df: Input DataFrame with financial data
         
@@ -253,13 +260,10 @@ def clean_financial_data(df: pd.DataFrame) -> pd.DataFrame:
         df = df.fillna(0)
         
         # Remove outliers (values more than 3 standard deviations from mean)
-        for col in df.columns:
-            if df[col].dtype in ['float64', 'int64']:
-                mean = df[col].mean()
-                std = df[col].std()
-                df[col] = df[col].clip(lower=mean - 3*std, upper=mean + 3*std)
-        
-        return df
+        # from float64 and int64 columns; other dtypes are left as they are
+        bounds = compute_clip_bounds([df], n_std=3.0, fill_value=None)
+        bounds = {col: bounds[col] for col in bounds if df[col].dtype in ['float64', 'int64']}
+        return apply_clip_bounds(df, bounds, fill_value=None)
         
     except Exception as e:
         logger.error(f"Error cleaning financial data: {str(e)}")
@@ -287,3 +291,273 @@ def validate_financial_data(df: pd.DataFrame, required_columns: List[str]) -> bo
     except Exception as e:
         logger.error(f"Error validating financial data: {str(e)}")
         raise
+
+class FinancialPanel:
+    """
+    Statement data for many tickers as one aligned array
+
+    Values are stored as a (ticker x period x line item) float array. Periods
+    are aligned by position, oldest first, so index -1 is every ticker's most
+    recent period; tickers with shorter histories are padded with NaN at the
+    oldest end. The reporting date of each cell is kept in period_dates.
+    """
+
+    def __init__(self, tickers: List[str], items: List[str], values: np.ndarray,
+                 period_dates: Optional[np.ndarray] = None):
+        """
+        Args:
+            tickers: Ticker symbols (first axis)
+            items: Line item names (last axis)
+            values: Array of shape (tickers, periods, items)
+            period_dates: Reporting dates of shape (tickers, periods)
+        """
+        values = np.asarray(values, dtype=float)
+        if values.shape[0] != len(tickers) or values.shape[2] != len(items):
+            raise ValueError("values must have shape (len(tickers), periods, len(items))")
+
+        self.tickers = list(tickers)
+        self.items = list(items)
+        self.values = values
+        self.period_dates = period_dates
+        self._ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._item_index = {item: i for i, item in enumerate(self.items)}
+
+    @property
+    def num_periods(self) -> int:
+        return self.values.shape[1]
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame],
+                    items: Optional[List[str]] = None,
+                    num_periods: Optional[int] = None) -> 'FinancialPanel':
+        """
+        Build a panel from per-ticker DataFrames
+
+        Each frame has periods as rows (oldest first) and line items as
+        columns, the layout used by the scalar ratio functions.
+
+        Args:
+            frames: DataFrames keyed by ticker
+            items: Line items to keep (defaults to the union of all columns)
+            num_periods: Most recent periods to keep (defaults to the longest history)
+
+        Returns:
+            FinancialPanel: Aligned panel
+        """
+        return cls._build(
+            {ticker: [(df.index, df.columns, _as_float_array(df))] for ticker, df in frames.items()},
+            items, num_periods
+        )
+
+    @classmethod
+    def from_financial_data(cls, companies, items: Optional[List[str]] = None,
+                            num_periods: Optional[int] = None) -> 'FinancialPanel':
+        """
+        Build a panel from fetched FinancialData
+
+        The balance sheet, income statement and cash flow statement (line items
+        as rows, most recent period first) are combined per ticker.
+
+        Args:
+            companies: Iterable of FinancialData
+            items: Line items to keep (defaults to all)
+            num_periods: Most recent periods to keep (defaults to the longest history)
+
+        Returns:
+            FinancialPanel: Aligned panel
+        """
+        blocks = {}
+        for company in companies:
+            blocks[company.ticker] = [
+                (df.columns, df.index, _as_float_array(df).T)
+                for df in (company.balance_sheet, company.income_stmt, company.cash_flow)
+                if df is not None and not df.empty
+            ]
+        return cls._build(blocks, items, num_periods)
+
+    @classmethod
+    def _build(cls, blocks, items, num_periods):
+        """
+        Fill a panel from per-ticker (period labels, item labels, periods x items) blocks
+
+        Blocks for the same ticker are merged on their period labels; an item
+        present in several blocks keeps its first value.
+        """
+        if items is None:
+            items = list(dict.fromkeys(
+                item for ticker_blocks in blocks.values() for _, block_items, _ in ticker_blocks
+                for item in block_items
+            ))
+        item_index = {item: i for i, item in enumerate(items)}
+
+        ticker_periods = {
+            ticker: sorted(
+                dict.fromkeys(label for periods, _, _ in ticker_blocks for label in periods),
+                key=_period_sort_key
+            )
+            for ticker, ticker_blocks in blocks.items()
+        }
+        if num_periods is None:
+            num_periods = max((len(periods) for periods in ticker_periods.values()), default=0)
+
+        tickers = list(blocks)
+        values = np.full((len(tickers), num_periods, len(items)), np.nan)
+        date_cells, date_labels = [], []
+
+        for i, ticker in enumerate(tickers):
+            periods = ticker_periods[ticker][-num_periods:] if num_periods else []
+            start = num_periods - len(periods)
+            period_position = {label: start + j for j, label in enumerate(periods)}
+            date_cells.extend(i * num_periods + position for position in period_position.values())
+            date_labels.extend(periods)
+
+            filled = np.zeros(len(items), dtype=bool)
+            for block_periods, block_items, block in blocks[ticker]:
+                rows = np.array([period_position.get(label, -1) for label in block_periods], dtype=int)
+                seen = set()
+                cols = np.array([
+                    -1 if item in seen or seen.add(item) else item_index.get(item, -1)
+                    for item in block_items
+                ], dtype=int)
+                keep_cols = (cols >= 0) & ~filled[np.maximum(cols, 0)]
+                keep_rows = rows >= 0
+                if not keep_cols.any() or not keep_rows.any():
+                    continue
+                values[i, rows[keep_rows][:, None], cols[keep_cols]] = block[np.ix_(keep_rows, keep_cols)]
+                filled[cols[keep_cols]] = True
+
+        period_dates = np.full(len(tickers) * num_periods, np.datetime64('NaT'), dtype='datetime64[ns]')
+        if date_labels:
+            period_dates[date_cells] = pd.to_datetime(
+                pd.Series(date_labels, dtype=object), errors='coerce'
+            ).to_numpy(dtype='datetime64[ns]')
+        period_dates = period_dates.reshape(len(tickers), num_periods)
+
+        return cls(tickers, items, values, period_dates)
+
+    def item(self, name: str) -> np.ndarray:
+        """
+        Get one line item for every ticker and period
+
+        Args:
+            name: Line item name
+
+        Returns:
+            np.ndarray: Array of shape (tickers, periods), all NaN if the item is absent
+        """
+        index = self._item_index.get(name)
+        if index is None:
+            return np.full(self.values.shape[:2], np.nan)
+        return self.values[:, :, index]
+
+    def ticker(self, symbol: str) -> pd.DataFrame:
+        """
+        Get one ticker's data as a periods x line items DataFrame
+
+        Args:
+            symbol: Ticker symbol
+
+        Returns:
+            pd.DataFrame: Statement data, oldest period first
+        """
+        i = self._ticker_index[symbol]
+        index = self.period_dates[i] if self.period_dates is not None else None
+        return pd.DataFrame(self.values[i], index=index, columns=self.items)
+
+    def latest(self, values: np.ndarray) -> np.ndarray:
+        """
+        Take the most recent period from a (tickers, periods) array
+
+        Args:
+            values: Array of shape (tickers, periods)
+
+        Returns:
+            np.ndarray: Array of shape (tickers,)
+        """
+        return values[:, -1]
+
+
+def _as_float_array(df: pd.DataFrame) -> np.ndarray:
+    """Convert a DataFrame to floats, coercing non-numeric cells to NaN"""
+    try:
+        return df.to_numpy(dtype=float)
+    except (TypeError, ValueError):
+        return df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+
+def _period_sort_key(label):
+    """Sort key putting period labels oldest first (dates chronologically, others as text)"""
+    if isinstance(label, (pd.Timestamp, datetime)):
+        return (0, pd.Timestamp(label).value, '')
+    return (1, 0, str(label))
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Divide elementwise, returning NaN where the denominator is not positive"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def batch_ebit_margin(panel: FinancialPanel) -> np.ndarray:
+    """
+    Calculate EBIT margin for every ticker and period
+
+    Args:
+        panel: Financial panel with 'EBIT' and 'Total Revenue'
+
+    Returns:
+        np.ndarray: EBIT margins of shape (tickers, periods), NaN where undefined
+    """
+    return _safe_ratio(panel.item('EBIT'), panel.item('Total Revenue'))
+
+
+def batch_capex_ratio(panel: FinancialPanel) -> np.ndarray:
+    """
+    Calculate capital expenditure ratio for every ticker and period
+
+    Args:
+        panel: Financial panel with 'Capital Expenditure' and 'Total Revenue'
+
+    Returns:
+        np.ndarray: Capex ratios of shape (tickers, periods), NaN where undefined
+    """
+    return _safe_ratio(np.abs(panel.item('Capital Expenditure')), panel.item('Total Revenue'))
+
+
+def batch_working_capital_ratio(panel: FinancialPanel) -> np.ndarray:
+    """
+    Calculate working capital ratio for every ticker and period
+
+    Args:
+        panel: Financial panel with 'Working Capital' and 'Total Revenue'
+
+    Returns:
+        np.ndarray: Working capital ratios of shape (tickers, periods), NaN where undefined
+    """
+    return _safe_ratio(panel.item('Working Capital'), panel.item('Total Revenue'))
+
+
+def batch_debt_ratio(panel: FinancialPanel) -> np.ndarray:
+    """
+    Calculate debt ratio for every ticker and period
+
+    Args:
+        panel: Financial panel with 'Total Debt' and 'Total Assets'
+
+    Returns:
+        np.ndarray: Debt ratios of shape (tickers, periods), NaN where undefined
+    """
+    return _safe_ratio(panel.item('Total Debt'), panel.item('Total Assets'))
+
+
+def batch_interest_coverage_ratio(panel: FinancialPanel) -> np.ndarray:
+    """
+    Calculate interest coverage ratio for every ticker and period
+
+    Args:
+        panel: Financial panel with 'EBIT' and 'Interest Expense'
+
+    Returns:
+        np.ndarray: Interest coverage ratios of shape (tickers, periods), NaN where undefined
+    """
+    return _safe_ratio(panel.item('EBIT'), panel.item('Interest Expense'))
@@ -0,0 +1,347 @@
+"""
+Vectorized valuation kernels
+
+This module provides array versions of the DCF building blocks (WACC,
+forecast free cash flows, discounting and the Gordon Growth terminal value).
+Every argument broadcasts with NumPy rules, so the same functions value a
+single company, a Monte Carlo sample or a full sensitivity grid in one pass.
+"""
+
+import logging
+
+import numpy as np
+
+from .sampling import standard_normals
+
+# Assumed pre-tax cost of debt, matching DCFModel.calculate_wacc
+COST_OF_DEBT = 0.05
+
+# WACC used when market cap and debt are both zero
+DEFAULT_WACC = 0.10
+
+# Free cash flow used when the cash flow statement is unavailable
+DEFAULT_FCF = 100000000  # $100M
+
+
+def historical_fcf(cash_flow):
+    """
+    Get the most recent free cash flow from a cash flow statement
+
+    Args:
+        cash_flow: Cash flow statement DataFrame (line items x periods)
+
+    Returns:
+        float: Operating cash flow plus (negative) capital expenditure
+    """
+    try:
+        if cash_flow is not None and not cash_flow.empty:
+            operating_cash_flow = cash_flow.loc['Operating Cash Flow'].iloc[0]
+            capital_expenditure = cash_flow.loc['Capital Expenditure'].iloc[0]
+            return operating_cash_flow + capital_expenditure  # CapEx is negative
+    except Exception as e:
+        logging.error(f"Error calculating historical FCF: {e}")
+
+    # Use a default value if data is not available
+    return DEFAULT_FCF
+
+
+def default_growth_rates(forecast_years):
+    """
+    Build the default growth path: 5% in the first year, falling by 0.5% a
+    year to a floor of 2%
+
+    Args:
+        forecast_years: Number of forecast years
+
+    Returns:
+        list: Growth rate for each forecast year
+    """
+    return [max(0.05 - i * 0.005, 0.02) for i in range(forecast_years)]
+
+
+def fade_growth_paths(start_growth, end_growth, years):
+    """
+    Build growth paths that move linearly from a first-year rate to a
+    final-year rate
+
+    Args:
+        start_growth: First-year growth rate, shape (...)
+        end_growth: Final-year growth rate, shape (...)
+        years: Number of forecast years
+
+    Returns:
+        np.ndarray: Growth paths, shape (..., years)
+    """
+    start_growth = np.asarray(start_growth, dtype=float)
+    end_growth = np.asarray(end_growth, dtype=float)
+    steps = np.linspace(0.0, 1.0, years)
+    return start_growth[..., None] + (end_growth - start_growth)[..., None] * steps
+
+
+def vectorized_wacc(beta, risk_free_rate, market_risk_premium,
+                    market_cap, total_debt, tax_rate):
+    """
+    Calculate WACC for arrays of inputs
+
+    Args:
+        beta: Equity beta
+        risk_free_rate: Risk-free rate
+        market_risk_premium: Market risk premium
+        market_cap: Market value of equity
+        total_debt: Total debt
+        tax_rate: Corporate tax rate
+
+    Returns:
+        np.ndarray: WACC broadcast over all inputs
+    """
+    cost_of_equity = np.asarray(risk_free_rate) + np.asarray(beta) * np.asarray(market_risk_premium)
+
+    market_cap = np.asarray(market_cap, dtype=float)
+    total_debt = np.asarray(total_debt, dtype=float)
+    total_value = market_cap + total_debt
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight_equity = market_cap / total_value
+        weight_debt = total_debt / total_value
+        wacc = weight_equity * cost_of_equity + weight_debt * COST_OF_DEBT * (1 - np.asarray(tax_rate))
+
+    return np.where(total_value == 0, DEFAULT_WACC, wacc)
+
+
+def forecast_fcf(base_fcf, growth_rates):
+    """
+    Compound a base free cash flow along growth paths
+
+    Args:
+        base_fcf: Base-year free cash flow, shape (...)
+        growth_rates: Growth rate per forecast year, shape (..., years)
+
+    Returns:
+        np.ndarray: Forecast free cash flows, shape (..., years)
+    """
+    growth_rates = np.asarray(growth_rates, dtype=float)
+    return np.asarray(base_fcf, dtype=float)[..., None] * np.cumprod(1 + growth_rates, axis=-1)
+
+
+def discount_factors(wacc, years):
+    """
+    Build end-of-year discount factors 1 / (1 + WACC)^t for t = 1..years
+
+    Args:
+        wacc: Discount rate, shape (...)
+        years: Number of forecast years
+
+    Returns:
+        np.ndarray: Discount factors, shape (..., years)
+    """
+    periods = np.arange(1, years + 1)
+    return (1 + np.asarray(wacc, dtype=float))[..., None] ** -periods
+
+
+def discounted_cash_flow(forecasted_fcf, wacc, terminal_growth):
+    """
+    Value forecast cash flows plus a Gordon Growth terminal value
+
+    Paths where WACC does not exceed terminal growth have no finite terminal
+    value and are returned as NaN.
+
+    Args:
+        forecasted_fcf: Forecast free cash flows, shape (..., years)
+        wacc: Discount rate, shape (...)
+        terminal_growth: Terminal growth rate, shape (...)
+
+    Returns:
+        dict: 'enterprise_value', 'terminal_value', 'pv_fcf' and 'pv_terminal'
+    """
+    forecasted_fcf = np.asarray(forecasted_fcf, dtype=float)
+    wacc = np.asarray(wacc, dtype=float)
+    terminal_growth = np.asarray(terminal_growth, dtype=float)
+    years = forecasted_fcf.shape[-1]
+
+    factors = discount_factors(wacc, years)
+    pv_fcf = np.sum(forecasted_fcf * factors, axis=-1)
+
+    spread = wacc - terminal_growth
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terminal_value = np.where(
+            spread > 0,
+            forecasted_fcf[..., -1] * (1 + terminal_growth) / spread,
+            np.nan,
+        )
+    pv_terminal = terminal_value * factors[..., -1]
+
+    return {
+        'enterprise_value': pv_fcf + pv_terminal,
+        'terminal_value': terminal_value,
+        'pv_fcf': pv_fcf,
+        'pv_terminal': pv_terminal,
+    }
+
+
+def simulate_equity_values(inputs, rng, size, beta_std=0.2, terminal_growth_std=0.005,
+                           risk_free_rate_std=0.005, market_risk_premium_std=0.01,
+                           growth_std=0.02, sampling='random'):
+    """
+    Draw and value a block of Monte Carlo paths
+
+    Beta, terminal growth, risk-free rate, market risk premium and each
+    forecast year's growth rate are drawn from normals centred on the inputs.
+
+    Args:
+        inputs: Dict of the model's beta, terminal_growth, risk_free_rate,
+            market_risk_premium, growth_rates, historical_fcf, market_cap,
+            total_debt, cash and tax_rate (see DCFModel.simulation_inputs)
+        rng: np.random.Generator for this block
+        size: Number of paths
+        sampling: Sampling design for the block (see sampling.py)
+
+    Returns:
+        np.ndarray: Simulated equity values (NaN where WACC <= terminal growth)
+    """
+    growth_rates = np.asarray(inputs['growth_rates'], dtype=float)
+    if sampling == 'random':
+        beta = rng.normal(inputs['beta'], beta_std, size)
+        terminal_growth = rng.normal(inputs['terminal_growth'], terminal_growth_std, size)
+        risk_free_rate = rng.normal(inputs['risk_free_rate'], risk_free_rate_std, size)
+        market_risk_premium = rng.normal(inputs['market_risk_premium'], market_risk_premium_std, size)
+        growth_rates = rng.normal(growth_rates, growth_std, (size, growth_rates.size))
+    else:
+        z = standard_normals(rng, size, 4 + growth_rates.size, sampling)
+        beta = inputs['beta'] + beta_std * z[:, 0]
+        terminal_growth = inputs['terminal_growth'] + terminal_growth_std * z[:, 1]
+        risk_free_rate = inputs['risk_free_rate'] + risk_free_rate_std * z[:, 2]
+        market_risk_premium = inputs['market_risk_premium'] + market_risk_premium_std * z[:, 3]
+        growth_rates = growth_rates + growth_std * z[:, 4:]
+
+    wacc = vectorized_wacc(beta, risk_free_rate, market_risk_premium,
+                           inputs['market_cap'], inputs['total_debt'], inputs['tax_rate'])
+    forecasted_fcf = forecast_fcf(inputs['historical_fcf'], growth_rates)
+    valuation = discounted_cash_flow(forecasted_fcf, wacc, terminal_growth)
+
+    return valuation['enterprise_value'] - inputs['total_debt'] + inputs['cash']
+
+
+def summarize_distribution(values, percentiles=(1, 5, 10, 25, 50, 75, 90, 95, 99)):
+    """
+    Summarize a simulated distribution, ignoring non-finite samples
+
+    Args:
+        values: Simulated values
+        percentiles: Percentiles to report
+
+    Returns:
+        dict: Mean, median, std, 95% interval and requested percentiles
+    """
+    values = np.asarray(values, dtype=float)
+    finite = values[np.isfinite(values)]
+
+    if finite.size == 0:
+        nan = float('nan')
+        return {
+            'mean': nan, 'median': nan, 'std': nan,
+            'ci_lower': nan, 'ci_upper': nan,
+            'percentiles': {f'p{p:g}': nan for p in percentiles},
+        }
+
+    points = np.percentile(finite, [2.5, 50, 97.5, *percentiles])
+
+    return {
+        'mean': float(finite.mean()),
+        'median': float(points[1]),
+        'std': float(finite.std(ddof=1)) if finite.size > 1 else 0.0,
+        'ci_lower': float(points[0]),
+        'ci_upper': float(points[2]),
+        'percentiles': {f'p{p:g}': float(v) for p, v in zip(percentiles, points[3:])},
+    }
+
+
+def wacc_gradient(beta, market_risk_premium, market_cap, total_debt):
+    """
+    Partial derivatives of WACC with respect to its CAPM inputs
+
+    Args:
+        beta: Equity beta
+        market_risk_premium: Market risk premium
+        market_cap: Market value of equity
+        total_debt: Total debt
+
+    Returns:
+        dict: dWACC/dbeta, dWACC/drisk_free_rate and dWACC/dmarket_risk_premium
+    """
+    market_cap = np.asarray(market_cap, dtype=float)
+    total_value = market_cap + np.asarray(total_debt, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight_equity = np.where(total_value == 0, 0.0, market_cap / total_value)
+
+    return {
+        'beta': weight_equity * np.asarray(market_risk_premium, dtype=float),
+        'risk_free_rate': weight_equity,
+        'market_risk_premium': weight_equity * np.asarray(beta, dtype=float),
+    }
+
+
+def dcf_gradient(base_fcf, growth_rates, wacc, terminal_growth):
+    """
+    Enterprise value and its partial derivatives in closed form
+
+    Differentiates EV = sum_t F_t / (1 + w)^t + TV / (1 + w)^N with
+    F_t = F_0 * prod_{s<=t} (1 + g_s) and TV = F_N (1 + G) / (w - G).
+
+    Args:
+        base_fcf: Base-year free cash flow F_0, shape (...)
+        growth_rates: Growth rate per forecast year, shape (..., years)
+        wacc: Discount rate w, shape (...)
+        terminal_growth: Terminal growth rate G, shape (...)
+
+    Returns:
+        dict: 'enterprise_value' and its derivatives with respect to 'wacc',
+            'terminal_growth', 'base_fcf' and 'growth_rates' (shape (..., years))
+    """
+    growth_rates = np.asarray(growth_rates, dtype=float)
+    wacc = np.asarray(wacc, dtype=float)
+    terminal_growth = np.asarray(terminal_growth, dtype=float)
+    base_fcf = np.asarray(base_fcf, dtype=float)
+
+    # Cash flows per unit of base FCF; EV is linear in F_0
+    unit_fcf = forecast_fcf(np.ones_like(base_fcf), growth_rates)
+    forecasted_fcf = base_fcf[..., None] * unit_fcf
+    years = forecasted_fcf.shape[-1]
+    periods = np.arange(1, years + 1)
+    factors = discount_factors(wacc, years)
+
+    pv_flows = forecasted_fcf * factors
+    last_fcf = forecasted_fcf[..., -1]
+    last_factor = factors[..., -1]
+    spread = wacc - terminal_growth
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid = spread > 0
+        terminal_value = np.where(valid, last_fcf * (1 + terminal_growth) / spread, np.nan)
+        pv_terminal = terminal_value * last_factor
+        enterprise_value = pv_flows.sum(axis=-1) + pv_terminal
+
+        # d/dw of F_t (1+w)^-t is -t F_t (1+w)^-(t+1); the terminal value adds
+        # both its own dependence on w and its discounting over N years
+        dterminal_dwacc = -terminal_value / spread
+        d_wacc = (
+            -(periods * pv_flows).sum(axis=-1) / (1 + wacc)
+            + dterminal_dwacc * last_factor
+            - years * pv_terminal / (1 + wacc)
+        )
+        d_terminal_growth = np.where(valid, last_fcf * (1 + wacc) / spread ** 2, np.nan) * last_factor
+
+        # Growth in year k scales every cash flow from year k onward, including
+        # the terminal value, by 1 / (1 + g_k)
+        tail_value = np.flip(np.cumsum(np.flip(pv_flows, axis=-1), axis=-1), axis=-1) + pv_terminal[..., None]
+        d_growth = tail_value / (1 + growth_rates)
+
+        unit_terminal = np.where(valid, unit_fcf[..., -1] * (1 + terminal_growth) / spread, np.nan)
+        d_base_fcf = (unit_fcf * factors).sum(axis=-1) + unit_terminal * last_factor
+
+    return {
+        'enterprise_value': enterprise_value,
+        'wacc': d_wacc,
+        'terminal_growth': d_terminal_growth,
+        'base_fcf': d_base_fcf,
+        'growth_rates': d_growth,
+    }
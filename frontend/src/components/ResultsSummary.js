@@ -6,6 +6,7 @@ import Card from '@mui/material/Card';
 import CardContent from '@mui/material/CardContent';
 import Divider from '@mui/material/Divider';
 import Tooltip from '@mui/material/Tooltip';
+import Alert from '@mui/material/Alert';
 import InfoIcon from '@mui/icons-material/Info';
 
 // Helper functions for value formatting
@@ -39,7 +40,9 @@ const ResultsSummary = ({ results, ticker }) => {
     terminal_value,
     terminal_growth,
     forecast_cash_flows = [],
-    monte_carlo = {}
+    monte_carlo = {},
+    stale = false,
+    fallback = false
   } = results;
 
   // Calculate additional metrics
@@ -53,6 +56,17 @@ const ResultsSummary = ({ results, ticker }) => {
       <Typography variant="h5" gutterBottom>
         Valuation Summary: {ticker}
       </Typography>
+
+      {fallback && (
+        <Alert severity="error" sx={{ mt: 1 }}>
+          Company data could not be fetched, so this valuation uses placeholder values and does not describe {ticker}.
+        </Alert>
+      )}
+      {stale && !fallback && (
+        <Alert severity="warning" sx={{ mt: 1 }}>
+          The data source is unavailable; this valuation uses previously fetched data.
+        </Alert>
+      )}
       
       <Grid container spacing={3} sx={{ mt: 1 }}>
         {/* Key Valuation Metrics */}
@@ -1,5 +1,6 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
+import axios from 'axios';
 import TextField from '@mui/material/TextField';
 import Button from '@mui/material/Button';
 import Box from '@mui/material/Box';
@@ -10,7 +11,6 @@ import ListItemText from '@mui/material/ListItemText';
 import Paper from '@mui/material/Paper';
 import CircularProgress from '@mui/material/CircularProgress';
 import SearchIcon from '@mui/icons-material/Search';
-// We'll implement actual API calls later
 
 const TickerSearch = () => {
   const [query, setQuery] = useState("");
@@ -18,25 +18,15 @@ const TickerSearch = () => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
   const navigate = useNavigate();
-
-  // Simulated ticker data for demonstration
-  // In a real app, this would come from an API
-  const demoTickers = [
-    { symbol: 'AAPL', name: 'Apple Inc.' },
-    { symbol: 'MSFT', name: 'Microsoft Corporation' },
-    { symbol: 'GOOGL', name: 'Alphabet Inc.' },
-    { symbol: 'AMZN', name: 'Amazon.com Inc.' },
-    { symbol: 'META', name: 'Meta Platforms, Inc.' },
-    { symbol: 'TSLA', name: 'Tesla, Inc.' },
-    { symbol: 'NVDA', name: 'NVIDIA Corporation' },
-    { symbol: 'JPM', name: 'JPMorgan Chase & Co.' },
-    { symbol: 'V', name: 'Visa Inc.' },
-    { symbol: 'JNJ', name: 'Johnson & Johnson' }
-  ];
+  // Number of the latest search, so responses to earlier keystrokes are ignored
+  const latestSearch = useRef(0);
   
   const searchTickers = async (q) => {
-    if (q.length < 2) {
+    const searchId = ++latestSearch.current;
+    
+    if (q.trim().length < 1) {
       setSuggestions([]);
+      setLoading(false);
       return;
     }
     
@@ -44,22 +34,22 @@ const TickerSearch = () => {
     setError("");
     
     try {
-      // In a production app, we would call an actual API like:
-      // const response = await axios.get(`/api/search-tickers?query=${q}`);
-      // const data = response.data;
+      const response = await axios.get('/api/search-tickers', {
+        params: { query: q, limit: 10 }
+      });
       
-      // For demonstration, we'll filter the demo data
-      const filteredTickers = demoTickers.filter(ticker => 
-        ticker.symbol.toLowerCase().includes(q.toLowerCase()) || 
-        ticker.name.toLowerCase().includes(q.toLowerCase())
-      );
-      
-      setSuggestions(filteredTickers);
+      if (searchId === latestSearch.current) {
+        setSuggestions(response.data.data);
+      }
     } catch (err) {
-      console.error('Error searching tickers:', err);
-      setError("Could not load ticker suggestions. Please try again.");
+      if (searchId === latestSearch.current) {
+        console.error('Error searching tickers:', err);
+        setError("Could not load ticker suggestions. Please try again.");
+      }
     } finally {
-      setLoading(false);
+      if (searchId === latestSearch.current) {
+        setLoading(false);
+      }
     }
   };
   